@@ -0,0 +1,73 @@
+from workbench import runner
+from workbench.models.agents import ClaudeAgent, ClaudeToolsAgent, StubAgent
+from workbench.runner import run_task, arun_tasks
+from workbench.trace_store import get_trace_store
+from types import SimpleNamespace
+from pathlib import Path
+import asyncio
+import json
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+PROMPTS = str(ROOT / "prompts" / "v2")
+TASKS = sorted(str(p) for p in (ROOT / "tasks" / "v1-simple-no-ledger").glob("*.json"))
+
+
+def scripted_response(request: dict):
+    """One calculate call, then the stub agent's answer (a draft or a repair depending on the prompt)."""
+    messages = request["messages"]
+    if len(messages) == 1 and "tools" in request:
+        block = SimpleNamespace(type="tool_use", id="tool_1", name="calculate", input={"expression": "2000 - 4000"})
+        return SimpleNamespace(stop_reason="tool_use", content=[block])
+    if messages[0]["content"].startswith("Original scenario that failed"):
+        text = StubAgent().repair("", {})
+    else:
+        text = StubAgent().draft("", "")
+    return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(type="text", text=text)])
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+        self.messages = self
+
+    def create(self, **request):
+        self.requests.append(json.dumps(request, default=str))
+        return scripted_response(request)
+
+
+class FakeAsyncClient(FakeClient):
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return super().create(**request)
+
+
+@pytest.mark.parametrize("agent_class", [ClaudeAgent, ClaudeToolsAgent])
+def test_async_agent_matches_sync(agent_class):
+    agent = agent_class(client=FakeClient(), async_client=FakeAsyncClient())
+    failure = {"verdict": "infeasible", "first_violation_month": "2024-03", "violated_invariant": "liquidity_floor", "violations": []}
+
+    assert asyncio.run(agent.adraft("prompt", "draft", False, PROMPTS)) == agent.draft("prompt", "draft", False, PROMPTS)
+    assert asyncio.run(agent.arepair("{}", failure, False, PROMPTS)) == agent.repair("{}", failure, False, PROMPTS)
+    assert agent.async_client.requests == agent.client.requests
+
+
+def test_arun_tasks_share_one_loop_with_in_flight_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # traces are written relative to the working directory
+    async_client = FakeAsyncClient()
+    monkeypatch.setattr(runner, "get_agent", lambda model: ClaudeToolsAgent(client=FakeClient(), async_client=async_client))
+
+    expected = [run_task(path, "claude-tools", "sync", PROMPTS) for path in TASKS]
+    results = asyncio.run(arun_tasks(TASKS, "claude-tools", "async", PROMPTS, max_in_flight=3))
+
+    assert [r.model_dump() for r in results] == [r.model_dump() for r in expected]
+    assert async_client.max_in_flight == 3
+    assert len(get_trace_store("traces").entries("async")) == len(TASKS)
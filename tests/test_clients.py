@@ -0,0 +1,50 @@
+from workbench.models import clients
+from workbench.models.agents import get_agent
+from workbench.models.clients import configure_client_pool, get_client, get_async_client
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    configure_client_pool()
+    yield
+    configure_client_pool()
+
+
+def test_agents_share_one_client():
+    assert get_agent("claude").client is get_agent("claude-tools").client is get_client()
+
+
+def test_shared_client_is_created_once_across_threads():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        seen = list(executor.map(lambda _: get_client(), range(64)))
+    assert all(client is seen[0] for client in seen)
+
+
+def test_async_client_is_per_event_loop():
+    async def two_lookups():
+        return get_async_client(), get_async_client()
+
+    first, again = asyncio.run(two_lookups())
+    second, _ = asyncio.run(two_lookups())
+    assert first is again
+    assert first is not second
+
+
+def test_configure_client_pool_resets_clients():
+    before = get_client()
+    configure_client_pool(64)
+    assert clients.get_pool_size() == 64
+    assert clients._limits().max_keepalive_connections == 64
+    assert get_client() is not before
+    with pytest.raises(ValueError):
+        configure_client_pool(0)
+
+
+def test_missing_api_key(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY")
+    with pytest.raises(ValueError, match="ANTHROPIC_API_KEY"):
+        get_agent("claude")
@@ -0,0 +1,55 @@
+from workbench import comparison
+from workbench.comparison import ComparisonConfig, run_comparison
+from workbench.runner import run_task
+from workbench.trace_store import get_trace_store
+from pathlib import Path
+import threading
+import time
+import pytest
+
+STUB_TASKS = str(Path(__file__).resolve().parent.parent / "tasks" / "v1-stub")
+
+
+def stub_config(concurrency: int, runs: int = 6, use_async: bool = False) -> ComparisonConfig:
+    return ComparisonConfig.from_csv_params("stub,bad_json", STUB_TASKS, runs_per_condition=runs, session_id="test", concurrency=concurrency, use_async=use_async)
+
+
+def result_keys(comparison_result):
+    return [(r.condition_id, r.task_id, r.final_verdict, r.error_category) for r in comparison_result.results]
+
+
+def test_concurrent_comparison_matches_sequential_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # traces are written relative to the working directory
+    sequential = run_comparison(stub_config(concurrency=1))
+    concurrent = run_comparison(stub_config(concurrency=4))
+    assert len(concurrent.results) == 12
+    assert result_keys(concurrent) == result_keys(sequential)
+    # Traces stay grouped under per-condition session IDs
+    assert len(get_trace_store("traces").entries("test_stub_v1-stub_run3")) == 2
+
+
+def test_async_comparison_matches_sequential_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sequential = run_comparison(stub_config(concurrency=1))
+    concurrent = run_comparison(stub_config(concurrency=3, use_async=True))
+    assert result_keys(concurrent) == result_keys(sequential)
+
+
+def test_concurrent_comparison_keeps_partial_results_on_interrupt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def interrupted_run_task(session_id, **kwargs):
+        if session_id.endswith("stub_v1-stub_run4"):
+            raise KeyboardInterrupt
+        if "bad_json" in session_id:
+            time.sleep(0.5)
+        return run_task(session_id=session_id, **kwargs)
+
+    monkeypatch.setattr(comparison, "run_task", interrupted_run_task)
+    result = run_comparison(stub_config(concurrency=2))
+    # Tasks already running when the interrupt arrived were waited for and reported, not left in the background
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("ThreadPoolExecutor")]
+    assert len(list(get_trace_store("traces").traces())) == len(result.results)
+    condition_ids = [r.condition_id for r in result.results]
+    assert 0 < len(condition_ids) < 12
+    assert condition_ids == sorted(condition_ids, key=[c.condition_id for c in result.conditions].index)
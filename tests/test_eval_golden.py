@@ -1,6 +1,10 @@
 from workbench.month import Month
 from workbench.types import Scenario, Event, BaseMonthly, InitialState, InvariantType
 from workbench.eval import run_eval
+from workbench.models.agents import StubAgent
+from workbench.models.format_utils import format_eval_failure
+from workbench import runner
+from pathlib import Path
 import pytest
 
 def test_simple_feasible_scenario():
@@ -363,4 +367,43 @@ def test_large_horizon():
     # First 12 months: +500/month = +6000
     # Remaining 48 months: +1000/month = +48000
     # Total: 10000 + 6000 + 48000 = 64000
-    assert result.ledger_summary["ending_cash"] == 64000
\ No newline at end of file
+    assert result.ledger_summary["ending_cash"] == 64000
+
+def test_feasibility_margin():
+    """A one-off expense dips below the floor for two months before income catches up"""
+    scenario = Scenario(
+        id="margin",
+        title="Temporary shortfall",
+        start_month=Month(2024, 1),
+        horizon_months=5,
+        initial_state=InitialState(starting_cash=1000),
+        base_monthly=BaseMonthly(takehome_salary=2000, outflows=-1500),
+        events=[Event(label="repair", start_month=Month(2024, 2), amount=-3000, duration_months=1)]
+    )
+
+    margin = run_eval(scenario).margin
+    assert margin.slack == [1500, -1000, -500, 0, 500]
+    assert margin.binding_month == "2024-02"
+    assert margin.months_below_floor == 2
+    assert margin.cumulative_deficit == 1500
+    # A 500/month cut adds 1000 by February and 1500 by March
+    assert margin.required_baseline_cut == 500
+    assert margin.required_relief == 1000
+
+
+class RepairRecordingAgent(StubAgent):
+    def repair(self, scenario_json, eval_result, *args):
+        self.failure = format_eval_failure(eval_result)
+        return super().repair(scenario_json, eval_result, *args)
+
+
+def test_margin_hints_are_opt_in(tmp_path, monkeypatch):
+    task = str(next(Path("tasks/v1-stub").resolve().glob("*.json")))
+    monkeypatch.chdir(tmp_path)
+    agent = RepairRecordingAgent()
+    monkeypatch.setattr(runner, "get_agent", lambda model: agent)
+
+    runner.run_task(task, "stub", "plain")
+    assert "Ending cash" in agent.failure and "Baseline outflows would need a cut" not in agent.failure
+    runner.run_task(task, "stub", "hints", margin_hints=True)
+    assert "Baseline outflows would need a cut of at least $1,584/month" in agent.failure
@@ -0,0 +1,156 @@
+from workbench.month import Month
+from workbench.types import Event, Violation, InvariantType, Scenario, InitialState, BaseMonthly, Constraints, FloorStep, SavingsTarget
+from workbench.invariants import check_invariants, check_liquidity_floor, check_money_conservation, check_temporal_consistency, register_invariant, InvariantCheck
+from workbench.eval import run_eval, run_eval_batch
+from workbench import invariants
+from workbench.ledger import Ledger
+from workbench.simulate import simulate
+from tests.test_simulate import random_scenario
+import dataclasses
+import random
+import pytest
+
+
+def reference_violations(scenario, records):
+    """The three separate passes check_invariants used to make."""
+    violations = []
+    checks = [
+        (InvariantType.LIQUIDITY_FLOOR, check_liquidity_floor(records)),
+        (InvariantType.MONEY_CONSERVATION, check_money_conservation(scenario, records)),
+        (InvariantType.TEMPORAL_CONSISTENCY, check_temporal_consistency(records)),
+    ]
+    for invariant, (record, magnitude, details) in checks:
+        if record:
+            violations.append(Violation(invariant=invariant, month=record.month, record=record, magnitude=magnitude, details=details))
+    return violations or None
+
+
+def corrupted_records(seed: int):
+    rng = random.Random(seed)
+    scenario = random_scenario(seed, horizon=rng.randint(1, 60), n_events=rng.randint(0, 12))
+    records = simulate(scenario)
+    for _ in range(rng.randint(0, 3)):
+        record = records[rng.randrange(len(records))]
+        kind = rng.choice(["starting_cash", "ending_cash", "total_inflows", "event", "first_start"])
+        if kind == "event":
+            stray = Event(label="stray", start_month=record.month.add(rng.choice([-3, 1])), amount=-50, duration_months=1)
+            record.events_applied = record.events_applied + [stray]
+        elif kind == "first_start":
+            records[0].starting_cash += 1
+        else:
+            setattr(record, kind, getattr(record, kind) + rng.choice([-0.5, 7, 1e6]))
+    return scenario, records
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_fused_checker_matches_separate_passes(seed):
+    scenario, records = corrupted_records(seed)
+    expected = reference_violations(scenario, records)
+    assert check_invariants(scenario, records) == expected
+    assert check_invariants(scenario, Ledger.from_records(records)) == expected
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_first_only_returns_precedence_winner(seed):
+    scenario, records = corrupted_records(seed)
+    expected = reference_violations(scenario, records)
+    if expected is None:
+        assert check_invariants(scenario, records, first_only=True) is None
+        return
+    first = min(expected, key=lambda v: (v.month._index, v.invariant.get_precedence()))
+    assert check_invariants(scenario, records, first_only=True) == [first]
+    assert check_invariants(scenario, Ledger.from_records(records), first_only=True) == [first]
+
+
+def test_first_only_stops_early(monkeypatch):
+    scenario = steady_scenario().model_copy(update={"horizon_months": 600})
+    records = simulate(scenario)
+    records[20].ending_cash += 5  # breaks conservation in month 20
+    expected = check_invariants(scenario, records)
+
+    checked = []
+    monkeypatch.setattr(invariants, "INVARIANTS", {
+        invariant: dataclasses.replace(check, violations=lambda scenario, ledger, parameters, inner=check.violations: checked.append(len(ledger)) or inner(scenario, ledger, parameters))
+        for invariant, check in invariants.INVARIANTS.items()
+    })
+    [first] = check_invariants(scenario, records, first_only=True)
+    assert first == expected[0] and first.month == records[20].month
+    # Prefixes of 13 and 25 months are packed; nothing looks at the other 575
+    assert max(checked) <= 25
+
+    checked.clear()
+    assert check_invariants(scenario, Ledger.from_records(records), first_only=True) == [first]
+    # Conservation (first in precedence) sees the whole ledger; the rest only up to the month after it fired
+    assert checked[0] == 600 and max(checked[1:]) == 21
+
+
+def test_same_month_uses_precedence():
+    scenario = random_scenario(1, horizon=6, n_events=0)
+    records = simulate(scenario)
+    # Break conservation and the floor in the same month: conservation has precedence
+    records[2].ending_cash = -1.0
+    violations = check_invariants(scenario, records, first_only=True)
+    assert [v.invariant for v in violations] == [InvariantType.MONEY_CONSERVATION]
+    assert violations[0].month == records[2].month
+
+
+def constrained(scenario, **constraints):
+    return scenario.model_copy(update={"constraints": Constraints(**constraints)})
+
+
+def steady_scenario(**constraints):
+    # 1000 cash, +500 a month, then a 2000 bill in April: cash 1500, 2000, 2500, 1000, 1500, 2000
+    scenario = Scenario(
+        id="steady", title="Steady", start_month=Month(2024, 1), horizon_months=6,
+        initial_state=InitialState(starting_cash=1000),
+        base_monthly=BaseMonthly(takehome_salary=2000, outflows=-1500),
+        events=[Event(label="bill", start_month=Month(2024, 4), amount=-2000, duration_months=1)]
+    )
+    return constrained(scenario, **constraints) if constraints else scenario
+
+
+def test_scenario_floor_and_schedule():
+    assert run_eval(steady_scenario()).verdict == "feasible"
+
+    result = run_eval(steady_scenario(liquidity_floor=1200))
+    assert result.first_violation_month == "2024-04"
+    assert result.violations[0].magnitude == 200
+    assert result.margin.slack == [300, 800, 1300, -200, 300, 800]
+
+    # The floor steps up to 1800 from May on: May (1500) is the first month below it
+    schedule = [FloorStep(month=Month(2024, 5), floor=1800)]
+    result = run_eval(steady_scenario(floor_schedule=schedule))
+    assert (result.first_violation_month, result.violated_invariant) == ("2024-05", InvariantType.LIQUIDITY_FLOOR)
+    assert result.violations[0].details == "Cash fell below 1800.0 to 1500.0 at 2024-05"
+
+
+def test_optional_invariants():
+    scenario = steady_scenario(max_consecutive_deficit_months=0, savings_target=SavingsTarget(amount=2500))
+    violations = {v.invariant: v for v in run_eval(scenario).violations}
+    assert violations[InvariantType.MAX_CONSECUTIVE_DEFICIT].month == Month(2024, 4)
+    assert violations[InvariantType.SAVINGS_TARGET].month == Month(2024, 6)
+    assert violations[InvariantType.SAVINGS_TARGET].magnitude == 500
+    assert run_eval(steady_scenario(max_consecutive_deficit_months=1, savings_target=SavingsTarget(amount=2500, month=Month(2024, 3)))).verdict == "feasible"
+
+    # Batch evals fall back to the full check for these
+    summaries = run_eval_batch([scenario, steady_scenario()])
+    assert [s.violated_invariant for s in summaries] == [InvariantType.MAX_CONSECUTIVE_DEFICIT, None]
+
+
+def test_registered_invariant_joins_the_fused_pass(monkeypatch):
+    monkeypatch.setattr(invariants, "INVARIANTS", dict(invariants.INVARIANTS))
+    # Stand-in for a new rule: no month may end with more than 2400
+    register_invariant(InvariantCheck(
+        InvariantType.SAVINGS_TARGET,
+        lambda scenario, ledger, parameters: ledger.ending_cash > parameters["cap"],
+        lambda scenario, records, j, parameters: (records[j].ending_cash - parameters["cap"], "over the cap"),
+        lambda scenario: {"cap": 2400},
+    ))
+    result = run_eval(steady_scenario())
+    assert (result.first_violation_month, result.violations[0].details) == ("2024-03", "over the cap")
+
+
+def test_scenarios_without_constraints_serialize_as_before():
+    scenario = random_scenario(3, horizon=6, n_events=2)
+    assert "constraints" not in scenario.model_dump_json()
+    assert "constraints" in constrained(scenario, liquidity_floor=10).model_dump()
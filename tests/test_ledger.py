@@ -0,0 +1,61 @@
+from workbench.ledger import Ledger
+from workbench.simulate import simulate, simulate_ledger
+from workbench.eval import run_eval, EvalResult
+from workbench.runner import validate_ledger
+from workbench.invariants import check_invariants
+from tests.test_simulate import random_scenario
+import pytest
+
+
+def test_ledger_indexing_builds_records():
+    scenario = random_scenario(4, horizon=36)
+    ledger = simulate_ledger(scenario)
+    records = simulate(scenario)
+    assert len(ledger) == len(records)
+    assert ledger[0] == records[0]
+    assert ledger[-1] == records[-1]
+    assert ledger[10:20] == records[10:20]
+    assert list(ledger) == records
+    with pytest.raises(IndexError):
+        ledger[36]
+
+
+def test_ledger_round_trips_through_records_and_json():
+    for seed in range(10):
+        scenario = random_scenario(seed, horizon=48)
+        ledger = simulate_ledger(scenario)
+        assert Ledger.from_records(simulate(scenario)) == ledger
+        result = run_eval(scenario)
+        assert EvalResult.model_validate_json(result.model_dump_json()) == result
+
+
+def test_ledger_serializes_like_records():
+    scenario = random_scenario(2, horizon=24)
+    dumped = run_eval(scenario).model_dump(mode="json")["ledger"]
+    assert dumped == [record.model_dump(mode="json") for record in simulate(scenario)]
+
+
+def test_validate_ledger_and_invariants_accept_ledger():
+    scenario = random_scenario(5, horizon=24)
+    records = simulate(scenario)
+    ledger = simulate_ledger(scenario)
+    assert validate_ledger(records, ledger)
+    assert not validate_ledger(records[:-1], ledger)
+    assert check_invariants(scenario, ledger) == check_invariants(scenario, records)
+
+
+def test_ledger_memory_is_an_order_of_magnitude_smaller():
+    import tracemalloc
+    scenario = random_scenario(3, horizon=600, n_events=40)
+
+    tracemalloc.start()
+    records = simulate(scenario)
+    records_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    ledger = simulate_ledger(scenario)
+    ledger_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert ledger_bytes * 10 < records_bytes
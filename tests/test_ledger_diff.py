@@ -0,0 +1,104 @@
+from workbench.ledger_diff import diff_ledgers, EVENTS_FIELD, MONTH_FIELD
+from workbench.simulate import simulate, simulate_ledger
+from workbench.scoring import calculate_task_score
+from workbench.task_types import Task, TaskResult
+from tests.test_simulate import random_scenario
+import pytest
+
+
+def scenario_with_events():
+    seed = 0
+    while not any(simulate(random_scenario(seed, horizon=24))[8].events_applied):
+        seed += 1
+    return random_scenario(seed, horizon=24)
+
+
+def test_matching_ledgers():
+    scenario = random_scenario(3, horizon=36)
+    records = simulate(scenario)
+    noisy = [record.model_copy(update={"ending_cash": record.ending_cash + 1e-7}) for record in records]
+    diff = diff_ledgers(noisy, simulate_ledger(scenario))
+    assert diff.matches and diff.accuracy == 1.0
+    assert diff.first_divergence is None
+    assert diff.field_mismatches == {} and diff.max_difference == 0
+
+
+def test_first_cash_divergence():
+    scenario = random_scenario(3, horizon=36)
+    records = simulate(scenario)
+    # An arithmetic slip in month 5 carried through the rest of the ledger
+    for i in range(5, len(records)):
+        update = {"ending_cash": records[i].ending_cash + 100}
+        if i > 5:
+            update["starting_cash"] = records[i].starting_cash + 100
+        records[i] = records[i].model_copy(update=update)
+
+    diff = diff_ledgers(records, simulate_ledger(scenario))
+    assert not diff.matches
+    assert diff.months_matching == 5
+    assert diff.accuracy == pytest.approx(5 / 36)
+    assert diff.first_divergence.month == records[5].month.to_string()
+    assert diff.first_divergence.field == "ending_cash"
+    assert diff.first_divergence.difference == 100
+    assert diff.first_divergence.actual == records[5].ending_cash
+    assert diff.field_mismatches == {"starting_cash": 30, "ending_cash": 31}
+    assert diff.max_difference == 100
+
+    assert diff_ledgers(records, simulate_ledger(scenario), tolerance=100).matches
+
+
+def test_missing_and_extra_months():
+    scenario = random_scenario(1, horizon=12)
+    records = simulate(scenario)
+    agent = records[:3] + records[4:10] + [records[9]]  # month 3 skipped, month 9 repeated, months 10-11 left out
+    diff = diff_ledgers(agent, simulate_ledger(scenario))
+    assert diff.months_matching == 9
+    assert diff.missing_month_count == 3
+    assert diff.missing_months == [records[i].month.to_string() for i in (3, 10, 11)]
+    assert diff.extra_months == [records[9].month.to_string()]
+    assert diff.first_divergence.month == records[3].month.to_string()
+    assert diff.first_divergence.field == MONTH_FIELD
+    assert diff.accuracy == pytest.approx(9 / 13)
+
+    # Months are aligned by date, not position
+    assert diff_ledgers(list(reversed(records)), simulate_ledger(scenario)).matches
+
+
+def test_wrong_events_applied():
+    scenario = scenario_with_events()
+    records = simulate(scenario)
+    dropped = records[8].events_applied[0]
+    records[8] = records[8].model_copy(update={"events_applied": records[8].events_applied[1:]})
+
+    diff = diff_ledgers(records, simulate_ledger(scenario))
+    assert diff.field_mismatches == {EVENTS_FIELD: 1}
+    assert diff.first_divergence.field == EVENTS_FIELD
+    [mismatch] = diff.events_mismatches
+    assert mismatch.month == records[8].month.to_string()
+    assert mismatch.missing == [dropped.label] and mismatch.extra == []
+
+    # An event amount off by float noise is still the same event
+    noisy = [
+        record.model_copy(update={"events_applied": [e.model_copy(update={"amount": e.amount + 1e-9}) for e in record.events_applied]})
+        for record in simulate(scenario)
+    ]
+    assert diff_ledgers(noisy, simulate_ledger(scenario)).matches
+
+
+def test_ledger_accuracy_is_reported_beside_the_score():
+    scenario = random_scenario(3, horizon=10)
+    records = simulate(scenario)
+    records[7] = records[7].model_copy(update={"total_inflows": records[7].total_inflows + 1})
+    task = Task(id="t", title="t", prompt="p", generate_ledger=True)
+    result = TaskResult(task_id="t", initial_verdict="feasible", final_verdict="feasible", draft_ledger_correct=False)
+
+    assert calculate_task_score(result, task)["ledger_accuracy"] == {"draft": None, "repair": None}
+    result.draft_ledger_diff = diff_ledgers(records, simulate_ledger(scenario))
+    score = calculate_task_score(result, task)
+    # Partial ledgers don't change the points, so scores stay comparable with earlier runs
+    assert score["breakdown"]["mathematical_precision"]["earned"] == 0
+    assert score["ledger_accuracy"]["draft"] == pytest.approx(0.9)
+    result.draft_ledger_correct = True
+    score = calculate_task_score(result, task)
+    assert score["breakdown"]["mathematical_precision"]["earned"] == 10
+    assert score["ledger_accuracy"]["draft"] == 1.0
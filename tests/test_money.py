@@ -0,0 +1,43 @@
+from workbench.money import to_cents, to_dollars
+from workbench.simulate import simulate, simulate_ledger, simulate_batch
+from workbench.invariants import check_invariants
+from workbench.runner import validate_ledger
+from workbench.types import InvariantType
+from tests.test_simulate import random_scenario
+import numpy as np
+
+
+def test_cents_conversion():
+    assert to_cents(0.1) + to_cents(0.2) == to_cents(0.3) == 30
+    assert to_cents(19.99 * 3) == 5997  # 59.97000000000001
+    assert to_dollars(123456) == 1234.56
+    assert to_cents([0.1, -0.29]).tolist() == [10, -29]
+    assert to_dollars(np.array([10, -29])).tolist() == [0.1, -0.29]
+
+
+def test_long_horizon_sums_are_exact():
+    # Dime-sized amounts accumulate float error in dollars; in cents every month's arithmetic is exact
+    scenario = random_scenario(7, horizon=600, n_events=30)
+    base_monthly = scenario.base_monthly.model_copy(update={"takehome_salary": 0.1, "outflows": -0.2})
+    events = [event.model_copy(update={"amount": 0.1 if event.amount > 0 else -0.3}) for event in scenario.events]
+    scenario = scenario.model_copy(update={"base_monthly": base_monthly, "events": events})
+
+    records = simulate(scenario)
+    violations = check_invariants(scenario, records) or []
+    assert InvariantType.MONEY_CONSERVATION not in [v.invariant for v in violations]
+    ledger = simulate_ledger(scenario)
+    assert ledger == records
+    assert np.array_equal(simulate_batch([scenario]).ending_cash_cents[0], ledger.ending_cash_cents)
+
+
+def test_agent_float_noise_is_not_a_mismatch():
+    scenario = random_scenario(1, horizon=24)
+    ledger = simulate_ledger(scenario)
+    records = simulate(scenario)
+    noisy = [record.model_copy(update={"ending_cash": record.ending_cash + 1e-9}) for record in records]
+    assert validate_ledger(noisy, ledger)
+    assert check_invariants(scenario, noisy) == check_invariants(scenario, records)
+
+    off_by_a_cent = list(records)
+    off_by_a_cent[5] = records[5].model_copy(update={"ending_cash": records[5].ending_cash + 0.01})
+    assert not validate_ledger(off_by_a_cent, ledger)
@@ -0,0 +1,65 @@
+from workbench import runner
+from workbench.models.agents import ClaudeAgent, ClaudeToolsAgent
+from workbench.trace_store import get_trace_store
+from tests.test_async_agents import PROMPTS, TASKS
+from tests.test_response_cache import api_message
+import json
+
+
+class RecordingClient:
+    def __init__(self):
+        self.requests = []
+        self.messages = self
+
+    def create(self, **request):
+        self.requests.append(json.loads(json.dumps(request, default=lambda block: block.model_dump(exclude_none=True))))
+        response = api_message(request)
+        response.usage.cache_read_input_tokens = 100
+        response.usage.cache_creation_input_tokens = 20
+        return response
+
+
+def breakpoints(value) -> int:
+    if isinstance(value, dict):
+        return ("cache_control" in value) + sum(breakpoints(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(breakpoints(v) for v in value)
+    return 0
+
+
+def test_tool_loop_marks_stable_prefix_as_cacheable():
+    client = RecordingClient()
+    agent = ClaudeToolsAgent(client=client)
+    tools_before = json.dumps(agent.tools)
+    agent.draft("prompt", "draft", False, PROMPTS, max_tool_calls=5)
+
+    assert len(client.requests) == 2
+    for request in client.requests:
+        assert request["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert request["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert request["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert breakpoints(request) <= 4
+    # Earlier turns are sent unmarked, and the agent's own state is untouched
+    assert "cache_control" not in json.dumps(client.requests[1]["messages"][:-1])
+    assert json.dumps(agent.tools) == tools_before
+
+
+def test_token_usage_is_recorded_per_step(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(runner, "get_agent", lambda model: ClaudeToolsAgent(client=RecordingClient()))
+    runner.run_task(TASKS[0], "claude-tools", "usage", PROMPTS)
+    [trace] = get_trace_store("traces").traces("usage")
+    steps = {step.step: step for step in trace.execution_steps}
+    assert steps["draft"].token_usage == {
+        "api_calls": 2, "input_tokens": 20, "output_tokens": 10,
+        "cache_creation_input_tokens": 40, "cache_read_input_tokens": 200,
+    }
+    assert steps["eval_initial"].token_usage is None
+
+
+def test_single_call_agent_caches_system_prompt():
+    client = RecordingClient()
+    agent = ClaudeAgent(client=client)
+    agent.draft("prompt", "draft", False, PROMPTS)
+    assert client.requests[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert agent.token_usage["api_calls"] == 1
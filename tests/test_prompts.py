@@ -0,0 +1,52 @@
+from workbench import runner
+from workbench.models.agents import ClaudeToolsAgent
+from workbench.models.prompts import get_prompts, clear_prompt_cache, TOOL_GUIDANCE
+from workbench.trace_store import get_trace_store
+from tests.test_async_agents import FakeClient, FakeAsyncClient, PROMPTS, TASKS
+import builtins
+import json
+import os
+import shutil
+
+
+def test_prompts_are_read_once_per_configuration(monkeypatch):
+    clear_prompt_cache()
+    first = get_prompts(PROMPTS, generate_ledger=True, tools=True)
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("prompt file re-read")
+
+    monkeypatch.setattr(builtins, "open", no_reads)
+    assert get_prompts(PROMPTS, generate_ledger=True, tools=True) is first
+
+
+def test_tool_prompts_carry_guidance_and_their_own_hash():
+    plain = get_prompts(PROMPTS)
+    tools = get_prompts(PROMPTS, tools=True)
+    assert tools.draft_system_prompt == TOOL_GUIDANCE + plain.draft_system_prompt
+    assert tools.repair_system_prompt == TOOL_GUIDANCE + plain.repair_system_prompt
+    assert tools.content_hash != plain.content_hash
+    assert get_prompts(PROMPTS, generate_ledger=True).content_hash != plain.content_hash
+
+
+def test_edited_prompt_is_reloaded(tmp_path):
+    prompt_dir = tmp_path / "prompts"
+    shutil.copytree(PROMPTS, prompt_dir)
+    before = get_prompts(str(prompt_dir))
+
+    path = prompt_dir / "draft_system.txt"
+    path.write_text("Edited draft prompt")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    after = get_prompts(str(prompt_dir))
+    assert after.draft_system_prompt == "Edited draft prompt"
+    assert after.content_hash != before.content_hash
+
+
+def test_trace_records_prompt_hash(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(runner, "get_agent", lambda model: ClaudeToolsAgent(client=FakeClient(), async_client=FakeAsyncClient()))
+    runner.run_task(TASKS[0], "claude-tools", "prompt_hash", PROMPTS)
+    [trace] = get_trace_store("traces").traces("prompt_hash")
+    assert trace.prompt_hash == get_prompts(PROMPTS, tools=True).content_hash
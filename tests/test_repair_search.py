@@ -0,0 +1,102 @@
+from workbench.repair_search import find_reference_repairs, repair_size, CENT, REPAIR_TYPES
+from workbench.eval import run_eval
+from workbench.runner import run_task, validate_repair_claim
+from workbench.trace_store import get_trace_store
+from tests.test_async_agents import PROMPTS, TASKS
+from tests.test_simulate import random_scenario
+import pytest
+
+
+def infeasible_scenarios(count: int):
+    seed = 0
+    while count:
+        scenario = random_scenario(seed, horizon=24, n_events=5)
+        seed += 1
+        if run_eval(scenario).verdict == "infeasible":
+            count -= 1
+            yield scenario
+
+
+def edited(scenario, repair_type, index, change):
+    """`scenario` with one knob moved by `change`, applied the way the search applies it."""
+    if repair_type == "baseline_reduction":
+        base_monthly = scenario.base_monthly.model_copy(update={"outflows": scenario.base_monthly.outflows + change})
+        return scenario.model_copy(update={"base_monthly": base_monthly})
+    events = list(scenario.events)
+    event = events[index]
+    if repair_type == "event_amount_adjustment":
+        events[index] = event.model_copy(update={"amount": event.amount + change})
+    elif event.start_month.add(change) >= scenario.start_month:
+        events[index] = event.model_copy(update={"start_month": event.start_month.add(change)})
+    return scenario.model_copy(update={"events": events})
+
+
+@pytest.mark.parametrize("scenario", list(infeasible_scenarios(25)), ids=lambda s: s.id)
+def test_reference_repairs_are_valid_and_minimal(scenario):
+    repairs = find_reference_repairs(scenario)
+    types = [repair.type for repair in repairs]
+    assert types == [t for t in REPAIR_TYPES if t in types]
+    for repair in repairs:
+        assert run_eval(repair.scenario).verdict == "feasible"
+        assert validate_repair_claim(scenario.model_dump_json(), repair.scenario.model_dump_json(), repair.type)
+        assert repair_size(scenario, repair.scenario, repair.type) == pytest.approx(abs(repair.change))
+
+        if repair.type == "event_timing_shift":
+            # No event moved by fewer months works
+            shorter = abs(int(repair.change)) - 1
+            for index in range(len(scenario.events)):
+                for months in range(1, shorter + 1):
+                    for direction in (1, -1):
+                        assert run_eval(edited(scenario, repair.type, index, direction * months)).verdict == "infeasible"
+        else:
+            # A cent less on the chosen knob does not work
+            assert run_eval(edited(scenario, repair.type, repair.event_index, repair.change - CENT)).verdict == "infeasible"
+
+
+def test_feasible_scenario_has_no_repairs():
+    scenario = random_scenario(0, horizon=0)
+    assert find_reference_repairs(scenario) == []
+
+
+def test_run_task_scores_repair_against_reference(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = run_task(TASKS[0], "stub", "repair_search", PROMPTS)
+
+    # The stub scenario loses 2000 a month from 5000: a 1583.34 cut clears month 12, the stub cuts 3000
+    baseline = result.reference_repairs[0]
+    assert baseline["type"] == "baseline_reduction"
+    assert baseline["change"] == pytest.approx(1583.34)
+    assert result.repair_minimality == pytest.approx(1583.34 / 3000)
+
+    [trace] = get_trace_store("traces").traces("repair_search")
+    steps = [step.step for step in trace.execution_steps]
+    assert steps[steps.index("eval_initial") + 1] == "repair_search"
+
+
+def test_reference_repairs_respect_the_scenario_floor():
+    from workbench.types import Constraints
+    scenario = next(infeasible_scenarios(1))
+    raised = scenario.model_copy(update={"constraints": Constraints(liquidity_floor=500)})
+    plain = {repair.type: repair.change for repair in find_reference_repairs(scenario)}
+    for repair in find_reference_repairs(raised):
+        assert run_eval(repair.scenario).verdict == "feasible"
+        assert abs(repair.change) >= abs(plain[repair.type])
+
+
+def test_failing_repair_search_does_not_fail_the_task(tmp_path, monkeypatch):
+    import workbench.runner
+    monkeypatch.chdir(tmp_path)
+    expected = run_task(TASKS[0], "stub", "with_search", PROMPTS)
+
+    def broken_search(scenario, eval_result=None):
+        raise ValueError("no slack curve")
+
+    monkeypatch.setattr(workbench.runner, "find_reference_repairs", broken_search)
+    result = run_task(TASKS[0], "stub", "without_search", PROMPTS)
+    assert result.reference_repairs is None and result.repair_minimality is None
+    assert result.final_verdict == expected.final_verdict
+    assert result.score_earned == expected.score_earned
+
+    [trace] = get_trace_store("traces").traces("without_search")
+    [step] = [step for step in trace.execution_steps if step.step == "repair_search"]
+    assert step.output == {"error": "ValueError: no slack curve"}
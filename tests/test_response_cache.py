@@ -0,0 +1,140 @@
+from workbench import runner
+from workbench.models.agents import ClaudeAgent, ClaudeToolsAgent, StubAgent
+from workbench.models.response_cache import ResponseCache, ResponseCacheMiss, configure_response_cache, request_key
+from tests.test_async_agents import PROMPTS, TASKS
+from anthropic.types import Message
+import asyncio
+import os
+import pytest
+
+
+def api_message(request: dict) -> Message:
+    """Scripted API reply as a real SDK Message: one calculate call, then the stub agent's answer."""
+    if len(request["messages"]) == 1 and "tools" in request:
+        content = [{"type": "tool_use", "id": "toolu_1", "name": "calculate", "input": {"expression": "2000 - 4000"}}]
+        stop_reason = "tool_use"
+    else:
+        repairing = request["messages"][0]["content"].startswith("Original scenario that failed")
+        text = StubAgent().repair("", {}) if repairing else StubAgent().draft("", "")
+        content = [{"type": "text", "text": text}]
+        stop_reason = "end_turn"
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": request["model"],
+        "content": content, "stop_reason": stop_reason, "usage": {"input_tokens": 10, "output_tokens": 5},
+    })
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+        self.messages = self
+
+    def create(self, **request):
+        self.calls += 1
+        return api_message(request)
+
+
+class OfflineClient:
+    def __init__(self):
+        self.messages = self
+
+    def create(self, **request):
+        raise AssertionError("network call in replay")
+
+
+@pytest.fixture(autouse=True)
+def no_cache():
+    yield
+    configure_response_cache(None)
+
+
+def run_all(monkeypatch, client):
+    monkeypatch.setattr(runner, "get_agent", lambda model: ClaudeToolsAgent(client=client))
+    return [runner.run_task(path, "claude-tools", "cache", PROMPTS).model_dump() for path in TASKS]
+
+
+def test_replay_reproduces_recorded_run_offline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = CountingClient()
+    configure_response_cache(str(tmp_path / "cache"), "record")
+    recorded = run_all(monkeypatch, client)
+    assert client.calls > 0
+
+    cache = configure_response_cache(str(tmp_path / "cache"), "replay-only")
+    assert run_all(monkeypatch, OfflineClient()) == recorded
+    assert cache.hits == client.calls and cache.misses == 0
+
+
+def test_replay_only_miss_raises(tmp_path):
+    configure_response_cache(str(tmp_path / "cache"), "replay-only")
+    agent = ClaudeToolsAgent()  # no API key or client needed when replaying
+    with pytest.raises(ResponseCacheMiss):
+        agent.draft("prompt", "draft", False, PROMPTS)
+
+
+def test_replay_mode_fills_misses_and_async_shares_entries(tmp_path):
+    client = CountingClient()
+    configure_response_cache(str(tmp_path / "cache"), "replay")
+    agent = ClaudeToolsAgent(client=client, async_client=OfflineClient())
+    first = agent.draft("prompt", "draft", False, PROMPTS)
+    calls = client.calls
+    assert agent.draft("prompt", "draft", False, PROMPTS) == first
+    # The async path hits the same entries, so the offline async client is never called
+    assert asyncio.run(agent.adraft("prompt", "draft", False, PROMPTS)) == first
+    assert client.calls == calls
+
+
+def test_replayed_responses_spend_no_tokens(tmp_path):
+    configure_response_cache(str(tmp_path / "cache"), "replay")
+    agent = ClaudeAgent(client=CountingClient())
+    agent.draft("prompt", "draft", False, PROMPTS)
+    assert agent.token_usage == {"api_calls": 1, "input_tokens": 10, "output_tokens": 5, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    agent.draft("prompt", "draft", False, PROMPTS)
+    assert agent.token_usage == {"cached_responses": 1, "cached_response_tokens": 15}
+
+
+def test_eviction_does_not_rescan_the_directory(tmp_path, monkeypatch):
+    response = api_message({"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+    cache = ResponseCache(str(tmp_path / "cache"), "replay", max_bytes=len(response.model_dump_json()) * 3)
+    monkeypatch.setattr(ResponseCache, "_entries", lambda self: pytest.fail("cache directory rescanned"))
+    for i in range(10):
+        cache.put(f"key{i}", response)
+    assert cache._size == sum(path.stat().st_size for path in (tmp_path / "cache").glob("*/*.json"))
+    assert [key for key in (f"key{i}" for i in range(10)) if cache.get(key)] == ["key8", "key9"]
+
+
+def test_request_key_ignores_dict_order():
+    assert request_key({"model": "m", "max_tokens": 10}) == request_key({"max_tokens": 10, "model": "m"})
+    assert request_key({"model": "m"}) != request_key({"model": "n"})
+
+
+def test_lru_eviction(tmp_path):
+    response = api_message({"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+    entry_size = len(response.model_dump_json())
+    cache = ResponseCache(str(tmp_path / "cache"), "replay", max_bytes=int(entry_size * 3.5))
+    for i, key in enumerate(["a1", "b2", "c3"]):
+        cache.put(key, response)
+        path = cache._path(key)
+        os.utime(path, ns=(i, i))
+    assert cache.get("a1") is not None  # now the most recently used
+    cache.put("d4", response)
+    assert cache.get("b2") is None
+    assert all(cache.get(key) is not None for key in ["a1", "c3", "d4"])
+
+
+def test_run_comparison_does_not_record_by_default(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+    from workbench.cli import app
+    from tests.test_comparison import STUB_TASKS
+    monkeypatch.chdir(tmp_path)
+    args = ["run-comparison", "--models", "stub", "--task-sets", STUB_TASKS, "--runs", "1", "--output", str(tmp_path / "reports")]
+
+    result = CliRunner().invoke(app, args + ["--session-id", "plain"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "reports" / "plain").exists()
+    assert not (tmp_path / "reports" / "plain" / "response_cache").exists()
+
+    result = CliRunner().invoke(app, args + ["--session-id", "recorded", "--cache-mode", "record"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "reports" / "recorded" / "response_cache").exists()
+    configure_response_cache(None)
@@ -0,0 +1,111 @@
+from workbench.comparison import run_comparison, save_comparison_results, load_comparison_results, comparison_config_data, generate_comparison_report, find_completed_executions, execution_key
+from workbench.results_sink import ResultSink, read_results
+from workbench.task_types import TaskResult
+from workbench.trace_store import TraceStore, get_trace_store
+from tests.test_comparison import stub_config, result_keys
+from workbench.comparison import ComparisonConfig
+from pathlib import Path
+import json
+import random
+import pytest
+
+
+def make_result(task_id: str) -> TaskResult:
+    return TaskResult(task_id=task_id, initial_verdict="FEASIBLE", final_verdict="FEASIBLE")
+
+
+def test_sink_flushes_each_result(tmp_path):
+    path = tmp_path / "raw_results.ndjson"
+    with ResultSink(str(path), fsync="always") as sink:
+        sink.write(make_result("a"))
+        # Readable before the sink is closed
+        assert [r.task_id for r in read_results(str(path))] == ["a"]
+        sink.write(make_result("b"))
+    assert sink.count == 2
+    assert [r.task_id for r in read_results(str(path))] == ["a", "b"]
+
+
+def test_read_results_skips_truncated_last_line(tmp_path):
+    path = tmp_path / "raw_results.ndjson"
+    with ResultSink(str(path), fsync="never") as sink:
+        sink.write(make_result("a"))
+    with open(path, "a") as f:
+        f.write(make_result("b").model_dump_json()[:20])
+    assert [r.task_id for r in read_results(str(path))] == ["a"]
+
+
+def test_unknown_fsync_policy_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResultSink(str(tmp_path / "raw_results.ndjson"), fsync="sometimes")
+
+
+def test_report_rebuilt_from_stream_matches_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    in_memory = run_comparison(stub_config(concurrency=1, runs=2))
+
+    session_dir = tmp_path / "reports" / "test"
+    session_dir.mkdir(parents=True)
+    config = stub_config(concurrency=3, runs=2)
+    with open(session_dir / "config.json", "w") as f:
+        json.dump(comparison_config_data(config, 0), f)
+    with ResultSink(str(session_dir / "raw_results.ndjson")) as sink:
+        streamed = run_comparison(config, sink=sink, keep_results=False)
+    assert streamed.results == []
+    assert sink.count == 4
+
+    rebuilt = load_comparison_results(str(session_dir))
+    assert result_keys(rebuilt) == result_keys(in_memory)
+    assert rebuilt.config.concurrency == 3
+    save_comparison_results(rebuilt, str(tmp_path / "reports"), write_raw_results=False)
+    assert (session_dir / "comparison_report.md").read_text() == generate_comparison_report(rebuilt)
+    assert json.loads((session_dir / "config.json").read_text())["total_executions"] == 4
+
+
+def test_rebuilt_results_are_in_sequential_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tasks = str(Path(__file__).resolve().parent.parent / "tasks" / "v1-simple-no-ledger")
+    config = ComparisonConfig.from_csv_params("stub,bad_json", tasks, runs_per_condition=2, session_id="test", concurrency=4)
+    in_memory = run_comparison(config)
+
+    # Completion order under concurrency: shuffle the stream within and across conditions
+    session_dir = tmp_path / "reports" / "test"
+    session_dir.mkdir(parents=True)
+    with open(session_dir / "config.json", "w") as f:
+        json.dump(comparison_config_data(config, 0), f)
+    lines = [result.model_dump_json() + "\n" for result in in_memory.results]
+    random.Random(0).shuffle(lines)
+    (session_dir / "raw_results.ndjson").write_text("".join(lines))
+    assert result_keys(load_comparison_results(str(session_dir))) == result_keys(in_memory)
+
+
+def test_resume_runs_only_missing_executions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = stub_config(concurrency=2, runs=3)
+    session_dir = tmp_path / "reports" / "test"
+    session_dir.mkdir(parents=True)
+    with open(session_dir / "config.json", "w") as f:
+        json.dump(comparison_config_data(config, 0), f)
+    with ResultSink(str(session_dir / "raw_results.ndjson")) as sink:
+        full = run_comparison(config, sink=sink)
+
+    # Keep two streamed results; one more execution survives only as a trace
+    lines = (session_dir / "raw_results.ndjson").read_text().splitlines(keepends=True)
+    (session_dir / "raw_results.ndjson").write_text("".join(lines[:2]))
+    streamed = [TaskResult.model_validate_json(line) for line in lines[:2]]
+    kept_trace_condition = TaskResult.model_validate_json(lines[2]).condition_id
+    partial_traces = TraceStore(str(tmp_path / "partial_traces"))
+    for trace in get_trace_store("traces").traces(f"test_{kept_trace_condition}"):
+        partial_traces.append(trace)
+
+    completed, recovered = find_completed_executions(config, str(session_dir), str(tmp_path / "partial_traces"))
+    assert len(completed) == 3
+    assert [r.condition_id for r in recovered] == [kept_trace_condition]
+    assert set(execution_key(r) for r in streamed) < completed
+
+    with ResultSink(str(session_dir / "raw_results.ndjson")) as sink:
+        for result in recovered:
+            sink.write(result)
+        resumed = run_comparison(config, sink=sink, completed=completed)
+    assert len(resumed.results) == 3
+    assert not set(execution_key(r) for r in resumed.results) & completed
+    assert result_keys(load_comparison_results(str(session_dir))) == result_keys(full)
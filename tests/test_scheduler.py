@@ -0,0 +1,136 @@
+from workbench import runner
+from workbench.models.agents import ClaudeAgent
+from workbench.models.scheduler import RateLimit, RateLimiter, RetryPolicy, Scheduler, configure_scheduler, parse_rate_limit, is_transient
+from workbench.runner import run_task
+from workbench.trace_store import get_trace_store
+from tests.test_async_agents import PROMPTS, TASKS
+from tests.test_response_cache import api_message
+import anthropic
+import asyncio
+import httpx
+import pytest
+
+FAST_RETRY = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01)
+
+
+@pytest.fixture(autouse=True)
+def default_scheduler():
+    configure_scheduler()
+    yield
+    configure_scheduler()
+
+
+def api_error(error_class, status_code: int, retry_after: str = None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(status_code, headers=headers, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+    return error_class("error", response=response, body=None)
+
+
+class FlakyClient:
+    """Fails with each of `errors` in turn, then answers."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.messages = self
+
+    def create(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return api_message(request)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("claude-3-5-haiku-20241022=50/40000") == ("claude-3-5-haiku-20241022", RateLimit(50, 40000))
+    assert parse_rate_limit("*=/80000") == ("*", RateLimit(None, 80000))
+    with pytest.raises(ValueError):
+        parse_rate_limit("claude=50")
+
+
+def test_requests_per_minute_window():
+    clock = FakeClock()
+    limiter = RateLimiter(RateLimit(requests_per_minute=3), clock)
+    waits = [limiter.reserve(1)[0] for _ in range(3)]
+    assert waits == [0, 0, 0]
+    clock.now += 10
+    # The 4th call starts when the 1st leaves the window; the 5th queues behind the 2nd
+    assert limiter.reserve(1)[0] == pytest.approx(50)
+    assert limiter.reserve(1)[0] == pytest.approx(50)
+
+
+def test_tokens_per_minute_settled_with_actual_usage():
+    clock = FakeClock()
+    limiter = RateLimiter(RateLimit(tokens_per_minute=1000), clock)
+    limiter.reserve(600)
+    assert limiter.reserve(600)[0] == pytest.approx(60)
+    # A call that turned out cheaper frees its share of the window
+    limiter = RateLimiter(RateLimit(tokens_per_minute=1000), clock)
+    _, first = limiter.reserve(600)
+    limiter.settle(first, 100)
+    assert limiter.reserve(600)[0] == 0
+    # A single call larger than the limit still runs, alone
+    assert RateLimiter(RateLimit(tokens_per_minute=10), clock).reserve(50)[0] == 0
+
+
+def test_transient_errors_are_retried_and_counted():
+    errors = [
+        api_error(anthropic.RateLimitError, 429, retry_after="0"),
+        api_error(anthropic.InternalServerError, 529),
+        anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.anthropic.com/v1/messages")),
+    ]
+    client = FlakyClient(errors)
+    stats = {}
+    response = Scheduler(retry=FAST_RETRY).call({"model": "m"}, lambda: client.messages.create(model="m", messages=[{"role": "user", "content": "x"}]), stats)
+    assert response.content[0].text
+    assert client.calls == 4
+    assert stats["retries"] == 3
+    assert 0 <= stats["backoff_wait_seconds"] <= 0.03
+
+
+def test_retries_give_up_and_permanent_errors_raise_at_once():
+    scheduler = Scheduler(retry=FAST_RETRY)
+    client = FlakyClient([api_error(anthropic.RateLimitError, 429)] * 4)
+    with pytest.raises(anthropic.RateLimitError):
+        scheduler.call({"model": "m"}, lambda: client.messages.create(model="m", messages=[]))
+    assert client.calls == 4
+
+    client = FlakyClient([api_error(anthropic.BadRequestError, 400)])
+    with pytest.raises(anthropic.BadRequestError):
+        scheduler.call({"model": "m"}, lambda: client.messages.create(model="m", messages=[]))
+    assert client.calls == 1
+    assert not is_transient(ValueError("not an API error"))
+
+
+def test_async_retry():
+    errors = [api_error(anthropic.RateLimitError, 429)]
+    client = FlakyClient(errors)
+
+    async def create():
+        return client.create(model="m", messages=[{"role": "user", "content": "x"}])
+
+    stats = {}
+    asyncio.run(Scheduler(retry=FAST_RETRY).acall({"model": "m"}, create, stats))
+    assert client.calls == 2
+    assert stats["retries"] == 1
+
+
+def test_retries_recorded_on_trace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    configure_scheduler(retry=FAST_RETRY)
+    client = FlakyClient([api_error(anthropic.RateLimitError, 429), api_error(anthropic.InternalServerError, 503)])
+    monkeypatch.setattr(runner, "get_agent", lambda model: ClaudeAgent(client=client))
+
+    run_task(TASKS[0], "claude", "scheduled", PROMPTS)
+    [trace] = get_trace_store("traces").traces("scheduled")
+    draft = trace.execution_steps[0]
+    assert draft.scheduling["retries"] == 2
+    assert draft.token_usage["api_calls"] == 1
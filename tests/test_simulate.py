@@ -0,0 +1,124 @@
+from workbench.month import Month
+from workbench.types import Scenario, Event, BaseMonthly, InitialState
+from workbench.simulate import simulate, simulate_vectorized, first_affected_month
+from workbench.eval import run_eval, run_eval_batch, run_eval_incremental, EvalResult
+import random
+import pytest
+
+
+def random_scenario(seed: int, horizon: int = 120, n_events: int = 24) -> Scenario:
+    rng = random.Random(seed)
+    start = Month(2024, rng.randint(1, 12))
+    events = []
+    for i in range(n_events):
+        duration = rng.choice([None, 0, 1, 3, 12, 500])
+        amount = round(rng.uniform(-4000, 4000), 2)
+        events.append(Event(label=f"event_{i}", start_month=start.add(rng.randint(0, horizon + 6)), amount=amount, duration_months=duration))
+    return Scenario(
+        id=f"random_{seed}",
+        title="Random scenario",
+        start_month=start,
+        horizon_months=horizon,
+        initial_state=InitialState(starting_cash=round(rng.uniform(0, 20000), 2)),
+        base_monthly=BaseMonthly(takehome_salary=round(rng.uniform(0, 9000), 2), outflows=round(rng.uniform(-9000, 0), 2)),
+        events=events
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_engine_matches_loop(seed):
+    scenario = random_scenario(seed)
+    assert simulate_vectorized(scenario) == simulate(scenario)
+
+
+@pytest.mark.parametrize("horizon", [0, 1, 600])
+def test_vectorized_engine_horizon_edges(horizon):
+    scenario = random_scenario(7, horizon=horizon, n_events=40)
+    assert simulate_vectorized(scenario) == simulate(scenario)
+
+
+def test_vectorized_engine_without_events():
+    scenario = random_scenario(3, n_events=0)
+    assert simulate_vectorized(scenario) == simulate(scenario)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_run_eval_engines_agree(seed):
+    scenario = random_scenario(seed, horizon=240)
+    assert run_eval(scenario, engine="vectorized") == run_eval(scenario, engine="loop")
+
+
+def test_run_eval_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown simulation engine"):
+        run_eval(random_scenario(0), engine="gpu")
+
+
+def test_run_eval_batch_matches_run_eval():
+    scenarios = [random_scenario(seed, horizon=12 * (seed % 6), n_events=seed % 9) for seed in range(30)]
+    summaries = run_eval_batch(scenarios)
+    assert len(summaries) == len(scenarios)
+    assert any(s.verdict == "infeasible" for s in summaries) and any(s.verdict == "feasible" for s in summaries)
+    for scenario, summary in zip(scenarios, summaries):
+        expected = run_eval(scenario)
+        assert not isinstance(summary, EvalResult)
+        assert summary.verdict == expected.verdict
+        assert summary.first_violation_month == expected.first_violation_month
+        assert summary.violated_invariant == expected.violated_invariant
+        assert summary.ledger_summary == expected.ledger_summary
+        assert summary.margin == expected.margin
+
+
+def test_run_eval_batch_builds_ledgers_on_request():
+    scenarios = [random_scenario(seed, horizon=36) for seed in range(5)]
+    assert run_eval_batch(scenarios, build_ledgers=True) == [run_eval(s) for s in scenarios]
+
+
+def test_run_eval_batch_empty():
+    assert run_eval_batch([]) == []
+    summary = run_eval_batch([random_scenario(1, horizon=0)])[0]
+    assert summary.verdict == "feasible"
+    assert summary.ledger_summary == {"min_cash": 0, "ending_cash": 0, "months_simulated": 0}
+
+
+def edited(scenario: Scenario, rng: random.Random) -> Scenario:
+    """Apply one repair-style edit (or a structural one) to a scenario."""
+    data = scenario.model_copy(deep=True)
+    kind = rng.choice(["timing", "amount", "baseline", "horizon", "add", "remove", "none"])
+    if kind == "timing" and data.events:
+        event = rng.choice(data.events)
+        event.start_month = event.start_month.add(rng.randint(1, 24))
+    elif kind == "amount" and data.events:
+        event = rng.choice(data.events)
+        event.amount = round(event.amount * rng.uniform(0, 1), 2)
+    elif kind == "baseline":
+        data.base_monthly.outflows = round(data.base_monthly.outflows * 0.9, 2)
+    elif kind == "horizon":
+        data.horizon_months = max(data.horizon_months + rng.randint(-30, 30), 0)
+    elif kind == "add":
+        data.events.append(Event(label="added", start_month=data.start_month.add(rng.randint(0, 90)), amount=-2500, duration_months=rng.choice([None, 2])))
+    elif kind == "remove" and data.events:
+        data.events.pop(rng.randrange(len(data.events)))
+    return data
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_eval_matches_full_resimulation(seed):
+    rng = random.Random(seed)
+    original = random_scenario(seed, horizon=rng.choice([12, 60, 120]), n_events=rng.randint(0, 20))
+    repaired = edited(original, rng)
+    assert run_eval_incremental(repaired, original, run_eval(original)) == run_eval(repaired)
+
+
+def test_first_affected_month_for_repairs():
+    original = random_scenario(11, horizon=60, n_events=6)
+    shifted = original.model_copy(deep=True)
+    event = shifted.events[2]
+    old_start = event.start_month
+    event.start_month = event.start_month.add(5)
+    expected = old_start._index - original.start_month._index
+    assert first_affected_month(original, shifted) == min(expected, 60)
+
+    reduced = original.model_copy(deep=True)
+    reduced.base_monthly.outflows = 0
+    assert first_affected_month(original, reduced) == 0
+    assert first_affected_month(original, original.model_copy(deep=True)) == 60
@@ -0,0 +1,145 @@
+from workbench.models.tools import registry
+from workbench.models.tools.registry import execute_tool, execute_tools
+from workbench.models.tools.calculate import calculate
+from workbench.models.agents import ClaudeToolsAgent
+from tests.test_async_agents import PROMPTS
+from types import SimpleNamespace
+import json
+import threading
+import time
+import pytest
+
+
+def test_registry_dispatches_by_name():
+    assert execute_tool("calculate", {"expression": "1000 + 2000 - 1500"}) == 1500
+    assert execute_tool("check_json", {"response_text": "{}"}) is True
+    assert execute_tool("duration_advisor", {"event_description": "Wedding"})["appears_one_time"] is True
+    with pytest.raises(ValueError, match="Unknown tool"):
+        execute_tool("shell", {})
+
+
+def test_tools_in_one_turn_run_concurrently_in_block_order(monkeypatch):
+    running = set()
+    overlapped = threading.Event()
+
+    def slow_echo(args):
+        running.add(args["value"])
+        if len(running) > 1:
+            overlapped.set()
+        time.sleep(args["delay"])
+        running.discard(args["value"])
+        return args["value"]
+
+    monkeypatch.setitem(registry.TOOL_HANDLERS, "echo", slow_echo)
+    calls = [("echo", {"value": i, "delay": 0.05 * (3 - i)}) for i in range(3)]
+    assert execute_tools(calls) == [0, 1, 2]
+    assert overlapped.is_set()
+
+
+class MultiToolClient:
+    """First turn asks for three tools at once; second turn answers."""
+
+    def __init__(self):
+        self.requests = []
+        self.messages = self
+
+    def create(self, **request):
+        self.requests.append(request)
+        if len(self.requests) == 1:
+            blocks = [
+                SimpleNamespace(type="tool_use", id=f"tool_{i}", name="calculate", input={"expression": f"{i} * 10"})
+                for i in range(3)
+            ]
+            return SimpleNamespace(stop_reason="tool_use", content=blocks)
+        return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(type="text", text="{}")])
+
+
+def test_agent_returns_tool_results_in_block_order():
+    client = MultiToolClient()
+    text, tool_calls_used, tool_usage = ClaudeToolsAgent(client=client).draft("prompt", "draft", False, PROMPTS)
+    assert tool_calls_used == 3 and tool_usage["calculate"] == 3
+    results = client.requests[1]["messages"][2]["content"]
+    assert [(r["tool_use_id"], r["content"]) for r in results] == [("tool_0", "0"), ("tool_1", "10"), ("tool_2", "20")]
+
+
+def test_simulate_scenario_summarizes_run_eval():
+    from workbench.models.tools.simulate_scenario import simulate_scenario, _memo
+    from workbench.eval import run_eval
+    from tests.test_simulate import random_scenario
+    scenario = random_scenario(2, horizon=600, n_events=30)
+    expected = run_eval(scenario)
+
+    summary = simulate_scenario(scenario.model_dump_json(), window_start=scenario.start_month.add(10).to_string(), window_months=500)
+    assert summary["verdict"] == expected.verdict
+    assert summary["first_violation_month"] == expected.first_violation_month
+    assert summary["min_cash"] == expected.ledger_summary["min_cash"]
+    assert len(summary["ledger_window"]) == 12
+    assert summary["ledger_window"][0]["ending_cash"] == expected.ledger[10].ending_cash
+    assert len(json.dumps(summary)) < 4000
+
+    # Re-formatted input for the same scenario is served from the memo
+    entries = len(_memo)
+    reformatted = json.dumps(json.loads(scenario.model_dump_json()), indent=2)
+    assert simulate_scenario(reformatted) == {k: v for k, v in summary.items() if k != "ledger_window"}
+    assert len(_memo) == entries
+
+
+def test_simulate_scenario_reports_bad_input():
+    assert "error" in execute_tool("simulate_scenario", {"scenario_json": "not json"})
+    assert "error" in execute_tool("simulate_scenario", {"scenario_json": "{\"id\": \"x\"}"})
+
+
+@pytest.mark.parametrize("expression", [
+    "1000 + 2000 - 1500", "5000 + 2000 + -4000", "(1200 * 12) / 5", "-3 ** 2", "7 // 2 + 7 % 2",
+    "round(1234.5678, 2)", "abs(-250.5) + max(1, 2, 3) - min(4, 5)", "2 ** 0.5", "1e3 * 1.5", "10 / 4",
+])
+def test_calculate_matches_python_arithmetic(expression):
+    assert calculate(expression) == eval(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('echo hi')", "open('/etc/passwd').read()", "x + 1", "[1, 2]", "'a' * 3",
+    "(lambda: 1)()", "2 ** 1000000", "1 if 1 else 2", "abs.__class__",
+])
+def test_calculate_rejects_anything_but_arithmetic(expression):
+    assert str(calculate(expression)).startswith("Error:")
+
+
+def test_calculate_exact_and_batch():
+    assert calculate("0.1 + 0.2") != 0.3
+    assert calculate("0.1 + 0.2", exact=True) == "0.3"
+    assert calculate("1 / 0") == calculate("1 / 0", exact=True) == "Error: division by zero"
+    assert execute_tool("calculate", {"expressions": ["1 + 1", "10.10 * 3", "bad +"], "exact": True})[:2] == ["2", "30.3"]
+    assert execute_tool("calculate", {"expressions": ["1 + 1", "2 * 3"]}) == [2, 6]
+    assert execute_tool("calculate", {"expressions": ["1"] * 51})[0].startswith("Error:")
+
+
+def test_validate_ledger_reports_every_failing_month():
+    from tests.test_simulate import random_scenario
+    from workbench.simulate import simulate
+    scenario = random_scenario(4, horizon=36, n_events=8)
+    records = [record.model_dump(mode="json") for record in simulate(scenario)]
+    scenario_json = scenario.model_dump_json()
+
+    result = execute_tool("validate_ledger", {"ledger_json": json.dumps(records), "scenario_json": scenario_json})
+    assert result["valid"] and result["failures"] == []
+
+    expected_month_7 = dict((field, records[7][field]) for field in ["starting_cash", "total_inflows", "total_outflows", "ending_cash"])
+    records[3]["ending_cash"] += 100  # breaks month 3 arithmetic and month 4 continuity
+    records[7]["total_outflows"] -= 50
+    records[7]["ending_cash"] -= 50
+    result = execute_tool("validate_ledger", {"ledger_json": json.dumps(records[:30]), "scenario_json": scenario_json})
+    assert not result["valid"]
+    assert [failure["month"] for failure in result["failures"]] == [scenario.start_month.add(i).to_string() for i in (3, 4, 7, 8)]
+    assert result["failures"][2]["expected"] == expected_month_7
+    assert result["missing_months"].startswith(scenario.start_month.add(30).to_string())
+
+
+def test_validate_ledger_bounds_its_output():
+    from tests.test_simulate import random_scenario
+    scenario = random_scenario(1, horizon=120, n_events=0)
+    bogus = [{"month": "1999-01", "starting_cash": 0, "total_inflows": 0, "total_outflows": 0, "ending_cash": 1}] * 120
+    result = execute_tool("validate_ledger", {"ledger_json": json.dumps(bogus), "scenario_json": scenario.model_dump_json()})
+    assert result["failing_months"] == 120
+    assert len(result["failures"]) == 24 and len(result["more_failing_months"]) == 96
+    assert "error" in execute_tool("validate_ledger", {"ledger_json": "[", "scenario_json": "{}"})
@@ -0,0 +1,79 @@
+from workbench.trace_query import parse_field, project, query_traces, write_rows, KEY_COLUMNS
+from workbench.trace_store import get_trace_store
+from tests.test_trace_store import make_trace
+import csv
+import io
+import pytest
+
+
+@pytest.fixture
+def traces_dir(tmp_path):
+    store = get_trace_store(str(tmp_path))
+    for condition in ["claude_v1_run1", "claude-tools_v1_run1"]:
+        for task in ["t1", "t2"]:
+            store.append(make_trace(f"cmp_{condition}", task))
+    store.append(make_trace("single", "t1"))
+    return str(tmp_path)
+
+
+def test_field_paths():
+    assert parse_field("execution_steps[*].duration_ms") == ["execution_steps", None, "duration_ms"]
+    assert parse_field("execution_steps[-1].step") == ["execution_steps", -1, "step"]
+    for bad in ["", "a..b", "a[x]", "a[*"]:
+        with pytest.raises(ValueError):
+            parse_field(bad)
+
+    record = {"steps": [{"ms": 1}, {"ms": 2}, {}], "result": {"category": "x"}}
+    assert project(record, parse_field("steps[*].ms")) == [1, 2, None]
+    assert project(record, parse_field("steps[1].ms")) == 2
+    assert project(record, parse_field("steps[5].ms")) is None
+    assert project(record, parse_field("result.category.deeper")) is None
+
+
+def test_query_filters_by_condition_and_session(traces_dir):
+    rows = list(query_traces(traces_dir, ["execution_steps[*].duration_ms", "final_result.final_verdict"], condition="claude_v1_run1"))
+    assert [(r["session_id"], r["task_id"]) for r in rows] == [("cmp_claude_v1_run1", "t1"), ("cmp_claude_v1_run1", "t2")]
+    assert rows[0]["execution_steps[*].duration_ms"] == [3]
+    assert rows[0]["final_result.final_verdict"] == "feasible"
+    assert len(list(query_traces(traces_dir, [], session="cmp"))) == 4
+    assert len(list(query_traces(traces_dir, [], task="t1"))) == 3
+
+
+def test_repeat_query_is_served_from_column_cache(traces_dir, monkeypatch):
+    fields = ["final_result.task_id", "execution_steps[0].step"]
+    first = list(query_traces(traces_dir, fields))
+
+    def no_reads(entry):
+        raise AssertionError("trace was read despite cached columns")
+
+    monkeypatch.setattr(get_trace_store(traces_dir), "read_bytes", no_reads)
+    assert list(query_traces(traces_dir, fields)) == first
+    # A new field needs the traces again
+    with pytest.raises(AssertionError):
+        list(query_traces(traces_dir, ["prompt"]))
+
+
+def test_per_file_traces_are_included(tmp_path):
+    trace = make_trace("legacy", "t1")
+    (tmp_path / "legacy").mkdir()
+    (tmp_path / "legacy" / f"t1_{trace.run_id}.json").write_text(trace.model_dump_json(indent=2))
+    [row] = query_traces(str(tmp_path), ["task_name"])
+    assert row == {"run_id": trace.run_id, "session_id": "legacy", "task_id": "t1", "task_name": "Task t1"}
+
+
+def test_csv_output(traces_dir):
+    fields = ["execution_steps[*].step"]
+    out = io.StringIO()
+    count = write_rows(query_traces(traces_dir, fields, session="single"), KEY_COLUMNS + fields, out)
+    assert count == 1
+    [header, row] = list(csv.reader(io.StringIO(out.getvalue())))
+    assert header == KEY_COLUMNS + fields
+    assert row[1:] == ["single", "t1", '["draft"]']
+
+
+def test_parquet_output(traces_dir, tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    fields = ["final_result.final_verdict"]
+    path = tmp_path / "out.parquet"
+    assert write_rows(query_traces(traces_dir, fields), KEY_COLUMNS + fields, path, "parquet") == 5
+    assert pyarrow_parquet.read_table(path).num_rows == 5
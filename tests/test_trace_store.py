@@ -0,0 +1,131 @@
+from workbench.runner import init_trace
+from workbench.trace_store import TraceStore, TraceIndexEntry, get_trace_store, read_traces, migrate_trace_directory
+from workbench.trace_store import INDEX_FILE, DICTIONARY_SUFFIX
+from workbench.trace_types import ExecutionStep
+from dataclasses import asdict
+import gzip
+import json
+import multiprocessing
+import pytest
+
+
+def make_trace(session_id: str, task_id: str):
+    trace = init_trace(task_id, f"Task {task_id}", "stub", "prompt " * 50, session_id)
+    trace.execution_steps.append(ExecutionStep(step="draft", input="prompt", output="{}", duration_ms=3))
+    trace.final_result = {"task_id": task_id, "initial_verdict": "feasible", "final_verdict": "feasible"}
+    return trace
+
+
+def test_append_and_read_back(tmp_path):
+    store = TraceStore(str(tmp_path), codec="gzip")
+    traces = [make_trace(session, task) for session in ["s_a", "s_b"] for task in ["t1", "t2"]]
+    for trace in traces:
+        store.append(trace)
+
+    assert store.get(traces[2].run_id) == traces[2]
+    assert [t.run_id for t in store.traces("s_a")] == [traces[0].run_id, traces[1].run_id]
+    assert [e.run_id for e in store.entries(task_id="t2")] == [traces[1].run_id, traces[3].run_id]
+    assert store.sessions() == ["s_a", "s_b"]
+    # A second reader (e.g. another process) sees the same index
+    assert list(TraceStore(str(tmp_path)).traces()) == traces
+    assert store.get("missing") is None
+
+
+def test_segments_roll_over(tmp_path):
+    store = TraceStore(str(tmp_path), codec="gzip", segment_bytes=150)
+    traces = [make_trace("s", f"t{i}") for i in range(6)]
+    for trace in traces:
+        store.append(trace)
+    assert len(list(tmp_path.glob("segment-*.ndjson.gz"))) > 1
+    assert list(store.traces()) == traces
+
+
+def test_records_compress_against_the_segment_dictionary(tmp_path, monkeypatch):
+    store = TraceStore(str(tmp_path), codec="gzip")
+    traces = [make_trace("s", f"t{i}") for i in range(20)]
+    store.append(traces[0])
+    # Only the first append looks for the current segment
+    monkeypatch.setattr(type(tmp_path), "glob", lambda *args: pytest.fail("appended with a directory scan"))
+    entries = [store.append(trace) for trace in traces[1:]]
+    monkeypatch.undo()
+
+    per_record = sum(len(gzip.compress((trace.model_dump_json() + "\n").encode())) for trace in traces[1:])
+    assert sum(entry.length for entry in entries) * 3 < per_record
+    assert (tmp_path / (entries[0].segment + DICTIONARY_SUFFIX)).exists()
+    assert list(TraceStore(str(tmp_path)).traces()) == traces
+
+
+def test_segments_without_a_dictionary_stay_readable(tmp_path):
+    # Segments written before dictionaries hold plain gzip frames, and appends to them keep that framing
+    old = make_trace("s", "t1")
+    data = gzip.compress((old.model_dump_json() + "\n").encode())
+    (tmp_path / "segment-000000.ndjson.gz").write_bytes(data)
+    entry = TraceIndexEntry(old.run_id, old.task_id, old.session_id, "segment-000000.ndjson.gz", 0, len(data))
+    (tmp_path / INDEX_FILE).write_text(json.dumps(asdict(entry)) + "\n")
+
+    store = TraceStore(str(tmp_path), codec="gzip")
+    new = make_trace("s", "t2")
+    assert store.append(new).segment == entry.segment
+    assert not (tmp_path / (entry.segment + DICTIONARY_SUFFIX)).exists()
+    assert list(TraceStore(str(tmp_path)).traces()) == [old, new]
+
+
+def _append_traces(directory: str, worker: int, count: int, start):
+    store = TraceStore(directory, codec="gzip", segment_bytes=4000)
+    traces = [make_trace(f"s{worker}", f"t{i}") for i in range(count)]
+    start.wait()
+    for trace in traces:
+        store.append(trace)
+
+
+def test_concurrent_processes_append_safely(tmp_path):
+    # Separate processes share no in-process lock, and small segments make them race on rollover too
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(4)
+    workers = [context.Process(target=_append_traces, args=(str(tmp_path), worker, 50, start)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+
+    store = TraceStore(str(tmp_path), codec="gzip")
+    entries = store.entries()
+    assert len(entries) == 200
+    assert len(set((entry.segment, entry.offset) for entry in entries)) == 200
+    assert len(list(tmp_path.glob("segment-*.ndjson.gz"))) > 1
+    for entry in entries:
+        trace = store.read(entry)
+        assert (trace.run_id, trace.session_id, trace.task_id) == (entry.run_id, entry.session_id, entry.task_id)
+    for worker in range(4):
+        assert [trace.task_id for trace in store.traces(f"s{worker}")] == [f"t{i}" for i in range(50)]
+
+
+def test_partial_index_line_is_ignored(tmp_path):
+    store = TraceStore(str(tmp_path), codec="gzip")
+    store.append(make_trace("s", "t1"))
+    with open(tmp_path / INDEX_FILE, "a") as f:
+        f.write('{"run_id": "half')
+    assert len(TraceStore(str(tmp_path)).entries()) == 1
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        TraceStore("traces", codec="lz4")
+
+
+def test_migrate_per_file_traces(tmp_path):
+    legacy = [make_trace("old_session", f"t{i}") for i in range(3)]
+    (tmp_path / "old_session").mkdir()
+    for trace in legacy:
+        (tmp_path / "old_session" / f"{trace.task_id}_{trace.run_id}.json").write_text(trace.model_dump_json(indent=2))
+    store = get_trace_store(str(tmp_path))
+    store.append(make_trace("new_session", "t9"))
+
+    # Unmigrated traces are still readable alongside the store
+    assert len(list(read_traces(str(tmp_path)))) == 4
+    assert migrate_trace_directory(str(tmp_path)) == 3
+    assert migrate_trace_directory(str(tmp_path), remove=True) == 0
+    assert not (tmp_path / "old_session").exists()
+    assert sorted(t.run_id for t in store.traces("old_session")) == sorted(t.run_id for t in legacy)
+    assert len(list(read_traces(str(tmp_path)))) == 4
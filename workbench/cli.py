@@ -3,15 +3,24 @@ from pathlib import Path
 from typing import Optional
 from workbench.runner import run_task
 from workbench.task_types import Task, TaskResult, Limits
-from workbench.comparison import ComparisonConfig, run_comparison, save_comparison_results
+from workbench.comparison import ComparisonConfig, run_comparison, save_comparison_results, load_comparison_results, load_comparison_config, comparison_config_data, find_completed_executions
+from workbench.results_sink import ResultSink, FSYNC_POLICIES
+from workbench.models.clients import configure_client_pool, DEFAULT_POOL_SIZE
+from workbench.models.response_cache import configure_response_cache, get_response_cache, CACHE_MODES
+from workbench.models.scheduler import configure_scheduler, parse_rate_limit, RetryPolicy
 import json
 import uuid
 from datetime import datetime
 import os
 from workbench.trace_types import Trace
+from workbench.trace_store import migrate_trace_directory, get_trace_store
+from workbench.trace_query import query_traces, write_rows, parse_field, KEY_COLUMNS, OUTPUT_FORMATS
+import sys
 from typing import List
 
 app = typer.Typer()
+traces_app = typer.Typer(help="Inspect and query stored traces.")
+app.add_typer(traces_app, name="traces")
 
 @app.command()
 def run_single(
@@ -19,7 +28,8 @@ def run_single(
     model: str = typer.Option("stub", help="Model to use (stub, claude)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed output"),
     prompt_dir: str = typer.Option("prompts/v2", "--prompts", help="Directory containing prompt files"),
-    model_name: str = typer.Option(None, "--model-name", help="Name of the model to use")
+    model_name: str = typer.Option(None, "--model-name", help="Name of the model to use"),
+    margin_hints: bool = typer.Option(False, "--margin-hints", help="Tell the agent how far from feasible a failed scenario is (the feasibility margin) in repair prompts")
 ):
     """Run a single task and display results."""
     # Display what we're running
@@ -31,7 +41,7 @@ def run_single(
         typer.echo(f"Agent: {model}")
     
     session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M_%S')}_{str(uuid.uuid4())[:8]}"
-    result = run_task(str(task_path), model=model, session_id=session_id, prompt_dir=prompt_dir, model_name=model_name)
+    result = run_task(str(task_path), model=model, session_id=session_id, prompt_dir=prompt_dir, model_name=model_name, margin_hints=margin_hints)
     
     # Display results with scoring breakdown
     if result.initial_verdict != result.final_verdict:
@@ -55,6 +65,9 @@ def run_single(
         typer.echo("Breakdown:")
         for component, data in score_data["breakdown"].items():
             typer.echo(f"  └ {component.replace('_', ' ').title()}: {data['earned']}/{data['possible']}")
+        for ledger, value in score_data["ledger_accuracy"].items():
+            if value is not None:
+                typer.echo(f"  └ {ledger.title()} ledger months correct: {value:.0%} (not scored)")
     
     # Show tool usage
     if result.tool_details:
@@ -84,7 +97,8 @@ def run_suite(
     model: str = typer.Option("stub", help="Model to use (stub, claude)"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Show detailed output"),
     prompt_dir: str = typer.Option("prompts/v2", "--prompts", help="Directory containing prompt files"),
-    model_name: str = typer.Option(None, "--model-name", help="Name of the model to use")
+    model_name: str = typer.Option(None, "--model-name", help="Name of the model to use"),
+    margin_hints: bool = typer.Option(False, "--margin-hints", help="Tell the agent how far from feasible a failed scenario is (the feasibility margin) in repair prompts")
 ):
     """Run all tasks in a directory."""
     task_files = list(task_dir.glob("*.json"))
@@ -131,7 +145,7 @@ def run_suite(
             typer.echo(f"[{i}/{len(task_files)}] {task_name}...", nl=False)
             
             try:
-                result = run_task(str(task), model=model, session_id=session_id, prompt_dir=prompt_dir, model_name=model_name)
+                result = run_task(str(task), model=model, session_id=session_id, prompt_dir=prompt_dir, model_name=model_name, margin_hints=margin_hints)
                 
                 # Show result summary
                 if result.initial_verdict != result.final_verdict:
@@ -366,6 +380,9 @@ def run_prompt(
         typer.echo("Breakdown:")
         for component, data in score_data["breakdown"].items():
             typer.echo(f"  └ {component.replace('_', ' ').title()}: {data['earned']}/{data['possible']}")
+        for ledger, value in score_data["ledger_accuracy"].items():
+            if value is not None:
+                typer.echo(f"  └ {ledger.title()} ledger months correct: {value:.0%} (not scored)")
     
     if result.error_category:
         if result.score_earned is not None and result.score_possible is not None:
@@ -382,19 +399,43 @@ def run_prompt(
 
 @app.command(name="run-comparison")
 def comparison_cli(
-    models: str = typer.Option(..., "--models", help="Comma-separated list of models (e.g., claude,claude-tools)"),
-    task_sets: str = typer.Option(..., "--task-sets", help="Comma-separated list of task set directories"),
+    models: Optional[str] = typer.Option(None, "--models", help="Comma-separated list of models (e.g., claude,claude-tools)"),
+    task_sets: Optional[str] = typer.Option(None, "--task-sets", help="Comma-separated list of task set directories"),
     runs: int = typer.Option(5, "--runs", help="Number of runs per condition"),
     session_id: Optional[str] = typer.Option(None, "--session-id", help="Custom session ID (auto-generated if not provided)"),
     prompt_dir: str = typer.Option("prompts/v2", "--prompts", help="Directory containing prompt files"),
     model_name: Optional[str] = typer.Option(None, "--model-name", help="Specific model name to pass to API (applies to all models)"),
     model_names: Optional[str] = typer.Option(None, "--model-names", help="Per-model names as model:name pairs (e.g., claude:claude-3-5-sonnet-20241022,haiku:claude-3-5-haiku-20241022)"),
-    output_dir: str = typer.Option("reports", "--output", help="Output directory for results")
+    output_dir: str = typer.Option("reports", "--output", help="Output directory for results"),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Number of tasks to run at once"),
+    use_async: bool = typer.Option(False, "--async", help="Run tasks on one event loop with the async API client; --concurrency limits API calls in flight"),
+    margin_hints: bool = typer.Option(False, "--margin-hints", help="Tell the agent how far from feasible a failed scenario is (the feasibility margin) in repair prompts"),
+    pool_size: Optional[int] = typer.Option(None, "--pool-size", min=1, help="HTTP connections kept open to the API (default: the larger of 20 and --concurrency)"),
+    replay_session: Optional[str] = typer.Option(None, "--replay-session", help="Serve model calls from the response cache recorded by this earlier session (in --output)"),
+    cache_mode: Optional[str] = typer.Option(None, "--cache-mode", help="Response cache mode: record, replay, replay-only or off (default: replay-only with --replay-session, otherwise off)"),
+    cache_max_mb: int = typer.Option(1024, "--cache-max-mb", min=1, help="Size bound for the response cache; least recently used entries are evicted"),
+    fsync: str = typer.Option("interval", "--fsync", help="How often streamed results are fsynced to disk: always, interval or never"),
+    resume: Optional[str] = typer.Option(None, "--resume", help="Continue an interrupted session directory, running only the executions it has no result for"),
+    rate_limits: Optional[List[str]] = typer.Option(None, "--rate-limit", help="Per-model API limit as MODEL=RPM/TPM (repeatable; MODEL * applies to all other models), e.g. claude-3-5-haiku-20241022=50/40000"),
+    max_retries: int = typer.Option(4, "--max-retries", min=0, help="Retries for rate-limited, overloaded or failed API calls (jittered exponential backoff)")
 ):
     """Run systematic comparison across models and task sets."""
     
     # Validate inputs
     try:
+        if resume:
+            # The session's own config.json defines what to run; --models, --task-sets etc. are ignored
+            if not (Path(resume) / "config.json").exists():
+                typer.secho(f"❌ No config.json found in session directory: {resume}", fg=typer.colors.RED)
+                raise typer.Exit(1)
+            resumed_config = load_comparison_config(resume)
+            models, task_sets = ",".join(resumed_config.models), ",".join(resumed_config.task_sets)
+            output_dir = str(Path(resume).parent)
+            replay_session = resumed_config.replay_session
+        elif not models or not task_sets:
+            typer.secho(f"❌ --models and --task-sets are required (or --resume a session)", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        
         # Check that task sets exist
         task_set_list = [ts.strip() for ts in task_sets.split(",")]
         for task_set in task_set_list:
@@ -435,21 +476,54 @@ def comparison_cli(
                 typer.secho(f"❌ Invalid model-names format. Expected model:name pairs separated by commas (e.g., claude:claude-3-5-sonnet-20241022,claude-tools:claude-3-5-haiku-20241022)", fg=typer.colors.RED)
                 raise typer.Exit(1)
         
+        parsed_rate_limits = {}
+        for spec in rate_limits or []:
+            try:
+                model_key, limit = parse_rate_limit(spec)
+            except ValueError as e:
+                typer.secho(f"❌ {e}", fg=typer.colors.RED)
+                raise typer.Exit(1)
+            parsed_rate_limits[model_key] = limit
+        
+        if fsync not in FSYNC_POLICIES:
+            typer.secho(f"❌ Invalid --fsync: {fsync}. Expected one of {', '.join(FSYNC_POLICIES)}", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        
+        # Resolve the response cache before anything runs
+        if cache_mode is None:
+            cache_mode = "replay-only" if replay_session else "off"
+        if cache_mode not in CACHE_MODES + ["off"]:
+            typer.secho(f"❌ Invalid --cache-mode: {cache_mode}. Expected one of {', '.join(CACHE_MODES + ['off'])}", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        if replay_session and not (Path(output_dir) / replay_session / "response_cache").exists():
+            typer.secho(f"❌ No response cache found for session {replay_session} in {output_dir}", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        
         # Validate that model-name and model-names are not both provided
         if model_name and model_names:
             typer.secho(f"❌ Cannot specify both --model-name and --model-names. Use --model-names for per-model specification.", fg=typer.colors.RED)
             raise typer.Exit(1)
         
         # Create configuration
-        config = ComparisonConfig.from_csv_params(
-            models_csv=models,
-            task_sets_csv=task_sets,
-            runs_per_condition=runs,
-            session_id=session_id,
-            prompt_dir=prompt_dir,
-            model_name=model_name,
-            model_names=parsed_model_names
-        )
+        if resume:
+            # How to run (concurrency, async) may change between attempts; what to run may not
+            config = resumed_config
+            config.concurrency = concurrency
+            config.use_async = use_async
+        else:
+            config = ComparisonConfig.from_csv_params(
+                models_csv=models,
+                task_sets_csv=task_sets,
+                runs_per_condition=runs,
+                session_id=session_id,
+                prompt_dir=prompt_dir,
+                model_name=model_name,
+                model_names=parsed_model_names,
+                concurrency=concurrency,
+                use_async=use_async,
+                replay_session=replay_session,
+                margin_hints=margin_hints
+            )
         
         # Display comparison plan
         typer.echo(f"🔬 Comparison Configuration:")
@@ -465,7 +539,13 @@ def comparison_cli(
         typer.echo(f"   Task Sets: {', '.join([Path(ts).name for ts in config.task_sets])}")
         typer.echo(f"   Runs per condition: {config.runs_per_condition}")
         typer.echo(f"   Total executions: {config.total_executions()}")
+        if config.concurrency > 1 or config.use_async:
+            typer.echo(f"   Concurrency: {config.concurrency}{' (async)' if config.use_async else ''}")
+        if config.margin_hints:
+            typer.echo(f"   Repair prompts include the feasibility margin")
         typer.echo(f"   Session ID: {config.session_id}")
+        if replay_session:
+            typer.echo(f"   Replaying model calls from: {replay_session} ({cache_mode})")
         typer.echo()
         
         # Confirm execution
@@ -475,11 +555,42 @@ def comparison_cli(
                 typer.echo("Comparison cancelled.")
                 raise typer.Exit(0)
         
+        # Size the shared API connection pool so concurrent tasks don't queue for connections
+        configure_client_pool(pool_size or max(DEFAULT_POOL_SIZE, config.concurrency))
+        
+        # Pace API calls to the configured limits and retry transient failures
+        configure_scheduler(parsed_rate_limits, RetryPolicy(max_retries=max_retries))
+        
+        # Record responses under this session, or replay them from the earlier one
+        if cache_mode != "off":
+            cache_session = replay_session or config.session_id
+            configure_response_cache(str(Path(output_dir) / cache_session / "response_cache"), cache_mode, cache_max_mb * 1024 * 1024)
+        
+        # Results stream to raw_results.ndjson as tasks complete; config.json goes first so the stream can be rebuilt after a crash
+        session_path = Path(output_dir) / config.session_id
+        results_path = session_path / "raw_results.ndjson"
+        completed, recovered = None, []
+        if resume:
+            completed, recovered = find_completed_executions(config, str(session_path))
+            if recovered:
+                typer.echo(f"↻ Recovered {len(recovered)} results from traces")
+        elif results_path.exists() and results_path.stat().st_size > 0:
+            typer.secho(f"❌ Session {config.session_id} already has results in {results_path}. Use a new --session-id, or --resume {session_path}.", fg=typer.colors.RED)
+            raise typer.Exit(1)
+        else:
+            session_path.mkdir(parents=True, exist_ok=True)
+            with open(session_path / "config.json", "w") as f:
+                json.dump(comparison_config_data(config, 0), f, indent=2)
+        
         # Run comparison
-        comparison_result = run_comparison(config)
+        with ResultSink(str(results_path), fsync) as sink:
+            for result in recovered:
+                sink.write(result)
+            run_comparison(config, sink=sink, keep_results=False, completed=completed)
         
-        # Save results
-        output_path = save_comparison_results(comparison_result, output_dir)
+        # Save results (the report is built from the stream)
+        comparison_result = load_comparison_results(str(session_path))
+        output_path = save_comparison_results(comparison_result, output_dir, write_raw_results=False)
         
         # Display summary
         typer.echo()
@@ -487,11 +598,81 @@ def comparison_cli(
         typer.echo(f"📊 Results saved to: {output_path}")
         typer.echo(f"📈 Report: {output_path}/comparison_report.md")
         typer.echo(f"📋 Raw data: {output_path}/raw_results.ndjson")
+        cache = get_response_cache()
+        if cache:
+            typer.echo(f"💾 Response cache: {cache.directory} ({cache.hits} hits, {cache.misses} misses)")
         
     except Exception as e:
         typer.secho(f"❌ Comparison failed: {e}", fg=typer.colors.RED)
         raise typer.Exit(1)
 
 
+@app.command(name="build-report")
+def build_report_cli(
+    session_dir: str = typer.Argument(..., help="Comparison session directory containing config.json and raw_results.ndjson")
+):
+    """Rebuild a comparison report from a session's streamed results (e.g. after a crash or a scoring change)."""
+    session_path = Path(session_dir)
+    if not (session_path / "config.json").exists() or not (session_path / "raw_results.ndjson").exists():
+        typer.secho(f"❌ {session_dir} needs config.json and raw_results.ndjson", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    
+    comparison_result = load_comparison_results(session_dir)
+    output_path = save_comparison_results(comparison_result, str(session_path.parent), write_raw_results=False)
+    typer.echo(f"📈 Report rebuilt from {len(comparison_result.results)} results: {output_path}/comparison_report.md")
+
+
+
+@app.command(name="migrate-traces")
+def migrate_traces_cli(
+    traces_dir: str = typer.Argument("traces", help="Traces directory holding <session_id>/*.json trace files"),
+    remove: bool = typer.Option(False, "--remove", help="Delete the per-file traces once they are in the store")
+):
+    """Move per-file JSON traces into the compressed trace store (safe to re-run)."""
+    if not Path(traces_dir).is_dir():
+        typer.secho(f"❌ Traces directory not found: {traces_dir}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    added = migrate_trace_directory(traces_dir, remove=remove)
+    store = get_trace_store(traces_dir)
+    typer.echo(f"🗜️  Migrated {added} traces into {traces_dir} ({store.codec}); the store now holds {len(store.entries())} traces")
+
+
+
+@traces_app.command(name="query")
+def traces_query_cli(
+    fields: str = typer.Option(..., "--fields", help="Comma-separated field paths, e.g. execution_steps[*].duration_ms,final_result.error_category"),
+    traces_dir: str = typer.Option("traces", "--traces", help="Traces directory"),
+    session: Optional[str] = typer.Option(None, "--session", help="Only traces from this session (a comparison session includes all its conditions)"),
+    condition: Optional[str] = typer.Option(None, "--condition", help="Only traces from this comparison condition id (e.g. claude_v1-simple_run2)"),
+    task: Optional[str] = typer.Option(None, "--task", help="Only traces for this task id"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Output file (CSV goes to stdout when omitted)"),
+    output_format: str = typer.Option("csv", "--format", help="Output format: csv, arrow or parquet"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore and don't update the cached column index")
+):
+    """Project trace fields into a table, reading only the traces and fields asked for."""
+    field_list = [field.strip() for field in fields.split(",") if field.strip()]
+    try:
+        for field in field_list:
+            parse_field(field)
+    except ValueError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    if output_format not in OUTPUT_FORMATS:
+        typer.secho(f"❌ Invalid --format: {output_format}. Expected one of {', '.join(OUTPUT_FORMATS)}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    if output_format != "csv" and output is None:
+        typer.secho(f"❌ --format {output_format} needs --output", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    
+    rows = query_traces(traces_dir, field_list, session=session, condition=condition, task=task, use_cache=not no_cache)
+    try:
+        count = write_rows(rows, KEY_COLUMNS + field_list, output or sys.stdout, output_format)
+    except ValueError as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
+        raise typer.Exit(1)
+    if output:
+        typer.echo(f"📋 {count} rows written to {output}")
+
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -6,14 +6,21 @@ Supports A/B testing across models, task sets, and other parameters.
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Iterator, Optional, Dict
+from typing import Callable, List, Tuple, Iterator, Optional, Dict, Set
 import uuid
 import typer
 import json
 import os
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 from workbench.task_types import TaskResult, ErrorCategory
-from workbench.runner import run_task
+from workbench.runner import run_task, arun_task
+from workbench.results_sink import ResultSink, read_results
+from workbench.trace_store import read_traces
+
+# (condition_id, task_id, run_number): one execution in a comparison
+ExecutionKey = Tuple[str, str, int]
 
 
 @dataclass
@@ -26,6 +33,10 @@ class ComparisonConfig:
     prompt_dir: str = "prompts/v2"
     model_name: str = None  # Deprecated: use model_names instead
     model_names: Dict[str, str] = None  # Map of model -> specific model name
+    concurrency: int = 1  # Number of tasks to run at once; 1 runs them one after another
+    use_async: bool = False  # Share one event loop across tasks; concurrency then limits agent calls in flight
+    replay_session: Optional[str] = None  # Earlier session whose recorded model responses are replayed
+    margin_hints: bool = False  # Add the feasibility margin to repair prompts
 
     @classmethod
     def from_csv_params(
@@ -36,7 +47,11 @@ class ComparisonConfig:
         session_id: str = None,
         prompt_dir: str = "prompts/v2",
         model_name: str = None,
-        model_names: Dict[str, str] = None
+        model_names: Dict[str, str] = None,
+        concurrency: int = 1,
+        use_async: bool = False,
+        replay_session: Optional[str] = None,
+        margin_hints: bool = False
     ) -> "ComparisonConfig":
         """Create config from CSV parameters."""
         models = [m.strip() for m in models_csv.split(",")]
@@ -53,7 +68,11 @@ class ComparisonConfig:
             session_id=session_id,
             prompt_dir=prompt_dir,
             model_name=model_name,
-            model_names=model_names
+            model_names=model_names,
+            concurrency=concurrency,
+            use_async=use_async,
+            replay_session=replay_session,
+            margin_hints=margin_hints
         )
 
     def total_executions(self) -> int:
@@ -149,8 +168,60 @@ def create_comparison_session_id(models: List[str], task_sets: List[str]) -> str
     return f"comparison_{timestamp}_{model_str}_{task_str}"
 
 
-def run_comparison(config: ComparisonConfig) -> ComparisonResult:
-    """Execute a full comparison across all conditions."""
+def read_task_id(task_file: Path) -> str:
+    """The task id declared in a task file (file names need not match it)."""
+    with open(task_file, "r") as f:
+        return json.load(f)["id"]
+
+
+def execution_key(result: TaskResult) -> ExecutionKey:
+    return (result.condition_id, result.task_id, result.condition_run_number)
+
+
+def comparison_jobs(conditions: List[ComparisonCondition], completed: Optional[Set[ExecutionKey]] = None) -> List[Tuple[ComparisonCondition, Path]]:
+    """Every (condition, task file) pair still to run, in sequential order, skipping executions in `completed`."""
+    # Resolve every task set up front so a missing directory fails before anything is dispatched
+    jobs = [
+        (condition, task_file)
+        for condition in conditions
+        for task_file in get_task_files_for_set(condition.task_set)
+    ]
+    if completed:
+        jobs = [
+            (condition, task_file) for condition, task_file in jobs
+            if (condition.condition_id, read_task_id(task_file), condition.run_number) not in completed
+        ]
+    return jobs
+
+
+class _ResultCollector:
+    """Streams each completed result to the sink and keeps it in memory only when asked to."""
+
+    def __init__(self, sink: Optional[ResultSink], keep_results: bool):
+        self.sink = sink
+        self.keep_results = keep_results
+        self.count = 0
+        self._results: Dict[int, TaskResult] = {}
+
+    def add(self, index: int, result: TaskResult):
+        if self.sink is not None:
+            self.sink.write(result)
+        if self.keep_results:
+            self._results[index] = result
+        self.count += 1
+
+    def results(self) -> List[TaskResult]:
+        # Completion order can differ from the sequential order; index restores it
+        return [self._results[index] for index in sorted(self._results)]
+
+
+def run_comparison(config: ComparisonConfig, sink: Optional[ResultSink] = None, keep_results: bool = True, completed: Optional[Set[ExecutionKey]] = None) -> ComparisonResult:
+    """
+    Execute a full comparison across all conditions.
+    Each result is written to `sink` as soon as its task completes; with `keep_results=False` results are not
+    held in memory and the returned ComparisonResult has none (rebuild it with `load_comparison_results`).
+    Executions in `completed` (from `find_completed_executions`) are skipped.
+    """
     
     # Generate conditions matrix
     conditions = generate_comparison_conditions(config)
@@ -158,8 +229,30 @@ def run_comparison(config: ComparisonConfig) -> ComparisonResult:
     
     # Display comparison overview
     typer.echo(f"=== COMPARISON: {len(config.models)} models × {len(config.task_sets)} task-sets × {config.runs_per_condition} runs = {total_executions} total ===")
+    if completed:
+        typer.echo(f"↻ Resuming: {len(completed)} task executions already complete")
+    
+    collector = _ResultCollector(sink, keep_results)
+    if config.use_async:
+        _run_async(config, conditions, collector, completed)
+    elif config.concurrency > 1:
+        _run_concurrently(config, conditions, collector, completed)
+    else:
+        _run_sequentially(config, conditions, collector, completed)
+        
+    # Create final result object
+    comparison_result = ComparisonResult(
+        config=config,
+        results=collector.results(),
+        conditions=conditions
+    )
     
-    results = []
+    typer.echo(f"\n✓ Comparison complete. {collector.count} tasks executed.")
+    return comparison_result
+
+
+def _run_sequentially(config: ComparisonConfig, conditions: List[ComparisonCondition], collector: _ResultCollector, completed: Optional[Set[ExecutionKey]] = None):
+    total_executions = len(conditions)
     execution_count = 0
     
     try:
@@ -171,49 +264,15 @@ def run_comparison(config: ComparisonConfig) -> ComparisonResult:
             
             # Execute each task in the set
             for task_file in task_files:
-                # Use condition-level session ID for grouping traces
-                execution_session_id = f"{config.session_id}_{condition.condition_id}"
-                
-                # Progress display
-                agent_type = condition.model
-                model_name = config.get_model_name(condition.model, condition.model_index)
-                if model_name:
-                    agent_display = f"{agent_type}({model_name})"
-                else:
-                    agent_display = agent_type
-                    
-                progress_msg = f"[{execution_count}/{total_executions}] {agent_display}+{Path(condition.task_set).name} (run {condition.run_number}/{config.runs_per_condition}): {task_file.stem}..."
+                if completed and (condition.condition_id, read_task_id(task_file), condition.run_number) in completed:
+                    continue
+                progress_msg = f"[{execution_count}/{total_executions}] {_progress_label(config, condition, task_file)}..."
                 typer.echo(progress_msg, nl=False)
                 
                 try:
-                    # Execute the task
-                    result = run_task(
-                        task_path=str(task_file),
-                        model=condition.model,
-                        session_id=execution_session_id,
-                        prompt_dir=config.prompt_dir,
-                        model_name=config.get_model_name(condition.model, condition.model_index)
-                    )
-                    
-                    # Add condition metadata to result
-                    result.condition_model = condition.model
-                    result.condition_model_name = config.get_model_name(condition.model, condition.model_index)
-                    result.condition_task_set = condition.task_set
-                    result.condition_run_number = condition.run_number
-                    result.condition_id = condition.condition_id
-                    result.condition_model_index = condition.model_index
-                    
-                    results.append(result)
-                    
-                    # Progress result display 
-                    if result.error_category:
-                        if result.score_earned is not None and result.score_possible is not None:
-                            typer.secho(f" error ({result.error_category.value}, {result.score_earned}/{result.score_possible})", fg=typer.colors.RED)
-                        else:
-                            typer.secho(f" error ({result.error_category.value})", fg=typer.colors.RED)
-                    else:
-                        score_display = f"{result.score_earned}/{result.score_possible}" if result.score_earned else "N/A"
-                        typer.secho(f" {result.final_verdict} (Score: {score_display})", fg=typer.colors.GREEN)
+                    result = _execute_condition_task(config, condition, task_file)
+                    collector.add(collector.count, result)
+                    _echo_result_status(result)
                         
                 except Exception as e:
                     typer.secho(f" SYSTEM ERROR: {e}", fg=typer.colors.RED)
@@ -227,16 +286,169 @@ def run_comparison(config: ComparisonConfig) -> ComparisonResult:
     except Exception as e:
         typer.secho(f"\n❌ Comparison failed: {e}", fg=typer.colors.RED)
         raise
+
+
+def _run_concurrently(config: ComparisonConfig, conditions: List[ComparisonCondition], collector: _ResultCollector, completed: Optional[Set[ExecutionKey]] = None):
+    """
+    Dispatch every (condition, task) pair to a pool of `config.concurrency` worker threads.
+    Progress prints as tasks finish; results come back in the same order a sequential run produces.
+    """
+    jobs = comparison_jobs(conditions, completed)
+    finished = 0
+    reported: Set[int] = set()
+    futures = {}
+
+    def report(future):
+        nonlocal finished
+        index = futures[future]
+        reported.add(index)
+        condition, task_file = jobs[index]
+        finished += 1
+        typer.echo(f"[{finished}/{len(jobs)}] {_progress_label(config, condition, task_file)}:", nl=False)
+        try:
+            result = future.result()
+            collector.add(index, result)
+            _echo_result_status(result)
+        except Exception as e:
+            typer.secho(f" SYSTEM ERROR: {e}", fg=typer.colors.RED)
+    
+    executor = ThreadPoolExecutor(max_workers=config.concurrency)
+    try:
+        for index, (condition, task_file) in enumerate(jobs):
+            futures[executor.submit(_execute_condition_task, config, condition, task_file)] = index
+        for future in as_completed(futures):
+            report(future)
+        executor.shutdown()
+                
+    except KeyboardInterrupt:
+        typer.echo("\n⚠️  Comparison interrupted by user")
+        _finish_interrupted(executor, futures, reported, report, len(jobs))
+        # Return partial results
         
-    # Create final result object
-    comparison_result = ComparisonResult(
-        config=config,
-        results=results,
-        conditions=conditions
+    except Exception as e:
+        executor.shutdown(wait=False, cancel_futures=True)
+        typer.secho(f"\n❌ Comparison failed: {e}", fg=typer.colors.RED)
+        raise
+
+
+def _finish_interrupted(executor: ThreadPoolExecutor, futures: Dict, reported: Set[int], report: Callable, total: int):
+    """
+    After a Ctrl-C: drop queued tasks, then wait for the ones already running and report their results, so no
+    execution writes a trace without its result reaching the collector. A second Ctrl-C stops waiting.
+    """
+    not_started = sum(future.cancel() for future in futures)
+    running = [future for future in futures if not future.cancelled() and futures[future] not in reported]
+    if running:
+        typer.echo(f"   Waiting for {len(running)} running task(s) to finish (Ctrl-C again to abandon them)")
+    abandoned = 0
+    try:
+        for future in as_completed(running):
+            report(future)
+    except KeyboardInterrupt:
+        abandoned = sum(1 for future in running if futures[future] not in reported)
+    executor.shutdown(wait=not abandoned)
+    not_submitted = total - len(futures)
+    skipped = not_started + not_submitted + abandoned
+    if skipped:
+        typer.echo(f"⚠️  {skipped} of {total} executions abandoned ({not_started + not_submitted} not started, {abandoned} stopped while running)")
+
+
+def _run_async(config: ComparisonConfig, conditions: List[ComparisonCondition], collector: _ResultCollector, completed: Optional[Set[ExecutionKey]] = None):
+    """
+    Run every (condition, task) pair as a coroutine on one event loop, with at most `config.concurrency`
+    agent calls in flight. Progress prints as tasks finish; results come back in sequential order.
+    """
+    jobs = comparison_jobs(conditions, completed)
+
+    async def run_job(index: int, limiter: asyncio.Semaphore):
+        condition, task_file = jobs[index]
+        try:
+            result = await arun_task(
+                task_path=str(task_file),
+                model=condition.model,
+                session_id=f"{config.session_id}_{condition.condition_id}",
+                prompt_dir=config.prompt_dir,
+                model_name=config.get_model_name(condition.model, condition.model_index),
+                limiter=limiter,
+                margin_hints=config.margin_hints
+            )
+            return index, _tag_result(config, condition, result), None
+        except Exception as e:
+            return index, None, e
+
+    async def run_all():
+        limiter = asyncio.Semaphore(config.concurrency)
+        pending = [run_job(index, limiter) for index in range(len(jobs))]
+        for finished, job in enumerate(asyncio.as_completed(pending), start=1):
+            index, result, error = await job
+            condition, task_file = jobs[index]
+            typer.echo(f"[{finished}/{len(jobs)}] {_progress_label(config, condition, task_file)}:", nl=False)
+            if error is not None:
+                typer.secho(f" SYSTEM ERROR: {error}", fg=typer.colors.RED)
+                continue
+            collector.add(index, result)
+            _echo_result_status(result)
+
+    try:
+        asyncio.run(run_all())
+        
+    except KeyboardInterrupt:
+        # asyncio.run has already cancelled the outstanding tasks
+        typer.echo("\n⚠️  Comparison interrupted by user")
+        # Return partial results
+        
+    except Exception as e:
+        typer.secho(f"\n❌ Comparison failed: {e}", fg=typer.colors.RED)
+        raise
+
+
+def _progress_label(config: ComparisonConfig, condition: ComparisonCondition, task_file: Path) -> str:
+    agent_type = condition.model
+    model_name = config.get_model_name(condition.model, condition.model_index)
+    if model_name:
+        agent_display = f"{agent_type}({model_name})"
+    else:
+        agent_display = agent_type
+    return f"{agent_display}+{Path(condition.task_set).name} (run {condition.run_number}/{config.runs_per_condition}): {task_file.stem}"
+
+
+def _execute_condition_task(config: ComparisonConfig, condition: ComparisonCondition, task_file: Path) -> TaskResult:
+    """Run one task for a condition and tag the result with the condition metadata."""
+    # Use condition-level session ID for grouping traces
+    execution_session_id = f"{config.session_id}_{condition.condition_id}"
+    
+    result = run_task(
+        task_path=str(task_file),
+        model=condition.model,
+        session_id=execution_session_id,
+        prompt_dir=config.prompt_dir,
+        model_name=config.get_model_name(condition.model, condition.model_index),
+        margin_hints=config.margin_hints
     )
     
-    typer.echo(f"\n✓ Comparison complete. {len(results)} tasks executed.")
-    return comparison_result
+    return _tag_result(config, condition, result)
+
+
+def _tag_result(config: ComparisonConfig, condition: ComparisonCondition, result: TaskResult) -> TaskResult:
+    # Add condition metadata to result
+    result.condition_model = condition.model
+    result.condition_model_name = config.get_model_name(condition.model, condition.model_index)
+    result.condition_task_set = condition.task_set
+    result.condition_run_number = condition.run_number
+    result.condition_id = condition.condition_id
+    result.condition_model_index = condition.model_index
+    return result
+
+
+def _echo_result_status(result: TaskResult):
+    if result.error_category:
+        if result.score_earned is not None and result.score_possible is not None:
+            typer.secho(f" error ({result.error_category.value}, {result.score_earned}/{result.score_possible})", fg=typer.colors.RED)
+        else:
+            typer.secho(f" error ({result.error_category.value})", fg=typer.colors.RED)
+    else:
+        score_display = f"{result.score_earned}/{result.score_possible}" if result.score_earned else "N/A"
+        typer.secho(f" {result.final_verdict} (Score: {score_display})", fg=typer.colors.GREEN)
 
 
 def group_results_by_condition(comparison_result: ComparisonResult) -> Dict[Tuple[str, str, int], List[TaskResult]]:
@@ -474,37 +686,52 @@ def generate_comparison_report(comparison_result: ComparisonResult) -> str:
     return report
 
 
-def save_comparison_results(comparison_result: ComparisonResult, output_dir: str = "reports") -> str:
-    """Save comparison results to structured output directory."""
+def comparison_config_data(config: ComparisonConfig, total_executions: int) -> dict:
+    """The config.json contents for a comparison session."""
+    config_data = {
+        "models": config.models,
+        "task_sets": config.task_sets,
+        "runs_per_condition": config.runs_per_condition,
+        "session_id": config.session_id,
+        "prompt_dir": config.prompt_dir,
+        "concurrency": config.concurrency,
+        "use_async": config.use_async,
+        "margin_hints": config.margin_hints,
+        "total_executions": total_executions,
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    # Add model names if specified
+    if config.model_names:
+        config_data["model_names"] = config.model_names
+    if config.model_name:
+        config_data["model_name"] = config.model_name
+    if config.replay_session:
+        config_data["replay_session"] = config.replay_session
+    return config_data
+
+
+def save_comparison_results(comparison_result: ComparisonResult, output_dir: str = "reports", write_raw_results: bool = True) -> str:
+    """
+    Save comparison results to structured output directory.
+    Pass `write_raw_results=False` when the results were already streamed to raw_results.ndjson.
+    """
     
     # Create output directory structure
     output_path = Path(output_dir) / comparison_result.config.session_id
     output_path.mkdir(parents=True, exist_ok=True)
     
     # Save configuration
-    config_data = {
-        "models": comparison_result.config.models,
-        "task_sets": comparison_result.config.task_sets,
-        "runs_per_condition": comparison_result.config.runs_per_condition,
-        "session_id": comparison_result.config.session_id,
-        "prompt_dir": comparison_result.config.prompt_dir,
-        "total_executions": len(comparison_result.results),
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    # Add model names if specified
-    if comparison_result.config.model_names:
-        config_data["model_names"] = comparison_result.config.model_names
-    if comparison_result.config.model_name:
-        config_data["model_name"] = comparison_result.config.model_name
+    config_data = comparison_config_data(comparison_result.config, len(comparison_result.results))
     
     with open(output_path / "config.json", "w") as f:
         json.dump(config_data, f, indent=2)
     
     # Save raw results as NDJSON
-    with open(output_path / "raw_results.ndjson", "w") as f:
-        for result in comparison_result.results:
-            f.write(result.model_dump_json() + "\n")
+    if write_raw_results:
+        with open(output_path / "raw_results.ndjson", "w") as f:
+            for result in comparison_result.results:
+                f.write(result.model_dump_json() + "\n")
     
     # Save comparison report
     report = generate_comparison_report(comparison_result)
@@ -515,4 +742,62 @@ def save_comparison_results(comparison_result: ComparisonResult, output_dir: str
     traces_dir = output_path / "traces"
     traces_dir.mkdir(exist_ok=True)
     
-    return str(output_path)
\ No newline at end of file
+    return str(output_path)
+
+
+def load_comparison_config(session_dir: str) -> ComparisonConfig:
+    """Read a session directory's config.json back into a ComparisonConfig."""
+    with open(Path(session_dir) / "config.json", "r") as f:
+        config_data = json.load(f)
+    fields = ComparisonConfig.__dataclass_fields__
+    return ComparisonConfig(**{key: value for key, value in config_data.items() if key in fields})
+
+
+def load_comparison_results(session_dir: str) -> ComparisonResult:
+    """Rebuild a ComparisonResult from a session directory's config.json and streamed raw_results.ndjson."""
+    session_path = Path(session_dir)
+    config = load_comparison_config(session_dir)
+    conditions = generate_comparison_conditions(config)
+    
+    # Stream order is completion order; put results back in the sequential order of `comparison_jobs`
+    job_order = {}
+    for condition in conditions:
+        try:
+            jobs = comparison_jobs([condition])
+        except ValueError:
+            jobs = []  # task set moved since the run: its results fall back to task id order
+        for _, task_file in jobs:
+            job_order[(condition.condition_id, read_task_id(task_file))] = len(job_order)
+    condition_order = {condition.condition_id: index for index, condition in enumerate(conditions)}
+
+    def sequential_position(result: TaskResult):
+        return (
+            condition_order.get(result.condition_id, len(conditions)),
+            job_order.get((result.condition_id, result.task_id), len(job_order)),
+            result.task_id,
+            result.condition_run_number or 0,
+        )
+
+    results = sorted(read_results(str(session_path / "raw_results.ndjson")), key=sequential_position)
+    return ComparisonResult(config=config, results=results, conditions=conditions)
+
+
+def find_completed_executions(config: ComparisonConfig, session_dir: str, traces_dir: str = "traces") -> Tuple[Set[ExecutionKey], List[TaskResult]]:
+    """
+    Work out which executions of an interrupted session are already done, from its result stream and its traces.
+    Returns the completed keys plus the results found only in a trace (the process stopped after writing the trace
+    but before streaming the result); append those to the stream before resuming.
+    """
+    results_path = Path(session_dir) / "raw_results.ndjson"
+    completed = set(execution_key(result) for result in read_results(str(results_path))) if results_path.exists() else set()
+    
+    recovered = []
+    for condition in generate_comparison_conditions(config):
+        for trace in read_traces(traces_dir, f"{config.session_id}_{condition.condition_id}"):
+            if trace.final_result is None:
+                continue
+            result = _tag_result(config, condition, TaskResult.model_validate(trace.final_result))
+            if execution_key(result) not in completed:
+                completed.add(execution_key(result))
+                recovered.append(result)
+    return completed, recovered
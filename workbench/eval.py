@@ -1,18 +1,36 @@
 from workbench.types import Scenario, InvariantType, Violation, MonthlyRecord
-from workbench.simulate import simulate
-from workbench.invariants import check_invariants
+from workbench.simulate import get_simulation_engine, simulate_batch, first_affected_month, resimulate
+from workbench.ledger import Ledger
+from workbench.invariants import check_invariants, compile_invariants, floor_at, report_order
 from workbench.month import Month
-from typing import List, Dict, Any, Optional
+from workbench.money import to_cents, to_dollars
+from typing import List, Dict, Any, Optional, Union
 from pydantic import BaseModel
+import numpy as np
 
 
-class EvalResult(BaseModel):
+class FeasibilityMargin(BaseModel):
+    """How far the cash curve clears (or misses) the liquidity floor, computed with the verdict."""
+    floor: float = 0.0  # the scenario's liquidity floor (a floor schedule can change it by month)
+    slack: List[float] = []  # ending cash minus that month's floor
+    binding_month: Optional[str] = None  # month with the least slack (the first, on ties)
+    months_below_floor: int = 0
+    cumulative_deficit: float = 0.0  # shortfall summed over the months below the floor
+    required_baseline_cut: float = 0.0  # smallest uniform monthly cut to base outflows that clears every month
+    required_relief: float = 0.0  # largest single-month shortfall: what one event shift or adjustment must free up by then
+
+
+class EvalSummary(BaseModel):
     verdict: str  # 'feasible' or 'infeasible'
     first_violation_month: Optional[str] = None 
     violated_invariant: Optional[InvariantType] = None
     ledger_summary: dict[str, Any]
+    margin: Optional[FeasibilityMargin] = None
+
+
+class EvalResult(EvalSummary):
     violations: List[Violation]
-    ledger: List[MonthlyRecord]  # Full monthly records for validation
+    ledger: Ledger  # Full monthly records for validation, stored column-wise
     
     class Config:
         arbitrary_types_allowed = True
@@ -21,26 +39,94 @@ class EvalResult(BaseModel):
         }
 
     
-def run_eval(scenario: Scenario) -> EvalResult:
+def run_eval(scenario: Scenario, engine: str = "vectorized") -> EvalResult:
+    """Simulate and check a scenario. `engine` selects the simulator ("vectorized" or the reference "loop"); both produce identical ledgers."""
+
+    ledger = get_simulation_engine(engine)(scenario)
+    return _result_from_ledger(scenario, ledger)
+
+
+def run_eval_incremental(scenario: Scenario, previous_scenario: Scenario, previous_result: EvalResult) -> EvalResult:
+    """
+    Evaluate `scenario` as an edit of an already evaluated `previous_scenario` (e.g. a repair).
+    Months before the first one the edit can affect are reused from `previous_result`; only the suffix is
+    re-simulated and re-checked. The result is identical to `run_eval(scenario)`.
+    """
+    from_month = first_affected_month(previous_scenario, scenario)
+    ledger = resimulate(previous_result.ledger, scenario, from_month)
+    if previous_scenario.horizon_months != scenario.horizon_months or previous_scenario.constraints != scenario.constraints:
+        # Conservation checks depend on where the ledger ends, and constraints on every month, so earlier
+        # findings may not carry over
+        return _result_from_ledger(scenario, ledger)
+
+    # First violations in the unchanged prefix still stand; look for the others only in the suffix
+    start_index = scenario.start_month._index
+    violations = {
+        violation.invariant: violation for violation in previous_result.violations
+        if violation.month._index - start_index < from_month
+    }
+    for violation in check_invariants(scenario, ledger, start=from_month) or []:
+        violations.setdefault(violation.invariant, violation)
+    return _result_from_ledger(scenario, ledger, [violations[i] for i in report_order() if i in violations])
+
+
+def margin_columns(ending_cash_cents: np.ndarray, month_mask: np.ndarray, floor_cents: Union[int, np.ndarray] = 0) -> Dict[str, np.ndarray]:
+    """
+    Floor analytics in cents for a (scenarios, months) block of cash curves, padded past each horizon as in
+    `simulate_batch`. `floor_cents` is a scalar or a (scenarios, months) block of per-month floors.
+    A uniform cut of r to base outflows raises month t's cash by r * (t + 1), so the cut needed is the largest
+    shortfall / (t + 1), rounded up to a whole cent.
+    """
+    slack = ending_cash_cents - floor_cents
+    shortfall = np.where(month_mask & (slack < 0), -slack, 0)
+    months = np.arange(1, ending_cash_cents.shape[1] + 1)
+    return {
+        'slack': slack,
+        'binding': np.where(month_mask, slack, np.iinfo(np.int64).max).argmin(axis=1) if ending_cash_cents.shape[1] else np.zeros(len(ending_cash_cents), dtype=np.int64),
+        'months_below_floor': (shortfall > 0).sum(axis=1),
+        'cumulative_deficit': shortfall.sum(axis=1),
+        'required_baseline_cut': (-(-shortfall // months)).max(axis=1, initial=0),
+        'required_relief': shortfall.max(axis=1, initial=0),
+    }
+
+
+def _margin(scenario: Scenario, columns: Dict[str, np.ndarray], i: int, horizon: int) -> FeasibilityMargin:
+    floor = scenario.constraints.liquidity_floor if scenario.constraints else 0.0
+    if horizon == 0:
+        return FeasibilityMargin(floor=floor)
+    return FeasibilityMargin(
+        floor=floor,
+        slack=to_dollars(columns['slack'][i, :horizon]).tolist(),
+        binding_month=scenario.start_month.add(int(columns['binding'][i])).to_string(),
+        months_below_floor=int(columns['months_below_floor'][i]),
+        cumulative_deficit=to_dollars(columns['cumulative_deficit'][i]),
+        required_baseline_cut=to_dollars(columns['required_baseline_cut'][i]),
+        required_relief=to_dollars(columns['required_relief'][i]),
+    )
+
 
-    records = simulate(scenario)
-    if not records:
+def _result_from_ledger(scenario: Scenario, ledger: Ledger, violations: Optional[List[Violation]] = None) -> EvalResult:
+    if not ledger:
           return EvalResult(
               verdict='feasible',
               first_violation_month=None,
               violated_invariant=None,
               ledger_summary={'min_cash': 0, 'ending_cash': 0, 'months_simulated': 0},
+              margin=FeasibilityMargin(),
               violations=[],
-              ledger=[]
+              ledger=Ledger.empty()
           )
 
-    violations = check_invariants(scenario, records) or []
+    if violations is None:
+        violations = check_invariants(scenario, ledger) or []
 
     summary = {
-          'min_cash': min(r.ending_cash for r in records),
-          'ending_cash': records[-1].ending_cash,
-          'months_simulated': len(records)
+          'min_cash': to_dollars(ledger.ending_cash_cents.min()),
+          'ending_cash': to_dollars(ledger.ending_cash_cents[-1]),
+          'months_simulated': len(ledger)
       }
+    floors = to_cents(floor_at(scenario, ledger.months))[None, :]
+    margin = _margin(scenario, margin_columns(ledger.ending_cash_cents[None, :], np.ones((1, len(ledger)), dtype=bool), floors), 0, len(ledger))
 
     # Determine verdict
     if violations:
@@ -51,8 +137,9 @@ def run_eval(scenario: Scenario) -> EvalResult:
         first_violation_month=first_violation.month.to_string(),
         violated_invariant=first_violation.invariant,
         ledger_summary=summary,
+        margin=margin,
         violations=violations,
-        ledger=records
+        ledger=ledger
     )
 
     return EvalResult(
@@ -60,7 +147,72 @@ def run_eval(scenario: Scenario) -> EvalResult:
         first_violation_month=None,
         violated_invariant=None,
         ledger_summary=summary,
+        margin=margin,
         violations=violations,
-        ledger=records
+        ledger=ledger
     )
-    
+
+
+def _needs_full_check(scenario: Scenario) -> bool:
+    return any(
+        not check.holds_for_simulated_ledgers and check.invariant != InvariantType.LIQUIDITY_FLOOR
+        for check, _ in compile_invariants(scenario)
+    )
+
+
+def run_eval_batch(scenarios: List[Scenario], build_ledgers: bool = False) -> List[EvalSummary]:
+    """
+    Evaluate many scenarios in one vectorized pass.
+    Returns compact `EvalSummary`s by default; with build_ledgers=True returns full `EvalResult`s
+    (ledger + violations) matching `run_eval`, built from the batch arrays without re-simulating.
+    """
+    batch = simulate_batch(scenarios)
+    if build_ledgers:
+        return [
+            _result_from_ledger(scenario, batch.ledger(i))
+            for i, scenario in enumerate(scenarios)
+        ]
+
+    # Simulated ledgers conserve money and apply events inside their windows by construction, so the liquidity
+    # floor decides the verdict here, unless a scenario's constraints enable another invariant.
+    floors = np.zeros(batch.ending_cash_cents.shape, dtype=np.int64)
+    for i, scenario in enumerate(scenarios):
+        if scenario.constraints is not None:
+            floors[i] = to_cents(floor_at(scenario, scenario.start_month._index + np.arange(floors.shape[1])))
+    margins = margin_columns(batch.ending_cash_cents, batch.month_mask, floors)
+    below_floor = batch.month_mask & (margins['slack'] < 0)
+    has_violation = below_floor.any(axis=1)
+    first_violation = below_floor.argmax(axis=1) if below_floor.shape[1] else np.zeros(len(scenarios), dtype=np.int64)
+    min_cash = np.where(batch.month_mask, batch.ending_cash_cents, np.iinfo(np.int64).max).min(axis=1, initial=np.iinfo(np.int64).max)
+
+    summaries = []
+    for i, scenario in enumerate(scenarios):
+        horizon = int(batch.horizons[i])
+        if scenario.constraints is not None and _needs_full_check(scenario):
+            result = _result_from_ledger(scenario, batch.ledger(i))
+            summaries.append(EvalSummary(**{field: getattr(result, field) for field in EvalSummary.model_fields}))
+            continue
+        if horizon == 0:
+            summaries.append(EvalSummary(
+                verdict='feasible',
+                ledger_summary={'min_cash': 0, 'ending_cash': 0, 'months_simulated': 0},
+                margin=FeasibilityMargin()
+            ))
+            continue
+
+        summary = {
+            'min_cash': to_dollars(min_cash[i]),
+            'ending_cash': to_dollars(batch.ending_cash_cents[i, horizon - 1]),
+            'months_simulated': horizon
+        }
+        if has_violation[i]:
+            summaries.append(EvalSummary(
+                verdict='infeasible',
+                first_violation_month=scenario.start_month.add(int(first_violation[i])).to_string(),
+                violated_invariant=InvariantType.LIQUIDITY_FLOOR,
+                ledger_summary=summary,
+                margin=_margin(scenario, margins, i, horizon)
+            ))
+        else:
+            summaries.append(EvalSummary(verdict='feasible', ledger_summary=summary, margin=_margin(scenario, margins, i, horizon)))
+    return summaries
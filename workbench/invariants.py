@@ -1,91 +1,329 @@
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from workbench.types import MonthlyRecord, Scenario, Violation, InvariantType
+from workbench.ledger import Ledger
+from workbench.money import to_cents, to_dollars
+from dataclasses import dataclass
+import threading
+import numpy as np
 
-def check_liquidity_floor(records: List[MonthlyRecord], floor: float=0.0) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
+# Magnitude and description builders shared by the per-invariant checks and the fused sweep. Amounts are compared
+# and differenced in whole cents (workbench.money), so float noise in a record never reads as a violation.
+
+def _liquidity_finding(record: MonthlyRecord, floor: float) -> Tuple[Optional[float], str]:
+    return to_dollars(to_cents(floor) - to_cents(record.ending_cash)), f"Cash fell below {floor} to {record.ending_cash} at {record.month.to_string()}"
+
+
+def _starting_cash_finding(scenario: Scenario, record: MonthlyRecord) -> Tuple[Optional[float], str]:
+    return (
+        to_dollars(to_cents(scenario.initial_state.starting_cash) - to_cents(record.starting_cash)),
+        f"Starting cash mismatch: {scenario.initial_state.starting_cash} != {record.starting_cash} at {record.month.to_string()}"
+    )
+
+
+def _intramonth_finding(record: MonthlyRecord) -> Tuple[Optional[float], str]:
+    return (
+        to_dollars(_intramonth_gap(record)),
+        f"Intramonth conservation violation: {record.ending_cash} != {record.starting_cash} + {record.total_inflows} + {record.total_outflows} at {record.month.to_string()}"
+    )
+
+
+def _month_to_month_finding(previous: MonthlyRecord, record: MonthlyRecord) -> Tuple[Optional[float], str]:
+    return (
+        to_dollars(to_cents(record.starting_cash) - to_cents(previous.ending_cash)),
+        f"Month to month conservation violation: Starting cash {record.starting_cash} in {record.month.to_string()} != ending cash {previous.ending_cash} from {previous.month.to_string()}"
+    )
+
+
+def _intramonth_gap(record: MonthlyRecord) -> int:
+    # Cents by which a month's ending cash misses its own opening balance plus flows
+    return to_cents(record.ending_cash) - to_cents(record.starting_cash) - to_cents(record.total_inflows) - to_cents(record.total_outflows)
+
+
+def _temporal_finding(record: MonthlyRecord) -> Optional[str]:
+    for event in record.events_applied:
+        if event.start_month > record.month:
+            return f"Event {event.label} applied in {record.month.to_string()} but starts in {event.start_month.to_string()}"
+        if event.duration_months is not None:
+            end_month = event.start_month.add(event.duration_months-1)
+            if record.month > end_month:
+                return f"Event {event.label} applied in {record.month.to_string()} but ends in {end_month.to_string()}"
+    return None
+
+
+def check_liquidity_floor(records: Sequence[MonthlyRecord], floor: float=0.0) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
     for record in records:
-        if record.ending_cash < floor:
-            magnitude = floor - record.ending_cash
-            description = f"Cash fell below {floor} to {record.ending_cash} at {record.month.to_string()}"
+        if to_cents(record.ending_cash) < to_cents(floor):
+            magnitude, description = _liquidity_finding(record, floor)
             return (record, magnitude, description)
     return (None, None, None)
 
 
-def check_money_conservation(scenario: Scenario, records: List[MonthlyRecord]) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
+def check_money_conservation(scenario: Scenario, records: Sequence[MonthlyRecord]) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
     for i in range(len(records)-1):
         record = records[i]
         if i == 0: # check starting cash mismatch against scenario initial state
-            if record.starting_cash != scenario.initial_state.starting_cash:
-                magnitude = scenario.initial_state.starting_cash - record.starting_cash
-                description = f"Starting cash mismatch: {scenario.initial_state.starting_cash} != {record.starting_cash} at {record.month.to_string()}"
+            if to_cents(record.starting_cash) != to_cents(scenario.initial_state.starting_cash):
+                magnitude, description = _starting_cash_finding(scenario, record)
                 return (record, magnitude, description)
         
-        if record.ending_cash != record.starting_cash + record.total_inflows + record.total_outflows: # check intramonth conservation
-            magnitude = record.ending_cash - record.starting_cash - record.total_inflows - record.total_outflows
-            description = f"Intramonth conservation violation: {record.ending_cash} != {record.starting_cash} + {record.total_inflows} + {record.total_outflows} at {record.month.to_string()}"
+        if _intramonth_gap(record) != 0: # check intramonth conservation
+            magnitude, description = _intramonth_finding(record)
             return (record, magnitude, description)
 
-        if record.ending_cash != records[i+1].starting_cash: # check ending cash of previous month to starting cash of next month conservation
-            magnitude = records[i+1].starting_cash - record.ending_cash
-            description = f"Month to month conservation violation: Starting cash {records[i+1].starting_cash} in {records[i+1].month.to_string()} != ending cash {record.ending_cash} from {record.month.to_string()}"
+        if to_cents(record.ending_cash) != to_cents(records[i+1].starting_cash): # check ending cash of previous month to starting cash of next month conservation
+            magnitude, description = _month_to_month_finding(record, records[i+1])
             return (records[i+1], magnitude, description)
     
     return (None, None, None)
 
 
-def check_temporal_consistency(records: List[MonthlyRecord]) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
+def check_temporal_consistency(records: Sequence[MonthlyRecord]) -> Tuple[Optional[MonthlyRecord], Optional[float], Optional[str]]:
     for record in records:
-        for event in record.events_applied:
-            if event.start_month > record.month:
-                description = f"Event {event.label} applied in {record.month.to_string()} but starts in {event.start_month.to_string()}"
-                return (record, None, description)
-            if event.duration_months is not None: 
-                end_month = event.start_month.add(event.duration_months-1)
-                if record.month > end_month:
-                    description = f"Event {event.label} applied in {record.month.to_string()} but ends in {end_month.to_string()}"
-                    return (record, None, description)
+        description = _temporal_finding(record)
+        if description is not None:
+            return (record, None, description)
     return None, None, None
 
 
+# Invariant registry. Each invariant declares a vectorized check over a column-wise ledger (a boolean per month,
+# True where a violation is reported) and the parameters it takes from a scenario's constraints; a check whose
+# parameters come back None is off for that scenario; same-month ties go to the lower
+# InvariantType.get_precedence. check_invariants compiles the enabled checks into one fused pass, so new
+# invariants only need a `register_invariant` call (and an InvariantType member with a precedence). Each
+# built-in invariant's "first" violation is the one its check_* function above returns. A check's result for
+# month j may depend on months up to j + 1 but no later: first_only scans hand checks a ledger cut off just
+# past the months still in question.
+
+Finding = Tuple[int, Optional[float], str]  # (ledger index the violation is reported at, magnitude, details)
+Parameters = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class InvariantCheck:
+    invariant: InvariantType
+    violations: Callable[[Scenario, Ledger, Parameters], np.ndarray]  # (months,) bool
+    finding: Callable[[Scenario, Sequence[MonthlyRecord], int, Parameters], Tuple[Optional[float], str]]  # magnitude, details at a flagged month
+    parameters: Callable[[Scenario], Optional[Parameters]] = lambda scenario: {}
+    holds_for_simulated_ledgers: bool = False  # true by construction for simulator output (batch evals skip it)
+
+
+# Registration order is the order violations are reported in
+INVARIANTS: Dict[InvariantType, InvariantCheck] = {}
+_invariants_lock = threading.Lock()
+
+
+def register_invariant(check: InvariantCheck):
+    """Add (or replace) an invariant; it is checked from the next check_invariants call on."""
+    with _invariants_lock:
+        INVARIANTS[check.invariant] = check
+
+
+def compile_invariants(scenario: Scenario) -> List[Tuple[InvariantCheck, Parameters]]:
+    """The checks enabled for `scenario` with their parameters, in precedence order."""
+    with _invariants_lock:
+        checks = list(INVARIANTS.values())
+    compiled = []
+    for check in sorted(checks, key=lambda check: check.invariant.get_precedence()):
+        parameters = check.parameters(scenario)
+        if parameters is not None:
+            compiled.append((check, parameters))
+    return compiled
+
+
+def floor_at(scenario: Scenario, months: np.ndarray) -> np.ndarray:
+    """The liquidity floor in each of `months` (absolute month indexes): the scenario floor, then any schedule steps."""
+    constraints = scenario.constraints
+    floors = np.full(len(months), constraints.liquidity_floor if constraints else 0.0)
+    if constraints and constraints.floor_schedule:
+        steps = sorted(constraints.floor_schedule, key=lambda step: step.month._index)
+        step_months = np.array([step.month._index for step in steps], dtype=np.int64)
+        step_floors = np.array([step.floor for step in steps])
+        current = np.searchsorted(step_months, months, side='right') - 1
+        floors = np.where(current >= 0, step_floors[np.maximum(current, 0)], floors)
+    return floors
+
+
+def _money_conservation_violations(scenario: Scenario, ledger: Ledger, parameters: Parameters) -> np.ndarray:
+    # Same months as check_money_conservation: month j is reported by the opening-balance check (j == 0) or
+    # the j-1 -> j carry-over, then by month j's own arithmetic; the last month's arithmetic is not checked
+    n = len(ledger)
+    bad = np.zeros(n, dtype=bool)
+    if n > 1:
+        starting, ending = ledger.starting_cash_cents, ledger.ending_cash_cents
+        bad[0] = starting[0] != to_cents(scenario.initial_state.starting_cash)
+        bad[1:] |= ending[:-1] != starting[1:]
+        bad[:-1] |= ending[:-1] != starting[:-1] + ledger.total_inflows_cents[:-1] + ledger.total_outflows_cents[:-1]
+    return bad
+
+
+def _money_conservation_finding(scenario: Scenario, records: Sequence[MonthlyRecord], j: int, parameters: Parameters) -> Tuple[Optional[float], str]:
+    record = records[j]
+    if j == 0 and to_cents(record.starting_cash) != to_cents(scenario.initial_state.starting_cash):
+        return _starting_cash_finding(scenario, record)
+    if j > 0 and to_cents(records[j-1].ending_cash) != to_cents(record.starting_cash):
+        return _month_to_month_finding(records[j-1], record)
+    return _intramonth_finding(record)
+
+
+def _temporal_violations(scenario: Scenario, ledger: Ledger, parameters: Parameters) -> np.ndarray:
+    starts = np.array([event.start_month._index for event in ledger.events], dtype=np.int64)
+    ends = np.array([
+        np.iinfo(np.int64).max if event.duration_months is None else event.start_month._index + event.duration_months
+        for event in ledger.events
+    ], dtype=np.int64)
+    months = ledger.months[:, None]
+    return (ledger.active & ((months < starts) | (months >= ends))).any(axis=1)
+
+
+def _temporal_consistency_finding(scenario: Scenario, records: Sequence[MonthlyRecord], j: int, parameters: Parameters) -> Tuple[Optional[float], str]:
+    return None, _temporal_finding(records[j])
+
 
+def _liquidity_violations(scenario: Scenario, ledger: Ledger, parameters: Parameters) -> np.ndarray:
+    return ledger.ending_cash_cents < to_cents(floor_at(scenario, ledger.months))
 
-def check_invariants(scenario: Scenario, records: List[MonthlyRecord]) -> Optional[List[Violation]]:
+
+def _liquidity_floor_finding(scenario: Scenario, records: Sequence[MonthlyRecord], j: int, parameters: Parameters) -> Tuple[Optional[float], str]:
+    record = records[j]
+    return _liquidity_finding(record, float(floor_at(scenario, np.array([record.month._index]))[0]))
+
+
+def _consecutive_deficit_parameters(scenario: Scenario) -> Optional[Parameters]:
+    limit = scenario.constraints.max_consecutive_deficit_months if scenario.constraints else None
+    return None if limit is None else {"limit": limit}
+
+
+def _deficit_runs(ledger: Ledger) -> np.ndarray:
+    # Length of the run of months ending with less cash than they started, up to and including each month
+    n = len(ledger)
+    index = np.arange(n)
+    deficit = ledger.ending_cash_cents < ledger.starting_cash_cents
+    last_surplus = np.maximum.accumulate(np.where(deficit, -1, index)) if n else index
+    return index - last_surplus
+
+
+def _consecutive_deficit_violations(scenario: Scenario, ledger: Ledger, parameters: Parameters) -> np.ndarray:
+    return _deficit_runs(ledger) > parameters["limit"]
+
+
+def _consecutive_deficit_finding(scenario: Scenario, records: Sequence[MonthlyRecord], j: int, parameters: Parameters) -> Tuple[Optional[float], str]:
+    run = 0
+    while run <= j and to_cents(records[j - run].ending_cash) < to_cents(records[j - run].starting_cash):
+        run += 1
+    return (
+        float(run - parameters["limit"]),
+        f"Cash fell for {run} months in a row through {records[j].month.to_string()} (at most {parameters['limit']} allowed)"
+    )
+
+
+def _savings_target_parameters(scenario: Scenario) -> Optional[Parameters]:
+    target = scenario.constraints.savings_target if scenario.constraints else None
+    if target is None:
+        return None
+    month = target.month if target.month is not None else scenario.start_month.add(scenario.horizon_months - 1)
+    return {"amount": target.amount, "amount_cents": to_cents(target.amount), "month": month._index}
+
+
+def _savings_target_violations(scenario: Scenario, ledger: Ledger, parameters: Parameters) -> np.ndarray:
+    return (ledger.months == parameters["month"]) & (ledger.ending_cash_cents < parameters["amount_cents"])
+
+
+def _savings_target_finding(scenario: Scenario, records: Sequence[MonthlyRecord], j: int, parameters: Parameters) -> Tuple[Optional[float], str]:
+    record = records[j]
+    return (
+        to_dollars(parameters["amount_cents"] - to_cents(record.ending_cash)),
+        f"Savings target {parameters['amount']} missed: cash was {record.ending_cash} at {record.month.to_string()}"
+    )
+
+
+register_invariant(InvariantCheck(InvariantType.LIQUIDITY_FLOOR, _liquidity_violations, _liquidity_floor_finding))
+register_invariant(InvariantCheck(InvariantType.MONEY_CONSERVATION, _money_conservation_violations, _money_conservation_finding, holds_for_simulated_ledgers=True))
+register_invariant(InvariantCheck(InvariantType.TEMPORAL_CONSISTENCY, _temporal_violations, _temporal_consistency_finding, holds_for_simulated_ledgers=True))
+register_invariant(InvariantCheck(InvariantType.MAX_CONSECUTIVE_DEFICIT, _consecutive_deficit_violations, _consecutive_deficit_finding, _consecutive_deficit_parameters))
+register_invariant(InvariantCheck(InvariantType.SAVINGS_TARGET, _savings_target_violations, _savings_target_finding, _savings_target_parameters))
+
+
+# Months packed and checked first by a first_only check of a record list
+FIRST_ONLY_PREFIX_MONTHS = 12
+
+
+def report_order() -> List[InvariantType]:
+    """Violations are listed in registration order (the order the separate checks have always reported them)."""
+    with _invariants_lock:
+        return list(INVARIANTS)
+
+
+def _first_true(mask: np.ndarray, start: int = 0) -> Optional[int]:
+    mask = mask[start:]
+    if mask.size == 0 or not mask.any():
+        return None
+    return start + int(mask.argmax())
+
+
+def _scan(scenario: Scenario, ledger: Ledger, records: Sequence[MonthlyRecord], first_only: bool, start: int = 0, limit: Optional[int] = None) -> Dict[InvariantType, Finding]:
+    """
+    One fused pass of the compiled checks over a column-wise ledger. Findings are built from `records`.
+    Only violations before `limit` (default: the whole ledger) are looked for.
+    """
+    found: Dict[InvariantType, Finding] = {}
+    limit = len(ledger) if limit is None else limit  # with first_only, later checks only look up to the first finding
+
+    for check, parameters in compile_invariants(scenario):
+        if limit <= start:
+            break
+        # The one month past `limit` is for checks that compare a month with the next
+        view = ledger[:limit + 1] if limit + 1 < len(ledger) else ledger
+        j = _first_true(check.violations(scenario, view, parameters)[:limit], start)
+        if j is not None:
+            magnitude, details = check.finding(scenario, records, j, parameters)
+            found[check.invariant] = (j, magnitude, details)
+            if first_only:
+                # A later-precedence invariant only wins if it fires strictly earlier
+                limit = j
+
+    if first_only and found:
+        first = min(found.items(), key=lambda item: (item[1][0], item[0].get_precedence()))
+        return dict([first])
+    return found
+
+
+def check_invariants(scenario: Scenario, records: Sequence[MonthlyRecord], first_only: bool = False, start: int = 0) -> Optional[List[Violation]]:
+    """
+    Check every enabled invariant in a single fused pass and return the first violation of each, or None.
+    With first_only=True, stop at the overall first violation (earliest month, then invariant precedence)
+    and return just that one. `start` skips violations reported before that ledger index, for callers that
+    already know the prefix. Record lists are packed into a column-wise Ledger and checked the same way; with
+    first_only they are packed in doubling prefixes, so only about twice the months up to the first violation
+    are packed and checked.
+    """
+    if isinstance(records, Ledger):
+        found = _scan(scenario, records, records, first_only, start)
+    elif first_only:
+        months = max(FIRST_ONLY_PREFIX_MONTHS, start + 1)
+        while True:
+            prefix = Ledger.from_records(list(records[:months + 1]))
+            found = _scan(scenario, prefix, records, first_only, start, min(months, len(records)))
+            if found or months >= len(records):
+                break
+            months *= 2
+    else:
+        found = _scan(scenario, Ledger.from_records(list(records)), records, first_only, start)
 
     violations = []
-    lf_record, lf_magnitude, lf_description = check_liquidity_floor(records)
-    if lf_record:
-        violations.append(
-            Violation(
-                invariant=InvariantType.LIQUIDITY_FLOOR, 
-                month=lf_record.month, 
-                record=lf_record, 
-                magnitude=lf_magnitude, 
-                details=lf_description
-            )
-        )
-    mc_record, mc_magnitude, mc_description = check_money_conservation(scenario, records)
-    if mc_record:
-        violations.append(
-            Violation(
-                invariant=InvariantType.MONEY_CONSERVATION, 
-                month=mc_record.month, 
-                record=mc_record, 
-                magnitude=mc_magnitude, 
-                details=mc_description
-            )
-        )
-    
-    tc_record, tc_magnitude, tc_description = check_temporal_consistency(records)
-    if tc_record:
-        violations.append(
-            Violation(
-                invariant=InvariantType.TEMPORAL_CONSISTENCY, 
-                month=tc_record.month, 
-                record=tc_record, 
-                magnitude=tc_magnitude, 
-                details=tc_description
+    for invariant in report_order():
+        if invariant in found:
+            index, magnitude, details = found[invariant]
+            record = records[index]
+            violations.append(
+                Violation(
+                    invariant=invariant,
+                    month=record.month,
+                    record=record,
+                    magnitude=magnitude,
+                    details=details
+                )
             )
-        )
 
     if len(violations) > 0:
         return violations
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,268 @@
+from workbench.types import MonthlyRecord, Event
+from workbench.month import Month
+from workbench.money import to_cents, to_dollars
+from collections.abc import Sequence
+from typing import Iterator, List, Optional, Union
+import heapq
+from pydantic_core import core_schema
+import numpy as np
+
+
+class Ledger(Sequence):
+    """
+    Columnar ledger: parallel per-month arrays plus a (months, events) activation bitmap.
+
+    No per-month Python objects are kept. Indexing or iterating builds `MonthlyRecord` views on demand,
+    and serialization writes rows straight from the arrays. `events_applied` for a month lists the
+    active events in column order.
+
+    Money columns are int64 cents (`*_cents`); the dollar columns (`starting_cash`, ...) are float views of
+    them for reporting. Comparisons between ledgers use the cents, so they are exact.
+    """
+
+    def __init__(
+        self,
+        months: np.ndarray,
+        starting_cash_cents: np.ndarray,
+        total_inflows_cents: np.ndarray,
+        total_outflows_cents: np.ndarray,
+        ending_cash_cents: np.ndarray,
+        base_takehome_salary_cents: Union[int, np.ndarray],
+        base_outflows_cents: Union[int, np.ndarray],
+        events: List[Event],
+        active: np.ndarray,
+    ):
+        self.months = np.asarray(months, dtype=np.int64)
+        n = len(self.months)
+        self.starting_cash_cents = np.asarray(starting_cash_cents, dtype=np.int64)
+        self.total_inflows_cents = np.asarray(total_inflows_cents, dtype=np.int64)
+        self.total_outflows_cents = np.asarray(total_outflows_cents, dtype=np.int64)
+        self.ending_cash_cents = np.asarray(ending_cash_cents, dtype=np.int64)
+        # Scenario-level base values broadcast without allocating a column
+        self.base_takehome_salary_cents = np.broadcast_to(np.asarray(base_takehome_salary_cents, dtype=np.int64), (n,))
+        self.base_outflows_cents = np.broadcast_to(np.asarray(base_outflows_cents, dtype=np.int64), (n,))
+        self.events = list(events)
+        self.active = np.asarray(active, dtype=bool).reshape(n, len(self.events))
+
+    @classmethod
+    def empty(cls) -> 'Ledger':
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0), 0, 0, [], np.empty((0, 0)))
+
+    @property
+    def starting_cash(self) -> np.ndarray:
+        return to_dollars(self.starting_cash_cents)
+
+    @property
+    def total_inflows(self) -> np.ndarray:
+        return to_dollars(self.total_inflows_cents)
+
+    @property
+    def total_outflows(self) -> np.ndarray:
+        return to_dollars(self.total_outflows_cents)
+
+    @property
+    def ending_cash(self) -> np.ndarray:
+        return to_dollars(self.ending_cash_cents)
+
+    @property
+    def base_takehome_salary(self) -> np.ndarray:
+        return to_dollars(self.base_takehome_salary_cents)
+
+    @property
+    def base_outflows(self) -> np.ndarray:
+        return to_dollars(self.base_outflows_cents)
+
+    @classmethod
+    def from_records(cls, records: List[MonthlyRecord], events: Optional[List[Event]] = None) -> 'Ledger':
+        """
+        Pack records into columns. `events` fixes the column order; without it the order is inferred so that
+        every record's `events_applied` order is preserved whenever the records agree on one.
+        Events not listed get new columns in first-seen order. Dollar amounts are rounded to cents.
+        """
+        columns = list(events) if events is not None else _column_order(records)
+        by_id = {id(event): j for j, event in enumerate(columns)}
+        by_value = {event_key(event): j for j, event in enumerate(columns)}
+
+        active_cells = []
+        for i, record in enumerate(records):
+            for event in record.events_applied:
+                j = by_id.get(id(event))
+                if j is None:
+                    key = event_key(event)
+                    j = by_value.get(key)
+                    if j is None:
+                        j = len(columns)
+                        columns.append(event)
+                        by_value[key] = j
+                    by_id[id(event)] = j
+                active_cells.append((i, j))
+
+        active = np.zeros((len(records), len(columns)), dtype=bool)
+        if active_cells:
+            rows, cols = zip(*active_cells)
+            active[list(rows), list(cols)] = True
+
+        return cls(
+            months=[record.month._index for record in records],
+            starting_cash_cents=to_cents([record.starting_cash for record in records]),
+            total_inflows_cents=to_cents([record.total_inflows for record in records]),
+            total_outflows_cents=to_cents([record.total_outflows for record in records]),
+            ending_cash_cents=to_cents([record.ending_cash for record in records]),
+            base_takehome_salary_cents=to_cents([record.base_takehome_salary for record in records]),
+            base_outflows_cents=to_cents([record.base_outflows for record in records]),
+            events=columns,
+            active=active,
+        )
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Ledger(
+                self.months[index],
+                self.starting_cash_cents[index],
+                self.total_inflows_cents[index],
+                self.total_outflows_cents[index],
+                self.ending_cash_cents[index],
+                self.base_takehome_salary_cents[index],
+                self.base_outflows_cents[index],
+                self.events,
+                self.active[index],
+            )
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("ledger index out of range")
+        return self._record(index)
+
+    def __iter__(self) -> Iterator[MonthlyRecord]:
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def _record(self, i: int) -> MonthlyRecord:
+        # Values come straight from the simulator or from validated records, so skip re-validation
+        return MonthlyRecord.model_construct(
+            month=Month.from_index(int(self.months[i])),
+            starting_cash=to_dollars(self.starting_cash_cents[i]),
+            base_takehome_salary=to_dollars(self.base_takehome_salary_cents[i]),
+            base_outflows=to_dollars(self.base_outflows_cents[i]),
+            total_inflows=to_dollars(self.total_inflows_cents[i]),
+            total_outflows=to_dollars(self.total_outflows_cents[i]),
+            events_applied=[self.events[j] for j in np.flatnonzero(self.active[i])],
+            ending_cash=to_dollars(self.ending_cash_cents[i]),
+        )
+
+    def to_records(self) -> List[MonthlyRecord]:
+        return list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Ledger):
+            columns = ("months", "starting_cash_cents", "total_inflows_cents", "total_outflows_cents", "ending_cash_cents", "base_takehome_salary_cents", "base_outflows_cents")
+            if len(self) != len(other) or not all(np.array_equal(getattr(self, c), getattr(other, c)) for c in columns):
+                return False
+            if self.events == other.events and np.array_equal(self.active, other.active):
+                return True
+            # Same months and cash, but event columns differ in order or content: compare month by month
+            return self.to_records() == other.to_records()
+        if isinstance(other, list):
+            # Records are compared at cent precision, like two ledgers
+            return len(self) == len(other) and self == Ledger.from_records(other, self.events)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Ledger(months={len(self)}, events={len(self.events)})"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns (base values are broadcast and cost nothing per month)."""
+        return sum(a.nbytes for a in (self.months, self.starting_cash_cents, self.total_inflows_cents, self.total_outflows_cents, self.ending_cash_cents, self.active))
+
+    def to_dicts(self, mode: str = "json") -> List[dict]:
+        """Serialize rows directly from the columns, in the same shape as `MonthlyRecord.model_dump`."""
+        event_dicts = [event.model_dump(mode=mode) for event in self.events]
+        columns = zip(
+            self.months.tolist(),
+            self.starting_cash.tolist(),
+            self.base_takehome_salary.tolist(),
+            self.base_outflows.tolist(),
+            self.total_inflows.tolist(),
+            self.total_outflows.tolist(),
+            self.ending_cash.tolist(),
+        )
+        rows = []
+        for i, (month, starting, salary, base_out, inflows, outflows, ending) in enumerate(columns):
+            rows.append({
+                # Month serializes to its string form in every pydantic mode
+                "month": Month.from_index(month).to_string(),
+                "starting_cash": starting,
+                "base_takehome_salary": salary,
+                "base_outflows": base_out,
+                "total_inflows": inflows,
+                "total_outflows": outflows,
+                "events_applied": [event_dicts[j] for j in np.flatnonzero(self.active[i])],
+                "ending_cash": ending,
+            })
+        return rows
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+
+        def validate_ledger(v):
+            if isinstance(v, cls):
+                return v
+            if isinstance(v, list):
+                return cls.from_records([MonthlyRecord.model_validate(record) for record in v])
+            raise ValueError(f"Cannot convert {type(v)} to Ledger")
+
+        def serialize_ledger(v, info):
+            return v.to_dicts(mode=info.mode)
+
+        return core_schema.no_info_plain_validator_function(
+            validate_ledger,
+            serialization=core_schema.plain_serializer_function_ser_schema(serialize_ledger, info_arg=True)
+        )
+
+
+def event_key(event: Event) -> tuple:
+    return (event.label, event.start_month._index, event.amount, event.duration_months)
+
+
+def _column_order(records: List[MonthlyRecord]) -> List[Event]:
+    """Topologically order distinct events by their relative order within records, breaking ties by first appearance."""
+    first_seen = {}
+    events = []
+    successors = {}
+    indegree = {}
+    for record in records:
+        previous = None
+        for event in record.events_applied:
+            key = event_key(event)
+            if key not in first_seen:
+                first_seen[key] = len(events)
+                events.append(event)
+                successors[key] = set()
+                indegree[key] = 0
+            if previous is not None and previous != key and key not in successors[previous]:
+                successors[previous].add(key)
+                indegree[key] += 1
+            previous = key
+
+    ready = [(first_seen[key], key) for key, degree in indegree.items() if degree == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, key = heapq.heappop(ready)
+        ordered.append(key)
+        for successor in successors[key]:
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                heapq.heappush(ready, (first_seen[successor], successor))
+
+    # Records that disagree on an order leave a cycle; keep the rest in first-seen order
+    placed = set(ordered)
+    ordered += [key for key in first_seen if key not in placed]
+    return [events[first_seen[key]] for key in ordered]
@@ -0,0 +1,163 @@
+"""
+Structured comparison of an agent's ledger with the simulator's (or a task's expected) ledger.
+
+Both sides are packed into column-wise Ledgers, aligned by month and compared column by column in whole cents,
+so a long ledger is diffed with a few array operations instead of per-month model equality. The diff says where
+the agent first went wrong and how much of the ledger is right; scoring uses the latter for partial credit.
+"""
+
+from workbench.types import MonthlyRecord, Event
+from workbench.ledger import Ledger
+from workbench.month import Month
+from workbench.money import to_cents, to_dollars
+from pydantic import BaseModel
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+DIFF_FIELDS = ["starting_cash", "base_takehome_salary", "base_outflows", "total_inflows", "total_outflows", "ending_cash"]
+EVENTS_FIELD = "events_applied"
+MONTH_FIELD = "month"  # a month missing from, or unexpected in, the agent's ledger
+MAX_REPORTED_MONTHS = 24
+
+
+class Divergence(BaseModel):
+    month: str
+    field: str  # one of DIFF_FIELDS, EVENTS_FIELD or MONTH_FIELD
+    expected: Optional[float] = None  # cash fields only
+    actual: Optional[float] = None
+    difference: Optional[float] = None  # actual - expected
+
+
+class EventsMismatch(BaseModel):
+    month: str
+    missing: List[str]  # labels of events that apply but the agent left out
+    extra: List[str]  # labels of events the agent applied that do not apply
+
+
+class LedgerDiff(BaseModel):
+    months_expected: int
+    months_matching: int  # months present in both ledgers with every field and events_applied equal
+    first_divergence: Optional[Divergence] = None
+    field_mismatches: Dict[str, int] = {}  # months each differing field (or events_applied) is wrong in
+    max_difference: float = 0.0  # largest |actual - expected| over the cash fields of shared months
+    missing_month_count: int = 0
+    extra_month_count: int = 0  # months not expected, and repeats of a month
+    # The first MAX_REPORTED_MONTHS of each
+    missing_months: List[str] = []
+    extra_months: List[str] = []
+    events_mismatches: List[EventsMismatch] = []
+
+    @property
+    def matches(self) -> bool:
+        return self.months_matching == self.months_expected and self.extra_month_count == 0
+
+    @property
+    def accuracy(self) -> float:
+        """Share of months the agent got right, counting extra months against it (1.0 only for a match)."""
+        total = self.months_expected + self.extra_month_count
+        return self.months_matching / total if total else 1.0
+
+
+def diff_ledgers(actual: Sequence[MonthlyRecord], expected: Sequence[MonthlyRecord], tolerance: float = 0.0) -> LedgerDiff:
+    """
+    Compare `actual` (usually the agent's records) with `expected`, month by month. Cash fields differing by
+    more than `tolerance` dollars count as wrong; amounts are rounded to cents first, so the default only
+    ignores sub-cent noise. Events are matched by label, start month, amount (in cents) and duration.
+    """
+    expected = expected if isinstance(expected, Ledger) else Ledger.from_records(list(expected))
+    actual = actual if isinstance(actual, Ledger) else Ledger.from_records(list(actual), expected.events)
+
+    # Align on the first record of each month; anything left over in `actual` is extra
+    shared, e_index, a_index = np.intersect1d(expected.months, actual.months, return_indices=True)
+    missing = np.setdiff1d(expected.months, actual.months)
+    unaligned = np.ones(len(actual), dtype=bool)
+    unaligned[a_index] = False
+    extra = np.sort(actual.months[unaligned])
+
+    tolerance_cents = to_cents(tolerance)
+    differences = np.array([
+        getattr(actual, field + "_cents")[a_index] - getattr(expected, field + "_cents")[e_index]
+        for field in DIFF_FIELDS
+    ], dtype=np.int64).reshape(len(DIFF_FIELDS), len(shared))
+    wrong = np.abs(differences) > tolerance_cents
+
+    columns: Dict[tuple, int] = {}
+    events: List[Event] = []
+    expected_active = _active_on_shared_columns(expected, e_index, columns, events)
+    actual_active = _active_on_shared_columns(actual, a_index, columns, events)
+    width = len(events)
+    expected_active = np.pad(expected_active, ((0, 0), (0, width - expected_active.shape[1])))
+    actual_active = np.pad(actual_active, ((0, 0), (0, width - actual_active.shape[1])))
+    events_wrong = (expected_active != actual_active).any(axis=1)
+
+    month_wrong = wrong.any(axis=0) | events_wrong
+    field_mismatches = {field: int(wrong[k].sum()) for k, field in enumerate(DIFF_FIELDS) if wrong[k].any()}
+    if events_wrong.any():
+        field_mismatches[EVENTS_FIELD] = int(events_wrong.sum())
+
+    events_mismatches = []
+    for m in np.flatnonzero(events_wrong)[:MAX_REPORTED_MONTHS]:
+        events_mismatches.append(EventsMismatch(
+            month=_month(shared[m]),
+            missing=[events[c].label for c in np.flatnonzero(expected_active[m] & ~actual_active[m])],
+            extra=[events[c].label for c in np.flatnonzero(actual_active[m] & ~expected_active[m])],
+        ))
+
+    return LedgerDiff(
+        months_expected=len(expected),
+        months_matching=int(len(shared) - month_wrong.sum()),
+        first_divergence=_first_divergence(expected, actual, shared, e_index, a_index, wrong, month_wrong, missing, extra),
+        field_mismatches=field_mismatches,
+        max_difference=to_dollars(int(np.abs(differences).max(initial=0))),
+        missing_month_count=len(missing),
+        extra_month_count=len(extra),
+        missing_months=[_month(month) for month in missing[:MAX_REPORTED_MONTHS]],
+        extra_months=[_month(month) for month in extra[:MAX_REPORTED_MONTHS]],
+        events_mismatches=events_mismatches,
+    )
+
+
+def _event_key(event: Event) -> tuple:
+    return (event.label, event.start_month._index, to_cents(event.amount), event.duration_months)
+
+
+def _active_on_shared_columns(ledger: Ledger, rows: np.ndarray, columns: Dict[tuple, int], events: List[Event]) -> np.ndarray:
+    # Re-index a ledger's activation bitmap onto event columns shared by both sides (equal events share one)
+    active = np.zeros((len(rows), len(ledger.events) + len(events)), dtype=bool)
+    for j, event in enumerate(ledger.events):
+        key = _event_key(event)
+        if key not in columns:
+            columns[key] = len(events)
+            events.append(event)
+        active[:, columns[key]] |= ledger.active[rows, j]
+    return active[:, :len(events)]
+
+
+def _first_divergence(expected: Ledger, actual: Ledger, shared, e_index, a_index, wrong, month_wrong, missing, extra) -> Optional[Divergence]:
+    found = []  # (month, tie-break, divergence)
+    if month_wrong.any():
+        m = int(month_wrong.argmax())
+        if wrong[:, m].any():
+            k = int(wrong[:, m].argmax())
+            field = DIFF_FIELDS[k]
+            expected_value = int(getattr(expected, field + "_cents")[e_index[m]])
+            actual_value = int(getattr(actual, field + "_cents")[a_index[m]])
+            divergence = Divergence(
+                month=_month(shared[m]),
+                field=field,
+                expected=to_dollars(expected_value),
+                actual=to_dollars(actual_value),
+                difference=to_dollars(actual_value - expected_value),
+            )
+        else:
+            divergence = Divergence(month=_month(shared[m]), field=EVENTS_FIELD)
+        found.append((int(shared[m]), 0, divergence))
+    if len(missing):
+        found.append((int(missing[0]), 1, Divergence(month=_month(missing[0]), field=MONTH_FIELD)))
+    if len(extra):
+        found.append((int(extra[0]), 1, Divergence(month=_month(extra[0]), field=MONTH_FIELD)))
+    return min(found, key=lambda item: item[:2])[2] if found else None
+
+
+def _month(index) -> str:
+    return Month.from_index(int(index)).to_string()
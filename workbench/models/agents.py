@@ -1,7 +1,12 @@
 from workbench.types import Scenario
 import json
 import os
-from anthropic import Anthropic
+from workbench.models.clients import get_client, get_async_client
+from workbench.models.prompts import get_prompts
+from workbench.models.response_cache import get_response_cache
+from workbench.models.scheduler import get_scheduler
+from workbench.models.tools.registry import execute_tools
+import asyncio
 from workbench.models.format_utils import format_eval_failure
 
 class BaseAgent:
@@ -11,6 +16,13 @@ class BaseAgent:
     def repair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = None, max_tool_calls: int = 10) -> str:
         raise NotImplementedError
 
+    # Async variants; agents without an async client run the sync call on a worker thread
+    async def adraft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = None, max_tool_calls: int = 10) -> str:
+        return await asyncio.to_thread(self.draft, prompt, mode, generate_ledger, prompt_dir, model, max_tool_calls)
+
+    async def arepair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = None, max_tool_calls: int = 10) -> str:
+        return await asyncio.to_thread(self.repair, scenario_json, eval_result, generate_ledger, prompt_dir, model, max_tool_calls)
+
 class StubAgent(BaseAgent):
     def draft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = None, max_tool_calls: int = 10) -> str:
         scenario = {
@@ -123,94 +135,184 @@ class BadSchemaAgent(BaseAgent):
     def repair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = None, max_tool_calls: int = 10) -> str:
         return json.dumps({"id": "still_bad"})
 
-class ClaudeAgent(BaseAgent):
-    def __init__(self):
-        # Get API key from environment variable
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-        
-        # Initialize the Anthropic client
-        self.client = Anthropic(api_key=api_key)
-        
-    
-    def draft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
+# Token counts accumulated per draft/repair from each response's `usage`
+TOKEN_USAGE_FIELDS = ["input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"]
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cached_system(system_prompt: str) -> list:
+    """System prompt as a single text block marked as a prompt-cache breakpoint."""
+    return [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+
+def cached_tools(tools: list) -> list:
+    """Tool schemas with a cache breakpoint on the last one, which caches the whole tool list."""
+    if not tools:
+        return tools
+    return tools[:-1] + [dict(tools[-1], cache_control=CACHE_CONTROL)]
+
+
+def with_cached_history(messages: list) -> list:
+    """
+    Copy of `messages` with a cache breakpoint on the final content block, so every earlier turn is a cached
+    prefix on the next request. Only the request copy is marked: the API allows four breakpoints per request,
+    and system, tools and the latest turn use three.
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    if not content:
+        return messages
+    final_block = content[-1]
+    if hasattr(final_block, "model_dump"):
+        final_block = final_block.model_dump(exclude_none=True)
+    marked = list(content[:-1]) + [dict(final_block, cache_control=CACHE_CONTROL)]
+    return messages[:-1] + [dict(last, content=marked)]
+
+
+def _response_text(response) -> str:
+    final_text = ""
+    for content_block in response.content:
+        if content_block.type == "text":
+            final_text += content_block.text
+    return final_text.strip()
+
+
+class AnthropicAgent(BaseAgent):
+    """Base for agents that call the Anthropic API: shared pooled clients, with the response cache in front when one is configured."""
+
+    def __init__(self, client=None, async_client=None):
+        # Use the process-wide pooled clients unless specific ones are injected (e.g. in tests)
+        cache = get_response_cache()
+        if client is None and not (cache and cache.offline):
+            client = get_client()
+        self.client = client
+        self._async_client = async_client
+
+    @property
+    def async_client(self):
+        # Resolved per call: the shared async client belongs to the running event loop
+        return self._async_client or get_async_client()
+
+    def _create(self, request: dict):
+        # API calls go through the scheduler (rate limits, retries); cache hits skip it
+        cache = get_response_cache()
+        call = lambda: get_scheduler().call(request, lambda: self.client.messages.create(**request), self.scheduling)
+        if cache is None:
+            response, cached = call(), False
+        else:
+            response, cached = cache.create(request, call)
+        self._add_usage(response, cached)
+        return response
+
+    async def _acreate(self, request: dict):
+        cache = get_response_cache()
+        call = lambda: get_scheduler().acall(request, lambda: self.async_client.messages.create(**request), self.scheduling)
+        if cache is None:
+            response, cached = await call(), False
+        else:
+            response, cached = await cache.acreate(request, call)
+        self._add_usage(response, cached)
+        return response
+
+    def _begin(self, generate_ledger: bool, prompt_dir: str):
+        """Start a draft or repair: load its prompts and reset the token usage and scheduling totals."""
         self.load_prompts(generate_ledger, prompt_dir)
+        self.token_usage = {}
+        self.scheduling = {}
+
+    def _add_usage(self, response, cached: bool = False):
+        """
+        Accumulate the response's token counts (including prompt cache reads/writes) into `token_usage`.
+        Responses replayed from the response cache spent nothing: they are counted under `cached_responses` and
+        `cached_response_tokens` instead, so replayed runs don't report token spend that never happened.
+        """
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        if cached:
+            self.token_usage["cached_responses"] = self.token_usage.get("cached_responses", 0) + 1
+            self.token_usage["cached_response_tokens"] = self.token_usage.get("cached_response_tokens", 0) + sum(getattr(usage, field, None) or 0 for field in TOKEN_USAGE_FIELDS)
+            return
+        self.token_usage["api_calls"] = self.token_usage.get("api_calls", 0) + 1
+        for field in TOKEN_USAGE_FIELDS:
+            self.token_usage[field] = self.token_usage.get(field, 0) + (getattr(usage, field, None) or 0)
+
+
+class ClaudeAgent(AnthropicAgent):
+    def draft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
+        response = self._create(self._draft_request(prompt, generate_ledger, prompt_dir, model))
+        # Extract text from Claude's response
+        return response.content[0].text
+    
+    def repair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10) -> str:
+        response = self._create(self._repair_request(scenario_json, eval_result, generate_ledger, prompt_dir, model))
+        # Extract text from Claude's response
+        return response.content[0].text
+
+    async def adraft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
+        response = await self._acreate(self._draft_request(prompt, generate_ledger, prompt_dir, model))
+        return response.content[0].text
+
+    async def arepair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10) -> str:
+        response = await self._acreate(self._repair_request(scenario_json, eval_result, generate_ledger, prompt_dir, model))
+        return response.content[0].text
+
+    def _draft_request(self, prompt: str, generate_ledger: bool, prompt_dir: str, model: str) -> dict:
+        self._begin(generate_ledger, prompt_dir)
         # Use default model if None is passed
         if model is None:
             model = "claude-3-haiku-20240307"
-        
-        try:
-            response = self.client.messages.create(
-                model=model,
-                max_tokens=2500,
-                system=self.draft_system_prompt,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            # Extract text from Claude's response
-            return response.content[0].text
-        except Exception as e:
-            # Let the runner handle errors
-            raise e
-    
-    def repair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10) -> str:
-        self.load_prompts(generate_ledger, prompt_dir)
+        return dict(
+            model=model,
+            max_tokens=2500,
+            system=cached_system(self.draft_system_prompt),
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+    def _repair_request(self, scenario_json: str, eval_result: dict, generate_ledger: bool, prompt_dir: str, model: str) -> dict:
+        self._begin(generate_ledger, prompt_dir)
         # Use default model if None is passed
         if model is None:
             model = "claude-3-haiku-20240307"
-        try:
-            # Format the failure information
-            failure_msg = format_eval_failure(eval_result)
-            
-            # Create the user message with scenario and failure info
-            user_message = f"Original scenario that failed:\n{scenario_json}\n\n"
-            user_message += f"Failure details:\n{failure_msg}"
-            
-            response = self.client.messages.create(
-                model=model,
-                max_tokens=2500,
-                system=self.repair_system_prompt,
-                messages=[{"role": "user", "content": user_message}]
-            )
-            
-            # Extract text from Claude's response
-            return response.content[0].text
-        except Exception as e:
-            # Let the runner handle errors
-            raise e
-    # Load prompts from files
-    def load_prompts(self, generate_ledger: bool = False, prompt_dir: str = "prompts/v2"):
-        if generate_ledger:
-            with open(os.path.join(prompt_dir, "draft_with_ledger_system.txt"), "r") as f:
-                self.draft_system_prompt = f.read()
-            with open(os.path.join(prompt_dir, "repair_with_ledger_system.txt"), "r") as f:
-                self.repair_system_prompt = f.read()
-        else:
-            with open(os.path.join(prompt_dir, "draft_system.txt"), "r") as f:
-                self.draft_system_prompt = f.read()
-            with open(os.path.join(prompt_dir, "repair_system.txt"), "r") as f:
-                self.repair_system_prompt = f.read()
-
-
-class ClaudeToolsAgent(BaseAgent):
-    def __init__(self):
-        # Get API key from environment variable
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+        # Format the failure information
+        failure_msg = format_eval_failure(eval_result)
         
-        # Initialize the Anthropic client
-        self.client = Anthropic(api_key=api_key)
+        # Create the user message with scenario and failure info
+        user_message = f"Original scenario that failed:\n{scenario_json}\n\n"
+        user_message += f"Failure details:\n{failure_msg}"
+        return dict(
+            model=model,
+            max_tokens=2500,
+            system=cached_system(self.repair_system_prompt),
+            messages=[{"role": "user", "content": user_message}]
+        )
+
+    # Load prompts from the shared registry (files are only re-read when they change)
+    def load_prompts(self, generate_ledger: bool = False, prompt_dir: str = "prompts/v2"):
+        prompts = get_prompts(prompt_dir, generate_ledger, tools=False)
+        self.draft_system_prompt = prompts.draft_system_prompt
+        self.repair_system_prompt = prompts.repair_system_prompt
+        self.prompt_hash = prompts.content_hash
+
+
+class ClaudeToolsAgent(AnthropicAgent):
+    def __init__(self, client=None, async_client=None):
+        super().__init__(client, async_client)
         self.tools = [
             {
             "name": "calculate",
-            "description": "Perform arithmetic calculations using (e.g., '1000 + 2000 - 1500'). Returns the numeric result.",
+            "description": "Perform arithmetic calculations (e.g., '1000 + 2000 - 1500'). Supports + - * / // % **, parentheses, abs, round, min and max. Returns the numeric result. Pass expressions (a list) instead of expression to evaluate several at once; set exact to true for decimal-exact money arithmetic.",
             "input_schema": {
                 "type": "object",
                 "properties": {
-                    "expression": {"type": "string"}
-                },
-                "required": ["expression"]
+                    "expression": {"type": "string"},
+                    "expressions": {"type": "array", "items": {"type": "string"}, "description": "Optional: several expressions to evaluate in one call (max 50); returns a list of results"},
+                    "exact": {"type": "boolean", "description": "Optional: evaluate with exact decimal arithmetic"}
+                }
                 }
             },
             {
@@ -246,239 +348,174 @@ class ClaudeToolsAgent(BaseAgent):
                 },
                 "required": ["response_text"]
                 }   
+            },
+            {
+            "name": "simulate_scenario",
+            "description": "Run the reference simulator on a scenario JSON. Returns verdict (feasible/infeasible), first_violation_month, violated_invariant, min_cash, min_cash_month and ending_cash. Pass window_start (YYYY-MM) to also get up to 12 ledger rows from that month. Use this instead of rebuilding the ledger with many calculate calls.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "scenario_json": {"type": "string", "description": "The full scenario JSON to simulate"},
+                    "window_start": {"type": "string", "description": "Optional: first month (YYYY-MM) of the ledger slice to return"},
+                    "window_months": {"type": "integer", "description": "Optional: number of ledger months to return (default 6, max 12)"}
+                },
+                "required": ["scenario_json"]
+                }
+            },
+            {
+            "name": "validate_ledger",
+            "description": "Validate a whole ledger against its scenario in one call: arithmetic, month-to-month continuity, base monthly values and agreement with the reference simulator. Reports every failing month with the expected values. Prefer this over calling validate_monthly_record month by month.",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "ledger_json": {"type": "string", "description": "The ledger as a JSON list of monthly records"},
+                    "scenario_json": {"type": "string", "description": "The full scenario JSON the ledger was built from"}
+                },
+                "required": ["ledger_json", "scenario_json"]
+                }
             }
         ]    
     
     def draft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
-        self.load_prompts(generate_ledger, prompt_dir)
-        
-        if model is None:
-            model = "claude-3-haiku-20240307"
-        
-        # Keep user prompt clean - tool awareness already in system prompt
-        enhanced_prompt = prompt
-        
-        messages = [{"role": "user", "content": enhanced_prompt}]
-        tool_calls_used = 0
-        tool_usage = {"calculate": 0, "validate_monthly_record": 0, "duration_advisor": 0, "check_json": 0}
-        
-        try:
-            while tool_calls_used < max_tool_calls:
-                response = self.client.messages.create(
-                    model=model,
-                    max_tokens=3000,
-                    system=self.draft_system_prompt,
-                    messages=messages,
-                    tools=self.tools
-                )
-                
-                # Check if Claude used tools
-                if response.stop_reason == "tool_use":
-                    # Process tool calls
-                    tool_results = []
-                    exceeded_limit = False
-                    
-                    for content_block in response.content:
-                        if content_block.type == "tool_use":
-                            tool_calls_used += 1
-                            if tool_calls_used > max_tool_calls:
-                                # Exceed limit - stop processing but don't break conversation
-                                exceeded_limit = True
-                                break
-                            
-                            # Execute the tool and track usage
-                            tool_result = self._execute_tool(content_block.name, content_block.input)
-                            tool_usage[content_block.name] += 1
-                            
-                            # Store tool result for later
-                            tool_results.append({
-                                "type": "tool_result", 
-                                "tool_use_id": content_block.id, 
-                                "content": str(tool_result)
-                            })
-                    
-                    # Only add messages if we processed all tool calls successfully
-                    if not exceeded_limit:
-                        # Add assistant's response and all tool results
-                        messages.append({"role": "assistant", "content": response.content})
-                        messages.append({"role": "user", "content": tool_results})
-                    else:
-                        # Hit limit - exit the main loop
-                        break
-                    
-                    # Add tool usage reminder if getting close to limit
-                    if tool_calls_used >= max_tool_calls - 2:
-                        messages.append({
-                            "role": "user",
-                            "content": f"You've used {tool_calls_used}/{max_tool_calls} tool calls. Please finalize your scenario JSON now."
-                        })
-                else:
-                    # Claude finished without more tools - extract final response
-                    final_text = ""
-                    for content_block in response.content:
-                        if content_block.type == "text":
-                            final_text += content_block.text
-                    return final_text.strip(), tool_calls_used, tool_usage
-            
-            # If we hit max tool calls, ask for final answer
-            messages.append({
-                "role": "user", 
-                "content": "You've reached your tool call limit. Please provide your final scenario JSON now."
-            })
-            
-            final_response = self.client.messages.create(
-                model=model,
-                max_tokens=3000,
-                system=self.draft_system_prompt,
-                messages=messages
-            )
-            
-            final_text = ""
-            for content_block in final_response.content:
-                if content_block.type == "text":
-                    final_text += content_block.text
-            return final_text.strip(), tool_calls_used
-            
-        except Exception as e:
-            raise e
+        return self._complete(self._draft_conversation(prompt, generate_ledger, prompt_dir, model, max_tool_calls))
 
     def repair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
-        self.load_prompts(generate_ledger, prompt_dir)
-        
-        if model is None:
-            model = "claude-3-haiku-20240307"
+        return self._complete(self._repair_conversation(scenario_json, eval_result, generate_ledger, prompt_dir, model, max_tool_calls))
+
+    async def adraft(self, prompt: str, mode: str, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
+        return await self._acomplete(self._draft_conversation(prompt, generate_ledger, prompt_dir, model, max_tool_calls))
+
+    async def arepair(self, scenario_json: str, eval_result: dict, generate_ledger: bool = False, prompt_dir: str = "prompts/v2", model: str = "claude-3-haiku-20240307", max_tool_calls: int = 10):
+        return await self._acomplete(self._repair_conversation(scenario_json, eval_result, generate_ledger, prompt_dir, model, max_tool_calls))
+
+    def _complete(self, conversation):
+        """Drive a conversation generator with the sync client."""
+        try:
+            request = next(conversation)
+            while True:
+                request = conversation.send(self._create(request))
+        except StopIteration as done:
+            return done.value
+
+    async def _acomplete(self, conversation):
+        """Drive a conversation generator with the async client."""
+        try:
+            request = next(conversation)
+            while True:
+                request = conversation.send(await self._acreate(request))
+        except StopIteration as done:
+            return done.value
+
+    def _draft_conversation(self, prompt: str, generate_ledger: bool, prompt_dir: str, model: str, max_tool_calls: int):
+        self._begin(generate_ledger, prompt_dir)
+        # Keep user prompt clean - tool awareness already in system prompt
+        return self._tool_conversation(self.draft_system_prompt, prompt, model, max_tool_calls, "scenario")
+
+    def _repair_conversation(self, scenario_json: str, eval_result: dict, generate_ledger: bool, prompt_dir: str, model: str, max_tool_calls: int):
+        self._begin(generate_ledger, prompt_dir)
         
         # Format the failure information
-        from workbench.models.format_utils import format_eval_failure
         failure_msg = format_eval_failure(eval_result)
         
         # Create the user message with scenario and failure info
         user_message = f"Original scenario that failed:\n{scenario_json}\n\n"
         user_message += f"Failure details:\n{failure_msg}\n\n"
         # Tool awareness already in system prompt - keep user message clean
+        return self._tool_conversation(self.repair_system_prompt, user_message, model, max_tool_calls, "repair")
+
+    def _tool_conversation(self, system_prompt: str, user_message: str, model: str, max_tool_calls: int, output_name: str):
+        """
+        The tool-use loop as a generator: yields `messages.create` keyword arguments and is sent each response,
+        so the same loop runs on the sync and the async client. Returns (text, tool_calls_used, tool_usage),
+        or (text, tool_calls_used) when the tool call limit forced a final answer.
+        """
+        if model is None:
+            model = "claude-3-haiku-20240307"
         
         messages = [{"role": "user", "content": user_message}]
         tool_calls_used = 0
-        tool_usage = {"calculate": 0, "validate_monthly_record": 0, "duration_advisor": 0, "check_json": 0}
+        tool_usage = {tool["name"]: 0 for tool in self.tools}
         
-        try:
-            while tool_calls_used < max_tool_calls:
-                response = self.client.messages.create(
-                    model=model,
-                    max_tokens=3000,
-                    system=self.repair_system_prompt,
-                    messages=messages,
-                    tools=self.tools
-                )
-                
-                # Check if Claude used tools
-                if response.stop_reason == "tool_use":
-                    # Process tool calls
-                    tool_results = []
-                    exceeded_limit = False
-                    
-                    for content_block in response.content:
-                        if content_block.type == "tool_use":
-                            tool_calls_used += 1
-                            if tool_calls_used > max_tool_calls:
-                                # Exceed limit - stop processing but don't break conversation
-                                exceeded_limit = True
-                                break
-                            
-                            # Execute the tool and track usage
-                            tool_result = self._execute_tool(content_block.name, content_block.input)
-                            tool_usage[content_block.name] += 1
-                            
-                            # Store tool result for later
-                            tool_results.append({
-                                "type": "tool_result", 
-                                "tool_use_id": content_block.id, 
-                                "content": str(tool_result)
-                            })
-                    
-                    # Only add messages if we processed all tool calls successfully
-                    if not exceeded_limit:
-                        # Add assistant's response and all tool results
-                        messages.append({"role": "assistant", "content": response.content})
-                        messages.append({"role": "user", "content": tool_results})
-                    else:
-                        # Hit limit - exit the main loop
-                        break
-                    
-                    # Add tool usage reminder if getting close to limit
-                    if tool_calls_used >= max_tool_calls - 2:
-                        messages.append({
-                            "role": "user",
-                            "content": f"You've used {tool_calls_used}/{max_tool_calls} tool calls. Please finalize your repair JSON now."
-                        })
-                else:
-                    # Claude finished without more tools - extract final response
-                    final_text = ""
-                    for content_block in response.content:
-                        if content_block.type == "text":
-                            final_text += content_block.text
-                    return final_text.strip(), tool_calls_used, tool_usage
-            
-            # If we hit max tool calls, ask for final answer
-            messages.append({
-                "role": "user", 
-                "content": "You've reached your tool call limit. Please provide your final repair JSON now."
-            })
-            
-            final_response = self.client.messages.create(
+        # The system prompt and tool schemas are identical on every turn: mark them once as a cacheable prefix
+        system = cached_system(system_prompt)
+        tools = cached_tools(self.tools)
+        
+        while tool_calls_used < max_tool_calls:
+            response = yield dict(
                 model=model,
                 max_tokens=3000,
-                system=self.repair_system_prompt,
-                messages=messages
+                system=system,
+                messages=with_cached_history(messages),
+                tools=tools
             )
             
-            final_text = ""
-            for content_block in final_response.content:
-                if content_block.type == "text":
-                    final_text += content_block.text
-            return final_text.strip(), tool_calls_used
-            
-        except Exception as e:
-            raise e
-    
-    def _execute_tool(self, tool_name: str, args: dict):
-        """Execute a tool call and return the result."""
-        if tool_name == "calculate":
-            from workbench.models.tools.calculate import calculate
-            return calculate(args["expression"])
-        elif tool_name == "validate_monthly_record":
-            from workbench.models.tools.validate_monthly_record import validate_monthly_record
-            scenario_context = args.get("scenario_context_json")
-            return validate_monthly_record(args["monthly_record_json"], scenario_context)
-        elif tool_name == "duration_advisor":
-            from workbench.models.tools.duration_advisor import duration_advisor
-            return duration_advisor(args["event_description"])
-        elif tool_name == "check_json":
-            from workbench.models.tools.check_json import check_json
-            return check_json(args["response_text"])
-        else:
-            raise ValueError(f"Unknown tool: {tool_name}")
-
-
-
-
-    def load_prompts(self, generate_ledger: bool = False, prompt_dir: str = "prompts/v2"):
-        if generate_ledger:
-            with open(os.path.join(prompt_dir, "draft_with_ledger_system.txt"), "r") as f:
-                self.draft_system_prompt = f.read()
-            with open(os.path.join(prompt_dir, "repair_with_ledger_system.txt"), "r") as f:
-                self.repair_system_prompt = f.read()
-        else:
-            with open(os.path.join(prompt_dir, "draft_system.txt"), "r") as f:
-                self.draft_system_prompt = f.read()
-            with open(os.path.join(prompt_dir, "repair_system.txt"), "r") as f:
-                self.repair_system_prompt = f.read()
+            # Check if Claude used tools
+            if response.stop_reason == "tool_use":
+                # Process tool calls: collect the ones within the limit, then run them together
+                tool_blocks = []
+                exceeded_limit = False
+                
+                for content_block in response.content:
+                    if content_block.type == "tool_use":
+                        tool_calls_used += 1
+                        if tool_calls_used > max_tool_calls:
+                            # Exceed limit - stop processing but don't break conversation
+                            exceeded_limit = True
+                            break
+                        tool_blocks.append(content_block)
+                
+                # Execute the tools concurrently (results come back in block order) and track usage
+                outputs = execute_tools([(block.name, block.input) for block in tool_blocks])
+                tool_results = []
+                for content_block, tool_result in zip(tool_blocks, outputs):
+                    tool_usage[content_block.name] += 1
+                    
+                    # Store tool result for later
+                    tool_results.append({
+                        "type": "tool_result", 
+                        "tool_use_id": content_block.id, 
+                        "content": str(tool_result)
+                    })
+                
+                # Only add messages if we processed all tool calls successfully
+                if not exceeded_limit:
+                    # Add assistant's response and all tool results
+                    messages.append({"role": "assistant", "content": response.content})
+                    messages.append({"role": "user", "content": tool_results})
+                else:
+                    # Hit limit - exit the main loop
+                    break
+                
+                # Add tool usage reminder if getting close to limit
+                if tool_calls_used >= max_tool_calls - 2:
+                    messages.append({
+                        "role": "user",
+                        "content": f"You've used {tool_calls_used}/{max_tool_calls} tool calls. Please finalize your {output_name} JSON now."
+                    })
+            else:
+                # Claude finished without more tools - extract final response
+                return _response_text(response), tool_calls_used, tool_usage
         
-        # Enhance prompts with tool-aware guidance at the beginning
-        tool_guidance = "Tools available: calculate, validate_monthly_record, duration_advisor, check_json. Use as needed.\n\n"
+        # If we hit max tool calls, ask for final answer
+        messages.append({
+            "role": "user", 
+            "content": f"You've reached your tool call limit. Please provide your final {output_name} JSON now."
+        })
         
-        self.draft_system_prompt = tool_guidance + self.draft_system_prompt
-        self.repair_system_prompt = tool_guidance + self.repair_system_prompt
+        final_response = yield dict(
+            model=model,
+            max_tokens=3000,
+            system=system,
+            messages=with_cached_history(messages)
+        )
+        return _response_text(final_response), tool_calls_used
+    
+    def load_prompts(self, generate_ledger: bool = False, prompt_dir: str = "prompts/v2"):
+        # Registry entries for tool agents already carry the tool-aware guidance prefix
+        prompts = get_prompts(prompt_dir, generate_ledger, tools=True)
+        self.draft_system_prompt = prompts.draft_system_prompt
+        self.repair_system_prompt = prompts.repair_system_prompt
+        self.prompt_hash = prompts.content_hash
 
 
 def get_agent(model: str) -> BaseAgent:
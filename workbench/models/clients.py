@@ -0,0 +1,75 @@
+"""
+Process-wide Anthropic clients shared by every agent.
+
+Each client owns an HTTP connection pool with keep-alive, so sharing one per process lets
+tasks reuse open connections instead of paying a TLS handshake per agent. The SDK's own retries
+are off: the scheduler (workbench.models.scheduler) retries, so every retry is counted on the trace.
+"""
+
+from anthropic import Anthropic, AsyncAnthropic, DefaultHttpxClient, DefaultAsyncHttpxClient
+from typing import Optional
+import asyncio
+import threading
+import weakref
+import httpx
+import os
+
+DEFAULT_POOL_SIZE = 20
+KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_client: Optional[Anthropic] = None
+# httpx async pools are bound to the event loop that opened them, so async clients are kept per loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = weakref.WeakKeyDictionary()
+
+
+def configure_client_pool(pool_size: int = DEFAULT_POOL_SIZE):
+    """Set the connection pool size for shared clients. Clients created before the change are dropped."""
+    global _pool_size, _client
+    if pool_size < 1:
+        raise ValueError(f"Pool size must be at least 1, got {pool_size}")
+    with _lock:
+        _pool_size = pool_size
+        _client = None
+        _async_clients.clear()
+
+
+def get_pool_size() -> int:
+    return _pool_size
+
+
+def get_client() -> Anthropic:
+    """Return the shared sync client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = Anthropic(api_key=_api_key(), http_client=DefaultHttpxClient(limits=_limits()), max_retries=0)
+        return _client
+
+
+def get_async_client() -> AsyncAnthropic:
+    """Return the shared async client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = AsyncAnthropic(api_key=_api_key(), http_client=DefaultAsyncHttpxClient(limits=_limits()), max_retries=0)
+            _async_clients[loop] = client
+        return client
+
+
+def _api_key() -> str:
+    # Get API key from environment variable
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+    return api_key
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_pool_size,
+        max_keepalive_connections=_pool_size,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+    )
@@ -1,3 +1,6 @@
+import math
+
+
 def format_eval_failure(eval_result: dict) -> str:
     """Format eval result dict into a clear failure message for repair prompt."""
     
@@ -14,6 +17,13 @@ def format_eval_failure(eval_result: dict) -> str:
         msg += f"The scenario ran out of money in {first_violation_month}. "
         msg += f"Ending cash: ${ledger_summary.get('ending_cash', 0):,.0f}, "
         msg += f"Minimum cash: ${ledger_summary.get('min_cash', 0):,.0f}."
+        margin = eval_result.get("margin") or {}
+        if margin.get("months_below_floor"):
+            msg += f"\nCash is below the floor in {margin['months_below_floor']} month(s), "
+            msg += f"worst in {margin['binding_month']} (${margin['required_relief']:,.0f} short; "
+            msg += f"${margin['cumulative_deficit']:,.0f} short summed over those months). "
+            msg += f"Baseline outflows would need a cut of at least ${math.ceil(margin['required_baseline_cut']):,.0f}/month, "
+            msg += f"or any other repair has to leave at least ${margin['required_relief']:,.0f} more cash in {margin['binding_month']}."
         
     elif violated_invariant == "MONEY_CONSERVATION":
         msg += "The financial calculations don't add up correctly. "
@@ -22,6 +32,12 @@ def format_eval_failure(eval_result: dict) -> str:
     elif violated_invariant == "TEMPORAL_CONSISTENCY":
         msg += "Events were scheduled outside valid time bounds. "
         msg += "Check event timing relative to the scenario timeline."
+
+    elif violated_invariant == "MAX_CONSECUTIVE_DEFICIT":
+        msg += f"Cash fell for more months in a row than allowed; the limit was exceeded in {first_violation_month}."
+
+    elif violated_invariant == "SAVINGS_TARGET":
+        msg += f"The savings target was missed: cash in {first_violation_month} was below the target."
     
     # Add first violation details if available
     if violations and len(violations) > 0:
@@ -0,0 +1,73 @@
+"""
+Registry of system prompts, loaded once per (prompt_dir, generate_ledger, tools) and reloaded
+only when a prompt file's mtime changes.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+import hashlib
+import threading
+import os
+
+# Prepended to both system prompts for tool-enabled agents
+TOOL_GUIDANCE = "Tools available: calculate, validate_monthly_record, duration_advisor, check_json, simulate_scenario, validate_ledger. Use as needed.\n\n"
+
+
+@dataclass(frozen=True)
+class PromptSet:
+    """The draft and repair system prompts for one configuration, with a hash identifying their text."""
+    draft_system_prompt: str
+    repair_system_prompt: str
+    content_hash: str
+
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[str, bool, bool], Tuple[Tuple[float, ...], PromptSet]] = {}
+
+
+def get_prompts(prompt_dir: str = "prompts/v2", generate_ledger: bool = False, tools: bool = False) -> PromptSet:
+    key = (os.path.abspath(prompt_dir), generate_ledger, tools)
+    paths = _prompt_paths(prompt_dir, generate_ledger)
+    mtimes = tuple(os.stat(path).st_mtime_ns for path in paths)
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtimes:
+            return cached[1]
+
+    texts = []
+    for path in paths:
+        with open(path, "r") as f:
+            texts.append(f.read())
+    if tools:
+        texts = [TOOL_GUIDANCE + text for text in texts]
+
+    draft_system_prompt, repair_system_prompt = texts
+    prompts = PromptSet(
+        draft_system_prompt=draft_system_prompt,
+        repair_system_prompt=repair_system_prompt,
+        content_hash=prompt_hash(draft_system_prompt, repair_system_prompt),
+    )
+    with _lock:
+        _cache[key] = (mtimes, prompts)
+    return prompts
+
+
+def prompt_hash(*texts: str) -> str:
+    """Short, stable hash of prompt text (sha256, first 16 hex digits)."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def clear_prompt_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _prompt_paths(prompt_dir: str, generate_ledger: bool) -> Tuple[str, str]:
+    if generate_ledger:
+        return os.path.join(prompt_dir, "draft_with_ledger_system.txt"), os.path.join(prompt_dir, "repair_with_ledger_system.txt")
+    return os.path.join(prompt_dir, "draft_system.txt"), os.path.join(prompt_dir, "repair_system.txt")
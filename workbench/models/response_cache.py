@@ -0,0 +1,155 @@
+"""
+Content-addressed on-disk cache of `messages.create` responses.
+
+Entries are keyed by a hash of the full request (model, system prompt, messages including any
+tool transcript, tools, limits), so a re-run that sends identical requests can be served from disk.
+
+Modes:
+- record: always call the API and store every response
+- replay: serve hits from the cache; call the API (and store) on a miss
+- replay-only: serve hits from the cache; raise ResponseCacheMiss on a miss, never touching the network
+"""
+
+from anthropic.types import Message
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+CACHE_MODES = ["record", "replay", "replay-only"]
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class ResponseCacheMiss(Exception):
+    """Raised in replay-only mode when a request has no cached response."""
+
+
+def request_key(request: dict) -> str:
+    """sha256 of the request serialized canonically (API content blocks are dumped to plain JSON)."""
+    def encode(value):
+        if hasattr(value, "model_dump"):
+            return value.model_dump(mode="json", exclude_none=True)
+        return str(value)
+
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=encode)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    One JSON file per response under `directory`, sharded by key prefix. A file's mtime marks its last use;
+    when the cache grows past `max_bytes` the least recently used entries are evicted. The directory is
+    scanned once on open; after that entry sizes and recency are tracked in memory, so puts never rescan it.
+    """
+
+    def __init__(self, directory: str, mode: str = "replay", max_bytes: int = DEFAULT_MAX_BYTES):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Expected one of {', '.join(CACHE_MODES)}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Entry path -> size in bytes, least recently used first
+        self._lru: "OrderedDict[Path, int]" = OrderedDict()
+        for mtime, size, path in sorted((p.stat().st_mtime_ns, p.stat().st_size, p) for p in self._entries()):
+            self._lru[path] = size
+        self._size = sum(self._lru.values())
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == "replay-only"
+
+    def create(self, request: dict, call: Callable[[], object]) -> Tuple[object, bool]:
+        """
+        Serve `request` from the cache or via `call()` (the real `messages.create`), per the cache mode.
+        Returns the response and whether it came from the cache (no API call, so no tokens spent).
+        """
+        key = request_key(request)
+        if self.mode != "record":
+            cached = self.get(key)
+            if cached is not None:
+                return cached, True
+            if self.offline:
+                raise ResponseCacheMiss(f"No cached response for request {key[:16]} in {self.directory}")
+        response = call()
+        self.put(key, response)
+        return response, False
+
+    async def acreate(self, request: dict, call: Callable[[], Awaitable[object]]) -> Tuple[object, bool]:
+        """Async `create`: `call()` returns the awaitable API call."""
+        key = request_key(request)
+        if self.mode != "record":
+            cached = self.get(key)
+            if cached is not None:
+                return cached, True
+            if self.offline:
+                raise ResponseCacheMiss(f"No cached response for request {key[:16]} in {self.directory}")
+        response = await call()
+        self.put(key, response)
+        return response, False
+
+    def get(self, key: str) -> Optional[Message]:
+        path = self._path(key)
+        try:
+            data = path.read_text()
+            # Touch on read so eviction drops the least recently used entries
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            if path in self._lru:
+                self._lru.move_to_end(path)
+        return Message.model_validate_json(data)
+
+    def put(self, key: str, response):
+        data = response.model_dump_json()
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write then rename so concurrent readers never see a partial entry
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(data)
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._size += size - self._lru.pop(path, 0)
+            self._lru[path] = size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its bound. Caller holds the lock."""
+        target = self.max_bytes * 0.9
+        while self._size > target and self._lru:
+            path, size = self._lru.popitem(last=False)
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+    def _entries(self):
+        return self.directory.glob("*/*.json")
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def configure_response_cache(directory: Optional[str], mode: str = "replay", max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[ResponseCache]:
+    """Install the process-wide cache used by API agents, or remove it when `directory` is None."""
+    global _cache
+    _cache = ResponseCache(directory, mode, max_bytes) if directory else None
+    return _cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _cache
@@ -0,0 +1,220 @@
+"""
+Process-wide scheduler for API calls: per-model rate limits and retries.
+
+Each call first reserves a slot under its model's requests-per-minute and tokens-per-minute limits
+(sliding one-minute window) and waits for it, so concurrent tasks are paced to the limit instead of
+tripping it. Transient failures (429, overload/5xx, connection errors and timeouts) are retried with
+jittered exponential backoff, honouring the server's retry-after. Retries and time spent waiting are
+accumulated into a stats dict the caller records on the trace.
+"""
+
+from anthropic import APIConnectionError, APIStatusError
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import bisect
+import json
+import random
+import threading
+import time
+
+WINDOW_SECONDS = 60.0
+# Rough chars-per-token ratio used to size a request before its real usage is known
+CHARS_PER_TOKEN = 4
+# Limits under this key apply to models without limits of their own
+DEFAULT_MODEL_KEY = "*"
+
+
+@dataclass
+class RateLimit:
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def parse_rate_limit(spec: str) -> Tuple[str, RateLimit]:
+    """Parse MODEL=RPM/TPM (either side may be empty, e.g. "claude-3-5-haiku-20241022=50/40000" or "*=/80000")."""
+    try:
+        model, limits = spec.split("=", 1)
+        rpm, tpm = limits.split("/", 1)
+        return model.strip(), RateLimit(int(rpm) if rpm.strip() else None, int(tpm) if tpm.strip() else None)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit: {spec}. Expected MODEL=RPM/TPM")
+
+
+def is_transient(error: Exception) -> bool:
+    """Errors worth retrying: rate limiting, overload and server errors, and network failures."""
+    if isinstance(error, APIConnectionError):
+        return True  # includes timeouts
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if the error response carries a retry-after header."""
+    response = getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def estimate_tokens(request: dict) -> int:
+    """Input token estimate for a request, from the size of its prompt, messages and tools."""
+    payload = [request.get("system"), request.get("messages"), request.get("tools")]
+    return len(json.dumps(payload, default=str)) // CHARS_PER_TOKEN
+
+
+def response_tokens(response) -> Optional[int]:
+    """Tokens a response counts against the limit: uncached and cache-write input plus output."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return sum(getattr(usage, field, None) or 0 for field in ["input_tokens", "cache_creation_input_tokens", "output_tokens"])
+
+
+class RateLimiter:
+    """Sliding-window request and token counter for one model. Reservations may sit in the future."""
+
+    def __init__(self, limit: RateLimit, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.clock = clock
+        self._lock = threading.Lock()
+        # [start time, tokens] per call, sorted by start time
+        self._entries: List[list] = []
+
+    def reserve(self, tokens: int) -> Tuple[float, list]:
+        """Book the earliest start time that keeps the window within limits. Returns (seconds to wait, entry)."""
+        with self._lock:
+            now = self.clock()
+            self._entries = [entry for entry in self._entries if entry[0] > now - WINDOW_SECONDS]
+            start = now
+            while True:
+                active = [entry for entry in self._entries if entry[0] > start - WINDOW_SECONDS]
+                rpm, tpm = self.limit.requests_per_minute, self.limit.tokens_per_minute
+                if rpm and len(active) >= rpm:
+                    start = active[len(active) - rpm][0] + WINDOW_SECONDS
+                    continue
+                used = sum(entry[1] for entry in active)
+                if tpm and active and used + tokens > tpm:
+                    # Start once enough of the oldest calls have left the window
+                    for entry in active:
+                        used -= entry[1]
+                        if used + tokens <= tpm:
+                            break
+                    start = entry[0] + WINDOW_SECONDS
+                    continue
+                break
+            entry = [start, tokens]
+            bisect.insort(self._entries, entry, key=lambda e: e[0])
+            return start - now, entry
+
+    def settle(self, entry: list, tokens: int):
+        """Replace a reservation's estimate with the tokens the call actually used."""
+        with self._lock:
+            entry[1] = tokens
+
+
+class Scheduler:
+    def __init__(self, limits: Optional[Dict[str, RateLimit]] = None, retry: Optional[RetryPolicy] = None):
+        self.limits = limits or {}
+        self.retry = retry or RetryPolicy()
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def limiter(self, model: str) -> Optional[RateLimiter]:
+        limit = self.limits.get(model) or self.limits.get(DEFAULT_MODEL_KEY)
+        if limit is None:
+            return None
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = RateLimiter(limit)
+            return self._limiters[model]
+
+    def call(self, request: dict, call: Callable[[], object], stats: Optional[dict] = None):
+        """Run `call()` (the API request) under the model's rate limit, retrying transient errors."""
+        stats = {} if stats is None else stats
+        limiter = self.limiter(request.get("model"))
+        for attempt in range(self.retry.max_retries + 1):
+            entry = None
+            if limiter is not None:
+                wait, entry = limiter.reserve(estimate_tokens(request))
+                if wait > 0:
+                    _add(stats, "rate_limit_wait_seconds", wait)
+                    time.sleep(wait)
+            try:
+                response = call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, stats)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._settle(limiter, entry, response)
+            return response
+
+    async def acall(self, request: dict, call: Callable[[], Awaitable[object]], stats: Optional[dict] = None):
+        """Async `call`: `call()` returns the awaitable API request, and waits don't block the event loop."""
+        stats = {} if stats is None else stats
+        limiter = self.limiter(request.get("model"))
+        for attempt in range(self.retry.max_retries + 1):
+            entry = None
+            if limiter is not None:
+                wait, entry = limiter.reserve(estimate_tokens(request))
+                if wait > 0:
+                    _add(stats, "rate_limit_wait_seconds", wait)
+                    await asyncio.sleep(wait)
+            try:
+                response = await call()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, stats)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._settle(limiter, entry, response)
+            return response
+
+    def _retry_delay(self, error: Exception, attempt: int, stats: dict) -> Optional[float]:
+        """Seconds to back off before retrying `error`, or None when it should be raised."""
+        if not is_transient(error) or attempt >= self.retry.max_retries:
+            return None
+        delay = max(self.retry.backoff(attempt), retry_after(error) or 0)
+        _add(stats, "retries", 1)
+        _add(stats, "backoff_wait_seconds", delay)
+        return delay
+
+    def _settle(self, limiter: Optional[RateLimiter], entry: Optional[list], response):
+        tokens = response_tokens(response)
+        if limiter is not None and tokens is not None:
+            limiter.settle(entry, tokens)
+
+
+def _add(stats: dict, field: str, amount: float):
+    stats[field] = stats.get(field, 0) + amount
+
+
+_scheduler = Scheduler()
+
+
+def configure_scheduler(limits: Optional[Dict[str, RateLimit]] = None, retry: Optional[RetryPolicy] = None) -> Scheduler:
+    """Install the process-wide scheduler used by API agents (no limits and the default retry policy when called bare)."""
+    global _scheduler
+    _scheduler = Scheduler(limits, retry)
+    return _scheduler
+
+
+def get_scheduler() -> Scheduler:
+    return _scheduler
@@ -1,5 +1,108 @@
-def calculate(expression: str) -> str:
+"""
+Arithmetic for the calculate tool, without eval().
+
+Expressions are parsed once into a restricted AST (numbers, + - * / // % **, parentheses and a few
+functions) and compiled to closures, cached by expression string. `exact=True` evaluates in Decimal,
+so money sums like 0.1 + 0.2 come out as 0.3.
+"""
+
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Callable, List, Union
+import ast
+import operator
+
+MAX_EXPRESSION_LENGTH = 2000
+MAX_EXPONENT = 100
+MAX_BATCH_SIZE = 50
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+_FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+}
+
+Number = Union[int, float, Decimal]
+
+
+def calculate(expression: str, exact: bool = False):
+    """
+    Evaluate one arithmetic expression. Returns the number (as a decimal string when `exact`),
+    or an "Error: ..." string.
+    """
     try:
-        return eval(expression)
+        result = _compile(expression, exact)()
+    except ZeroDivisionError:
+        return "Error: division by zero"
     except Exception as e:
-        return f"Error: {e}"
\ No newline at end of file
+        return f"Error: {e}"
+    return str(result) if exact else result
+
+
+def calculate_batch(expressions: List[str], exact: bool = False) -> list:
+    """Evaluate several expressions in one call; each entry is a number or an "Error: ..." string."""
+    if len(expressions) > MAX_BATCH_SIZE:
+        return [f"Error: at most {MAX_BATCH_SIZE} expressions per call"]
+    return [calculate(expression, exact) for expression in expressions]
+
+
+@lru_cache(maxsize=4096)
+def _compile(expression: str, exact: bool) -> Callable[[], Number]:
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    tree = ast.parse(expression.strip(), mode="eval")
+    return _compile_node(tree.body, exact)
+
+
+def _compile_node(node: ast.AST, exact: bool) -> Callable[[], Number]:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = Decimal(repr(node.value)) if exact else node.value
+        return lambda: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _compile_node(node.left, exact), _compile_node(node.right, exact)
+        op = _BINARY_OPS[type(node.op)]
+        return lambda: op(left(), right())
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        base, exponent = _compile_node(node.left, exact), _compile_node(node.right, exact)
+        return lambda: _power(base(), exponent())
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        operand = _compile_node(node.operand, exact)
+        op = _UNARY_OPS[type(node.op)]
+        return lambda: op(operand())
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS and not node.keywords:
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile_node(arg, exact) for arg in node.args]
+        if function is round:
+            # round(x, n) needs an int digit count even in exact mode
+            return lambda: round(*[value if i == 0 else int(value) for i, value in enumerate(arg() for arg in args)])
+        return lambda: function(*[arg() for arg in args])
+
+    name = node.id if isinstance(node, ast.Name) else type(node).__name__
+    raise ValueError(f"unsupported expression element: {name}")
+
+
+def _power(base: Number, exponent: Number) -> Number:
+    # Bound exponents so a single call cannot build astronomically large integers
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"exponent larger than {MAX_EXPONENT}")
+    try:
+        return base ** exponent
+    except InvalidOperation as e:
+        raise ValueError(f"invalid power: {e}")
@@ -0,0 +1,51 @@
+"""
+Tool dispatch registry: tool modules are imported once here and looked up by name.
+
+Tools requested in the same turn run concurrently on a small shared executor; results keep block order.
+"""
+
+from workbench.models.tools.calculate import calculate, calculate_batch
+from workbench.models.tools.check_json import check_json
+from workbench.models.tools.duration_advisor import duration_advisor
+from workbench.models.tools.validate_monthly_record import validate_monthly_record
+from workbench.models.tools.simulate_scenario import simulate_scenario
+from workbench.models.tools.validate_ledger import validate_ledger
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+MAX_TOOL_WORKERS = 4
+
+# Tool name -> handler taking the tool_use block's input dict
+TOOL_HANDLERS: Dict[str, Callable[[dict], Any]] = {
+    "calculate": lambda args: _calculate(args),
+    "validate_monthly_record": lambda args: validate_monthly_record(args["monthly_record_json"], args.get("scenario_context_json")),
+    "duration_advisor": lambda args: duration_advisor(args["event_description"]),
+    "check_json": lambda args: check_json(args["response_text"]),
+    "simulate_scenario": lambda args: simulate_scenario(args["scenario_json"], args.get("window_start"), args.get("window_months", 6)),
+    "validate_ledger": lambda args: validate_ledger(args["ledger_json"], args["scenario_json"]),
+}
+
+def _calculate(args: dict):
+    # One expression, or a batch of them in a single tool call
+    exact = bool(args.get("exact", False))
+    if args.get("expressions") is not None:
+        return calculate_batch(list(args["expressions"]), exact)
+    return calculate(args["expression"], exact)
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS, thread_name_prefix="tool")
+
+
+def execute_tool(tool_name: str, args: dict):
+    """Execute a tool call and return the result."""
+    handler = TOOL_HANDLERS.get(tool_name)
+    if handler is None:
+        raise ValueError(f"Unknown tool: {tool_name}")
+    return handler(args)
+
+
+def execute_tools(calls: List[Tuple[str, dict]]) -> List[Any]:
+    """Execute (tool name, input) calls concurrently. Results are in call order; the first failing call's exception is raised."""
+    if len(calls) <= 1:
+        return [execute_tool(name, args) for name, args in calls]
+    return list(_executor.map(lambda call: execute_tool(*call), calls))
@@ -0,0 +1,80 @@
+from workbench.types import Scenario
+from workbench.month import Month
+from workbench.eval import run_eval, EvalResult
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import json
+import threading
+
+MAX_WINDOW_MONTHS = 12
+MEMO_SIZE = 256
+
+_memo: "OrderedDict[str, EvalResult]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def simulate_scenario(scenario_json: str, window_start: Optional[str] = None, window_months: int = 6) -> dict:
+    """
+    Run the simulator on a scenario and return a compact summary: verdict, first violation, min/ending cash
+    and, if `window_start` (YYYY-MM) is given, up to MAX_WINDOW_MONTHS ledger rows from that month.
+    """
+    try:
+        scenario = Scenario.model_validate(json.loads(scenario_json))
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON: {str(e)}"}
+    except Exception as e:
+        return {"error": f"Invalid scenario: {str(e)}"}
+
+    result = evaluate_scenario(scenario)
+    ledger = result.ledger
+    summary = {
+        "verdict": result.verdict,
+        "first_violation_month": result.first_violation_month,
+        "violated_invariant": result.violated_invariant.value if result.violated_invariant else None,
+        "months_simulated": len(ledger),
+        "min_cash": result.ledger_summary["min_cash"],
+        "min_cash_month": Month.from_index(int(ledger.months[ledger.ending_cash.argmin()])).to_string() if len(ledger) else None,
+        "ending_cash": result.ledger_summary["ending_cash"],
+    }
+
+    if window_start:
+        try:
+            offset = max(Month.from_string(window_start)._index - scenario.start_month._index, 0)
+        except Exception as e:
+            summary["ledger_window_error"] = f"Invalid window_start: {str(e)}"
+            return summary
+        count = min(max(int(window_months), 1), MAX_WINDOW_MONTHS)
+        window = ledger[offset:offset + count]
+        summary["ledger_window"] = [
+            {
+                "month": record.month.to_string(),
+                "starting_cash": record.starting_cash,
+                "total_inflows": record.total_inflows,
+                "total_outflows": record.total_outflows,
+                "ending_cash": record.ending_cash,
+                "events_applied": [event.label for event in record.events_applied],
+            }
+            for record in window
+        ]
+    return summary
+
+
+def scenario_hash(scenario: Scenario) -> str:
+    """Hash of the scenario's canonical JSON, so formatting differences in the tool input share one entry."""
+    return hashlib.sha256(scenario.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def evaluate_scenario(scenario: Scenario) -> EvalResult:
+    """`run_eval`, memoized by scenario hash (shared by the simulator-backed tools)."""
+    key = scenario_hash(scenario)
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    result = run_eval(scenario)
+    with _memo_lock:
+        _memo[key] = result
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return result
@@ -0,0 +1,94 @@
+from workbench.types import Scenario
+from workbench.month import Month
+from workbench.models.tools.simulate_scenario import evaluate_scenario
+import json
+
+TOLERANCE = 0.01
+MAX_REPORTED_FAILURES = 24
+CASH_FIELDS = ["starting_cash", "total_inflows", "total_outflows", "ending_cash"]
+
+
+def validate_ledger(ledger_json: str, scenario_json: str) -> dict:
+    """
+    Validate a whole ledger against its scenario in one pass: per-month arithmetic, month-to-month continuity,
+    base monthly values, and agreement with the simulator. Every failing month is reported with the
+    simulator's expected values (the first MAX_REPORTED_FAILURES in full).
+    """
+    try:
+        records = json.loads(ledger_json)
+        scenario = Scenario.model_validate(json.loads(scenario_json))
+    except json.JSONDecodeError as e:
+        return {"valid": False, "error": f"Invalid JSON: {str(e)}"}
+    except Exception as e:
+        return {"valid": False, "error": f"Invalid scenario: {str(e)}"}
+    if isinstance(records, dict):
+        # Accept a draft/repair response object that wraps the ledger
+        records = records.get("ledger", [])
+    if not isinstance(records, list):
+        return {"valid": False, "error": "Ledger must be a JSON list of monthly records"}
+
+    expected = evaluate_scenario(scenario).ledger
+    base = scenario.base_monthly
+    failures = []
+    previous_ending = scenario.initial_state.starting_cash
+
+    for i, record in enumerate(records):
+        errors = []
+        expected_month = scenario.start_month.add(i).to_string()
+        if not isinstance(record, dict):
+            failures.append({"month": expected_month, "errors": ["Record is not a JSON object"]})
+            continue
+
+        missing = [field for field in CASH_FIELDS if not isinstance(record.get(field), (int, float))]
+        if missing:
+            errors.append(f"Missing or non-numeric fields: {missing}")
+        else:
+            starting, inflows, outflows, ending = (record[field] for field in CASH_FIELDS)
+            if abs(starting + inflows + outflows - ending) > TOLERANCE:
+                errors.append(f"Arithmetic error: {starting} + {inflows} + {outflows} = {starting + inflows + outflows}, but ending_cash is {ending}")
+            if previous_ending is not None and abs(starting - previous_ending) > TOLERANCE:
+                source = "initial starting_cash" if i == 0 else "previous month's ending_cash"
+                errors.append(f"Continuity error: starting_cash {starting} should equal the {source} {previous_ending}")
+
+        if record.get("month") != expected_month:
+            errors.append(f"Month should be {expected_month}, found {record.get('month')}")
+        for field, value in (("base_takehome_salary", base.takehome_salary), ("base_outflows", base.outflows)):
+            if field in record and isinstance(record[field], (int, float)) and abs(record[field] - value) > TOLERANCE:
+                errors.append(f"{field} should always be {value} (from scenario base_monthly), found {record[field]}")
+
+        expected_values = None
+        if i < len(expected):
+            expected_values = {
+                "starting_cash": float(expected.starting_cash[i]),
+                "total_inflows": float(expected.total_inflows[i]),
+                "total_outflows": float(expected.total_outflows[i]),
+                "ending_cash": float(expected.ending_cash[i]),
+            }
+            mismatched = [
+                field for field in CASH_FIELDS
+                if isinstance(record.get(field), (int, float)) and abs(record[field] - expected_values[field]) > TOLERANCE
+            ]
+            if mismatched:
+                errors.append(f"Differs from the simulator in: {mismatched}")
+        else:
+            errors.append(f"Beyond the scenario horizon of {scenario.horizon_months} months")
+
+        if errors:
+            failure = {"month": expected_month, "errors": errors}
+            if expected_values:
+                failure["expected"] = expected_values
+            failures.append(failure)
+        previous_ending = record.get("ending_cash") if isinstance(record.get("ending_cash"), (int, float)) else None
+
+    result = {
+        "valid": not failures and len(records) == len(expected),
+        "months_checked": len(records),
+        "months_expected": len(expected),
+        "failing_months": len(failures),
+        "failures": failures[:MAX_REPORTED_FAILURES],
+    }
+    if len(failures) > MAX_REPORTED_FAILURES:
+        result["more_failing_months"] = [failure["month"] for failure in failures[MAX_REPORTED_FAILURES:]]
+    if len(records) < len(expected):
+        result["missing_months"] = f"{Month.from_index(int(expected.months[len(records)])).to_string()} to {Month.from_index(int(expected.months[-1])).to_string()}"
+    return result
@@ -0,0 +1,30 @@
+"""
+Money inside the simulator, ledgers and invariant checks is held as integer cents (int64), so sums are exact
+and order-independent and equality checks have no float noise. Pydantic models, JSON, prompts and agent
+output stay in dollars; values are converted here, at that boundary.
+"""
+
+from typing import Union
+import numpy as np
+
+CENTS_PER_DOLLAR = 100
+
+
+def to_cents(dollars: Union[float, np.ndarray, list]) -> Union[int, np.ndarray]:
+    """Round dollars to whole cents: an int for a scalar, an int64 array otherwise."""
+    if isinstance(dollars, (int, float)):
+        return scalar_cents(dollars)
+    cents = np.rint(np.asarray(dollars, dtype=np.float64) * CENTS_PER_DOLLAR).astype(np.int64)
+    return int(cents) if cents.ndim == 0 else cents
+
+
+def scalar_cents(dollars: float) -> int:
+    """`to_cents` for one Python number, without NumPy (round half to even, like np.rint)."""
+    return round(dollars * CENTS_PER_DOLLAR)
+
+
+def to_dollars(cents: Union[int, np.ndarray]) -> Union[float, np.ndarray]:
+    """Cents back to dollars: the nearest float to the exact amount, e.g. 123456 -> 1234.56."""
+    if isinstance(cents, np.ndarray):
+        return cents / CENTS_PER_DOLLAR
+    return int(cents) / CENTS_PER_DOLLAR
@@ -1,10 +1,12 @@
 from workbench.task_types import TaskResult, ErrorCategory
+from workbench.scoring import ledger_accuracy
 
 def calculate_prompt_score(result: TaskResult) -> dict:
     """Calculate score for direct prompt tasks (limited scoring without expected results)."""
     points_earned = 0
     points_possible = 0
     breakdown = {}
+    accuracy = {}
     
     # Scenario Generation (20 pts - always applies)
     scenario_possible = 20
@@ -26,6 +28,7 @@ def calculate_prompt_score(result: TaskResult) -> dict:
         if result.draft_ledger_correct:
             ledger_earned = 15  # Ledger matches simulator
         breakdown["mathematical_precision"] = {"earned": ledger_earned, "possible": ledger_possible}
+        accuracy["draft"] = ledger_accuracy(result.draft_ledger_correct, result.draft_ledger_diff)
         points_earned += ledger_earned
         points_possible += ledger_possible
     
@@ -47,7 +50,8 @@ def calculate_prompt_score(result: TaskResult) -> dict:
         "points_earned": points_earned,
         "points_possible": points_possible,
         "percentage": round(percentage, 1),
-        "breakdown": breakdown
+        "breakdown": breakdown,
+        "ledger_accuracy": accuracy
     }
 
 def update_prompt_result_with_score(result: TaskResult) -> TaskResult:
@@ -0,0 +1,169 @@
+"""
+Reference repairs: the smallest change of each approved repair type that makes an infeasible scenario feasible.
+
+Every repair knob moves the cash curve in closed form. Cutting baseline outflows by r raises month t's ending
+cash by r * (t + 1); changing one event's amount by d raises it by d times the number of months the event has
+been active through t; shifting an event changes that count. So the smallest cut or adjustment is a bound read
+off the eval's slack curve (`FeasibilityMargin`), and the shortest shift is the first shift whose closed-form
+curve clears the floor.
+The simulator works in whole cents (workbench.money), so these bounds are exact: amounts are integer ceilings
+in cents and shifts are whole months. Every candidate is still confirmed in one `run_eval_batch` call before it
+is reported.
+"""
+
+from workbench.types import Scenario, Event, InvariantType
+from workbench.eval import EvalResult, run_eval, run_eval_batch
+from workbench.money import to_cents, to_dollars
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
+import numpy as np
+
+REPAIR_TYPES = ["baseline_reduction", "event_amount_adjustment", "event_timing_shift"]
+CENT = 0.01
+
+
+class ReferenceRepair(BaseModel):
+    type: str  # one of REPAIR_TYPES
+    # baseline_reduction: added to base outflows each month; event_amount_adjustment: added to the event's amount;
+    # event_timing_shift: months the event moves (negative = earlier)
+    change: float
+    event_index: Optional[int] = None  # position in scenario.events
+    event_label: Optional[str] = None
+    scenario: Scenario
+
+    def summary(self) -> dict:
+        """The repair without its scenario, for results and traces."""
+        return self.model_dump(exclude={"scenario"})
+
+
+def find_reference_repairs(scenario: Scenario, eval_result: Optional[EvalResult] = None) -> List[ReferenceRepair]:
+    """
+    The smallest baseline_reduction, smallest single event_amount_adjustment and shortest single event_timing_shift
+    that make `scenario` feasible, in REPAIR_TYPES order. Types that cannot repair the scenario are left out; a
+    feasible scenario, or one failing an invariant other than the liquidity floor, gets none.
+    """
+    if eval_result is None:
+        eval_result = run_eval(scenario)
+    if eval_result.verdict == "feasible" or any(v.invariant != InvariantType.LIQUIDITY_FLOOR for v in eval_result.violations):
+        return []
+
+    # Cash relative to the floor, so the target below is always "slack >= 0"
+    slack = to_cents(eval_result.margin.slack)
+    horizon = len(slack)
+    deficit = np.maximum(-slack, 0)
+    short = deficit > 0
+
+    # Candidates with their size per type (cents or months); the smallest one the simulator confirms wins
+    candidates: List[Tuple[ReferenceRepair, int]] = []
+    candidates += _baseline_candidates(scenario, eval_result.margin.required_baseline_cut)
+    for index, event in enumerate(scenario.events):
+        window = _event_window(scenario, event, horizon)
+        candidates += _amount_candidates(scenario, index, event, window, deficit, short)
+        candidates += _shift_candidates(scenario, index, event, window, slack)
+    if not candidates:
+        return []
+
+    summaries = run_eval_batch([repair.scenario for repair, _ in candidates])
+    best = {}
+    for (repair, size), summary in zip(candidates, summaries):
+        if summary.verdict == "feasible" and (repair.type not in best or size < best[repair.type][1]):
+            best[repair.type] = (repair, size)
+    return [best[repair_type][0] for repair_type in REPAIR_TYPES if repair_type in best]
+
+
+def repair_size(original: Scenario, repaired: Scenario, repair_type: str) -> Optional[float]:
+    """
+    How big a repair is, on the same scale as `ReferenceRepair.change`: dollars per month moved off base outflows,
+    dollars added to the adjusted event, or months an event moved. None if the edit is not of that type.
+    """
+    if repair_type == "baseline_reduction":
+        return to_dollars(to_cents(repaired.base_monthly.outflows) - to_cents(original.base_monthly.outflows))
+    if len(original.events) != len(repaired.events):
+        return None
+    pairs = list(zip(original.events, repaired.events))
+    if repair_type == "event_amount_adjustment":
+        changed = [to_dollars(to_cents(new.amount) - to_cents(old.amount)) for old, new in pairs if new.amount != old.amount]
+    elif repair_type == "event_timing_shift":
+        changed = [new.start_month._index - old.start_month._index for old, new in pairs if new.start_month != old.start_month]
+    else:
+        return None
+    return abs(changed[0]) if len(changed) == 1 else None
+
+
+def _active_counts(starts: np.ndarray, ends: np.ndarray, horizon: int) -> np.ndarray:
+    """(windows, months): how many months each relative [start, end) window has been active through each month."""
+    through = np.arange(1, horizon + 1, dtype=np.int64)[None, :]
+    return np.maximum(np.minimum(through, ends[:, None]) - starts[:, None], 0)
+
+
+def _event_window(scenario: Scenario, event: Event, horizon: int) -> Tuple[int, int]:
+    start = event.start_month._index - scenario.start_month._index
+    end = horizon if event.duration_months is None else start + event.duration_months
+    return start, end
+
+
+def _baseline_candidates(scenario: Scenario, required_cut: float) -> List[Tuple[ReferenceRepair, int]]:
+    # The closed-form cut comes with the eval (FeasibilityMargin.required_baseline_cut), already in whole cents
+    cut = to_cents(required_cut)
+    outflows = to_cents(scenario.base_monthly.outflows) + cut
+    if outflows > 0:
+        return []  # outflows cannot turn into income
+    base_monthly = scenario.base_monthly.model_copy(update={"outflows": to_dollars(outflows)})
+    repaired = scenario.model_copy(update={"base_monthly": base_monthly})
+    return [(ReferenceRepair(type="baseline_reduction", change=to_dollars(cut), scenario=repaired), cut)]
+
+
+def _amount_candidates(scenario: Scenario, index: int, event: Event, window: Tuple[int, int], deficit: np.ndarray, short: np.ndarray) -> List[Tuple[ReferenceRepair, int]]:
+    # Only shrinking an expense helps; raising income would be a new income assumption, not an adjustment
+    if event.amount >= 0:
+        return []
+    counts = _active_counts(np.array([window[0]]), np.array([window[1]]), len(deficit))[0]
+    if (counts[short] == 0).any():
+        return []  # some short month comes before the event
+    change = int((-(-deficit[short] // counts[short])).max())
+    amount = to_cents(event.amount) + change
+    if amount > 0:
+        return []  # the event would change sign
+    return [(_with_event(scenario, index, "event_amount_adjustment", to_dollars(change), amount=to_dollars(amount)), change)]
+
+
+def _shift_candidates(scenario: Scenario, index: int, event: Event, window: Tuple[int, int], slack: np.ndarray) -> List[Tuple[ReferenceRepair, int]]:
+    # Expenses can only help by moving later, income by moving earlier (not before the scenario starts). Moving an
+    # expense to the month after the horizon already drops it from every month, so later shifts are never shorter.
+    horizon = len(slack)
+    start, end = window
+    amount = to_cents(event.amount)
+    if amount == 0:
+        return []
+    direction = -1 if amount < 0 else 1
+    longest = horizon - start if direction < 0 else start
+    # Moving an event k months shifts any month's cash by at most |amount| * k
+    shortest = max(1, -(-int(np.maximum(-slack, 0).max()) // abs(amount)))
+    if longest < shortest:
+        return []
+
+    shifts = np.arange(shortest, longest + 1, dtype=np.int64)
+    moved = -direction * shifts
+    new_ends = np.full(len(shifts), horizon) if event.duration_months is None else end + moved
+    counts = _active_counts(start + moved, new_ends, horizon)
+    base_counts = _active_counts(np.array([start]), np.array([end]), horizon)
+    shifted = slack[None, :] + amount * (counts - base_counts)
+    clears = np.flatnonzero((shifted >= 0).all(axis=1))
+    if not len(clears):
+        return []
+
+    months = int(-direction * shifts[clears[0]])
+    return [(_with_event(scenario, index, "event_timing_shift", months, start_month=event.start_month.add(months)), abs(months))]
+
+
+def _with_event(scenario: Scenario, index: int, repair_type: str, change: float, **update) -> ReferenceRepair:
+    event = scenario.events[index]
+    events = list(scenario.events)
+    events[index] = event.model_copy(update=update)
+    return ReferenceRepair(
+        type=repair_type,
+        change=change,
+        event_index=index,
+        event_label=event.label,
+        scenario=scenario.model_copy(update={"events": events}),
+    )
@@ -0,0 +1,68 @@
+"""
+Append-only NDJSON stream of TaskResults, written as each task completes.
+
+Every line is flushed as soon as it is written, so a crashed process loses at most the task that
+was running. The fsync policy decides how often the OS is forced to put the data on disk:
+- always: fsync after every result
+- interval: fsync at most every FSYNC_INTERVAL_SECONDS (and on close)
+- never: leave it to the OS
+"""
+
+from workbench.task_types import TaskResult
+from pathlib import Path
+from typing import Iterator, Optional
+import os
+import threading
+import time
+
+FSYNC_POLICIES = ["always", "interval", "never"]
+FSYNC_INTERVAL_SECONDS = 5.0
+
+
+class ResultSink:
+    def __init__(self, path: str, fsync: str = "interval"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}. Expected one of {', '.join(FSYNC_POLICIES)}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.count = 0
+        self._file = open(self.path, "a")
+        self._lock = threading.Lock()
+        self._last_sync = time.monotonic()
+
+    def write(self, result: TaskResult):
+        line = result.model_dump_json() + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+            now = time.monotonic()
+            if self.fsync == "always" or (self.fsync == "interval" and now - self._last_sync >= FSYNC_INTERVAL_SECONDS):
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_results(path: str) -> Iterator[TaskResult]:
+    """Stream TaskResults back from an NDJSON file. A truncated last line (from a crash mid-write) is skipped."""
+    with open(path, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            if line.strip():
+                yield TaskResult.model_validate_json(line)
@@ -1,16 +1,20 @@
 from workbench.task_types import Task, TaskResult
 from workbench.types import Scenario, MonthlyRecord
+from workbench.ledger_diff import LedgerDiff, diff_ledgers
 from workbench.models.agents import get_agent
-from workbench.eval import run_eval
+from workbench.eval import run_eval, run_eval_incremental
+from workbench.repair_search import find_reference_repairs, repair_size
 from workbench.scoring import update_result_with_score
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import json
 from workbench.task_types import ErrorCategory
 from workbench.trace_types import Trace, ExecutionStep
+from workbench.trace_store import get_trace_store
 from datetime import datetime
 import time
 import uuid
 import os
+import asyncio
 
 
 def strip_markdown_json(text: str) -> str:
@@ -51,7 +55,62 @@ def strip_markdown_json(text: str) -> str:
     return text
 
 
-def run_task(task_path: str, model: str = "claude", session_id: str = None, prompt_dir: str = "prompts/v2", model_name: str = None) -> TaskResult:
+def run_task(task_path: str, model: str = "claude", session_id: str = None, prompt_dir: str = "prompts/v2", model_name: str = None, margin_hints: bool = False) -> TaskResult:
+    steps = _task_steps(task_path, model, session_id, prompt_dir, model_name, margin_hints)
+    try:
+        agent_call = next(steps)
+        while True:
+            agent, method, args = agent_call
+            try:
+                output = getattr(agent, method)(*args)
+            except Exception as e:
+                agent_call = steps.throw(e)
+            else:
+                agent_call = steps.send(output)
+    except StopIteration as done:
+        return done.value
+
+
+async def arun_task(task_path: str, model: str = "claude", session_id: str = None, prompt_dir: str = "prompts/v2", model_name: str = None, limiter: Optional[asyncio.Semaphore] = None, margin_hints: bool = False) -> TaskResult:
+    """
+    Async `run_task`: agent calls go through the agent's `adraft`/`arepair`, so many tasks can share one event loop.
+    `limiter` bounds how many agent calls are in flight across all tasks sharing it.
+    """
+    steps = _task_steps(task_path, model, session_id, prompt_dir, model_name, margin_hints)
+    try:
+        agent_call = next(steps)
+        while True:
+            agent, method, args = agent_call
+            # Agents expose async twins of draft/repair named adraft/arepair
+            async_method = getattr(agent, "a" + method)
+            try:
+                if limiter is None:
+                    output = await async_method(*args)
+                else:
+                    async with limiter:
+                        output = await async_method(*args)
+            except Exception as e:
+                agent_call = steps.throw(e)
+            else:
+                agent_call = steps.send(output)
+    except StopIteration as done:
+        return done.value
+
+
+async def arun_tasks(task_paths: List[str], model: str = "claude", session_id: str = None, prompt_dir: str = "prompts/v2", model_name: str = None, max_in_flight: int = 8, margin_hints: bool = False) -> List[TaskResult]:
+    """Run many tasks on the current event loop with at most `max_in_flight` agent calls outstanding. Results follow `task_paths` order."""
+    limiter = asyncio.Semaphore(max_in_flight)
+    return await asyncio.gather(*[
+        arun_task(task_path, model, session_id, prompt_dir, model_name, limiter, margin_hints) for task_path in task_paths
+    ])
+
+
+def _task_steps(task_path: str, model: str, session_id: str, prompt_dir: str, model_name: str, margin_hints: bool = False):
+    """
+    The task flow as a generator shared by `run_task` and `arun_task`. It yields (agent, method name, args) for each agent
+    call and is sent the call's output (or thrown its exception); it returns the final TaskResult.
+    The repair prompt only includes the feasibility margin when `margin_hints` is set.
+    """
     task = Task.model_validate_json(open(task_path).read())
     if session_id is None:
           session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
@@ -72,7 +131,9 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
     try:
         start_time = time.time()
         max_tool_calls = task.limits.max_tool_calls
-        draft_result = agent.draft(task.prompt, task.mode, task.generate_ledger, prompt_dir, model_name, max_tool_calls)
+        draft_result = yield agent, "draft", (task.prompt, task.mode, task.generate_ledger, prompt_dir, model_name, max_tool_calls)
+        # Identify the prompt text behind this result (agents without system prompts have none)
+        trace.prompt_hash = getattr(agent, "prompt_hash", None)
         duration_ms = int((time.time()-start_time)*1000)
 
         # Handle tuple return for tool agents vs string return for others
@@ -97,7 +158,9 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
             input=task.prompt,
             output=draft_data,
             duration_ms=duration_ms,
-            tool_usage=tool_details if 'tool_details' in locals() else None
+            tool_usage=tool_details if 'tool_details' in locals() else None,
+            token_usage=getattr(agent, "token_usage", None) or None,
+            scheduling=getattr(agent, "scheduling", None) or None
         ))
         
         # Parse draft JSON
@@ -151,7 +214,8 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
     
     # Validate draft ledger immediately while we have eval result
     if draft_ledger_json:
-        result.draft_ledger_correct = validate_ledger(draft_ledger, eval_result.ledger, task.expected.ledger if task.expected else None)
+        result.draft_ledger_diff = ledger_diff(draft_ledger, eval_result.ledger, task.expected.ledger if task.expected else None)
+        result.draft_ledger_correct = bool(draft_ledger) and result.draft_ledger_diff.matches
     
     # Set violation correctness if we have expected results
     if task.expected and task.expected.initial_verdict == "infeasible":
@@ -164,9 +228,28 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
     eval_repair_result = eval_result
 
     if eval_result.verdict == "infeasible": #begin repair loop
+        # Ground-truth minimal repairs, to measure the agent's repair against
+        # The reference only feeds repair_minimality, so a search failure is recorded in the trace, not raised
+        start_time = time.time()
+        try:
+            reference_repairs = find_reference_repairs(scenario, eval_result)
+            result.reference_repairs = [repair.summary() for repair in reference_repairs]
+            search_output = result.reference_repairs
+        except Exception as e:
+            reference_repairs = []
+            search_output = {"error": f"{type(e).__name__}: {e}"}
+        trace.execution_steps.append(ExecutionStep(
+            step="repair_search",
+            input=None,
+            output=search_output,
+            duration_ms=int((time.time()-start_time)*1000)
+        ))
+
         start_time = time.time()
         max_tool_calls = task.limits.max_tool_calls
-        repair_result = agent.repair(scenario.model_dump_json(), eval_result.model_dump(mode='json'), task.generate_ledger, prompt_dir, model_name, max_tool_calls)
+        # The margin is extra guidance: left out unless asked for, so repair results stay comparable across runs
+        repair_eval = eval_result.model_dump(mode='json', exclude=None if margin_hints else {"margin"})
+        repair_result = yield agent, "repair", (scenario.model_dump_json(), repair_eval, task.generate_ledger, prompt_dir, model_name, max_tool_calls)
         duration_ms = int((time.time()-start_time)*1000)
         
         # Handle tuple return for tool agents vs string return for others
@@ -191,7 +274,9 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
             input=scenario.model_dump_json(),
             output=repair_data,
             duration_ms=duration_ms,
-            tool_usage=repair_tool_details if 'repair_tool_details' in locals() else None
+            tool_usage=repair_tool_details if 'repair_tool_details' in locals() else None,
+            token_usage=getattr(agent, "token_usage", None) or None,
+            scheduling=getattr(agent, "scheduling", None) or None
         ))
         # Parse repair JSON
         try:
@@ -218,6 +303,7 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
         elif not validate_repair_claim(json.dumps(draft_scenario_json), json.dumps(repair_scenario_json), result.repair_strategy):
             result.repair_label_accurate = False
 
+        draft_scenario = scenario
         try:
             scenario = Scenario.model_validate(repair_scenario_json)
             if repair_ledger_json:
@@ -233,7 +319,8 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
         result.repair_attempted = True
 
         start_time = time.time()
-        eval_repair_result = run_eval(scenario)
+        # Repairs usually touch a late event, so only re-simulate from the first month the edit can affect
+        eval_repair_result = run_eval_incremental(scenario, draft_scenario, eval_result)
         duration_ms = int((time.time()-start_time)*1000)
 
         trace.execution_steps.append(ExecutionStep(
@@ -246,10 +333,16 @@ def run_task(task_path: str, model: str = "claude", session_id: str = None, prom
         # Set repair results immediately
         result.final_verdict = eval_repair_result.verdict
         result.repair_made_feasible = eval_repair_result.verdict == "feasible"
+        reference = next((repair for repair in reference_repairs if repair.type == result.repair_strategy), None)
+        if result.repair_made_feasible and result.repair_label_accurate and reference is not None:
+            size = repair_size(draft_scenario, scenario, result.repair_strategy)
+            if size:
+                result.repair_minimality = abs(reference.change) / size
         
         # Validate repair ledger immediately while we have repair eval result
         if repair_ledger_json:
-            result.repair_ledger_correct = validate_ledger(repair_ledger, eval_repair_result.ledger, task.expected.ledger if task.expected else None)
+            result.repair_ledger_diff = ledger_diff(repair_ledger, eval_repair_result.ledger, task.expected.ledger if task.expected else None)
+            result.repair_ledger_correct = bool(repair_ledger) and result.repair_ledger_diff.matches
     
     else:
         # No repair attempted, final state same as initial
@@ -303,10 +396,9 @@ def init_trace(task_id: str, task_name: str, model: str, prompt: str, session_id
     )
 
 def write_trace(trace: Trace):
-    os.makedirs(f"traces/{trace.session_id}", exist_ok=True)
+    # Appended to the compressed trace store under traces/ (see workbench.trace_store)
     try:
-        with open(f"traces/{trace.session_id}/{trace.task_id}_{trace.run_id}.json", "w") as f: 
-            f.write(trace.model_dump_json(indent=2))
+        get_trace_store("traces").append(trace)
     except Exception as e:
         print(f"🐛 DEBUG: Error serializing trace for task {trace.task_id}: {e}")
         
@@ -337,20 +429,24 @@ def write_trace(trace: Trace):
         raise e
     return
     
-def validate_ledger(agent_ledger: List[MonthlyRecord], ground_truth_ledger: List[MonthlyRecord], expected_ledger: Optional[List[MonthlyRecord]] = None) -> bool:
+def validate_ledger(agent_ledger: List[MonthlyRecord], ground_truth_ledger: Sequence[MonthlyRecord], expected_ledger: Optional[List[MonthlyRecord]] = None) -> bool:
     """
     Validate ledger accuracy in two ways:
     1. If expected_ledger provided: Compare against expected
-    2. Otherwise: Compare against ground_truth_ledger from simulator
+    2. Otherwise: Compare against ground_truth_ledger from simulator (a column-wise Ledger from run_eval)
     3. Return True only if ledger matches the appropriate baseline
     """
     if not agent_ledger:
         return False
-    
+    return ledger_diff(agent_ledger, ground_truth_ledger, expected_ledger).matches
+
+
+def ledger_diff(agent_ledger: List[MonthlyRecord], ground_truth_ledger: Sequence[MonthlyRecord], expected_ledger: Optional[List[MonthlyRecord]] = None) -> LedgerDiff:
+    """Where the agent's ledger departs from the expected ledger if provided, otherwise from the simulator's."""
     # Prefer expected ledger if provided, otherwise use ground truth
     target_ledger = expected_ledger if expected_ledger is not None else ground_truth_ledger
-    
-    return agent_ledger == target_ledger
+    # Compared at cent precision, so float noise in the agent's arithmetic is not a mismatch
+    return diff_ledgers(agent_ledger, target_ledger)
 
 def validate_repair_claim(original_json: str, repaired_json: str, claimed_type: str) -> bool:
 
@@ -363,7 +459,7 @@ def validate_repair_claim(original_json: str, repaired_json: str, claimed_type:
           return False
 
       # Check all top-level fields except base_monthly
-      for field in ["id", "title", "start_month", "horizon_months", "initial_state", "events"]:
+      for field in ["id", "title", "start_month", "horizon_months", "initial_state", "events", "constraints"]:
           if original.get(field) != repaired.get(field):
               return False
 
@@ -374,6 +470,10 @@ def validate_repair_claim(original_json: str, repaired_json: str, claimed_type:
       return True
     
     elif claimed_type == "event_amount_adjustment":
+      # Constraints (floor, targets) are not a repair knob
+      if original.get("constraints") != repaired.get("constraints"):
+          return False
+
       # First, check same number of events
       if len(original["events"]) != len(repaired["events"]):
           return False
@@ -409,7 +509,7 @@ def validate_repair_claim(original_json: str, repaired_json: str, claimed_type:
           return False
       
       # Check all top-level fields except events
-      for field in ["id", "title", "start_month", "horizon_months", "initial_state"]:
+      for field in ["id", "title", "start_month", "horizon_months", "initial_state", "constraints"]:
           if original.get(field) != repaired.get(field):
               return False
       
@@ -1,10 +1,26 @@
 from workbench.task_types import Task, TaskResult, ErrorCategory
+from workbench.ledger_diff import LedgerDiff
+from typing import Optional
+
+
+def ledger_accuracy(correct: Optional[bool], diff: Optional[LedgerDiff]) -> Optional[float]:
+    """
+    Share of a ledger's months the agent got right (1.0 for a matching ledger), or None without a ledger diff.
+    Reported beside the score rather than in it, so mathematical_precision stays all-or-nothing and comparable.
+    """
+    if correct is True:
+        return 1.0
+    if diff is None:
+        return None
+    return diff.accuracy
+
 
 def calculate_task_score(result: TaskResult, task: Task) -> dict:
     """Calculate comprehensive score for a task result with variable point totals."""
     points_earned = 0
     points_possible = 0
     breakdown = {}
+    accuracy = {}  # Months right per ledger: a metric of its own, not part of the points
     
     # Scenario Generation (20 pts - always applies)
     scenario_possible = 20
@@ -69,6 +85,8 @@ def calculate_task_score(result: TaskResult, task: Task) -> dict:
         if result.repair_ledger_correct is True:
             ledger_earned += 5   # Repair ledger accuracy (if applicable)
         breakdown["mathematical_precision"] = {"earned": ledger_earned, "possible": ledger_possible}
+        accuracy["draft"] = ledger_accuracy(result.draft_ledger_correct, result.draft_ledger_diff)
+        accuracy["repair"] = ledger_accuracy(result.repair_ledger_correct, result.repair_ledger_diff)
         points_earned += ledger_earned
         points_possible += ledger_possible
     
@@ -79,7 +97,8 @@ def calculate_task_score(result: TaskResult, task: Task) -> dict:
         "points_earned": points_earned,
         "points_possible": points_possible,
         "percentage": round(percentage, 1),
-        "breakdown": breakdown
+        "breakdown": breakdown,
+        "ledger_accuracy": accuracy
     }
 
 def update_result_with_score(result: TaskResult, task: Task) -> TaskResult:
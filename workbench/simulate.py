@@ -1,11 +1,21 @@
-from workbench.types import Scenario, MonthlyRecord
+from workbench.types import Scenario, MonthlyRecord, Event
 from workbench.month import Month
-from typing import List
+from workbench.ledger import Ledger, event_key
+from workbench.money import to_cents, to_dollars, scalar_cents
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+import numpy as np
 
 
 def simulate(scenario: Scenario) -> List[MonthlyRecord]:
+    """Reference loop engine. Money is summed in integer cents and reported in dollars."""
     monthly_records = []
-    cash = scenario.initial_state.starting_cash
+    # Every amount goes to cents once; the month loop is plain int arithmetic
+    cash = scalar_cents(scenario.initial_state.starting_cash)
+    base_income = scalar_cents(scenario.base_monthly.takehome_salary)
+    base_outflows = scalar_cents(scenario.base_monthly.outflows)
+    amounts = {id(event): scalar_cents(event.amount) for event in scenario.events}
 
     for curr_month in Month.iterate(scenario.start_month, scenario.horizon_months):
         active_ongoing_events = [
@@ -20,14 +30,261 @@ def simulate(scenario: Scenario) -> List[MonthlyRecord]:
 
         active_events = active_ongoing_events + active_finite_events
         
-        base_income = scenario.base_monthly.takehome_salary
-        base_outflows = scenario.base_monthly.outflows
-        total_inflows = base_income + sum([event.amount for event in active_events if event.amount>0])
-        total_outflows = base_outflows + sum([event.amount for event in active_events if event.amount<0])
+        total_inflows = base_income + sum([amounts[id(event)] for event in active_events if event.amount>0])
+        total_outflows = base_outflows + sum([amounts[id(event)] for event in active_events if event.amount<0])
 
         ending_cash = cash + total_inflows + total_outflows
         
-        monthly_records.append(MonthlyRecord(month=curr_month, starting_cash=cash, base_takehome_salary=base_income, base_outflows=base_outflows, total_inflows=total_inflows, total_outflows=total_outflows, events_applied=active_events, ending_cash=ending_cash))
+        monthly_records.append(MonthlyRecord(month=curr_month, starting_cash=to_dollars(cash), base_takehome_salary=to_dollars(base_income), base_outflows=to_dollars(base_outflows), total_inflows=to_dollars(total_inflows), total_outflows=to_dollars(total_outflows), events_applied=active_events, ending_cash=to_dollars(ending_cash)))
         
         cash = ending_cash
-    return monthly_records
\ No newline at end of file
+    return monthly_records
+
+
+def order_events(events: List[Event]) -> List[Event]:
+    """Order events the way `simulate` reports them in `events_applied`."""
+    ongoing = [event for event in events if event.duration_months is None]
+    finite = [event for event in events if event.duration_months is not None]
+    return ongoing + finite
+
+
+def activation_matrix(scenario: Scenario, events: List[Event]) -> np.ndarray:
+    """Build the (months, events) activation matrix from each event's [start, start + duration) window."""
+    horizon = max(scenario.horizon_months, 0)
+    base = scenario.start_month._index
+    offsets = np.arange(horizon, dtype=np.int64)[:, None]
+
+    starts = np.array([event.start_month._index - base for event in events], dtype=np.int64)
+    ends = np.array([
+        horizon if event.duration_months is None else event.start_month._index - base + event.duration_months
+        for event in events
+    ], dtype=np.int64)
+
+    return (offsets >= starts) & (offsets < ends)
+
+
+def sum_event_flows(active: np.ndarray, amounts: np.ndarray) -> tuple:
+    """Sum positive and negative event amounts (int64 cents) per month. Integer sums are exact in any order."""
+    inflows = np.where(active & (amounts > 0), amounts, 0).sum(axis=1, dtype=np.int64)
+    outflows = np.where(active & (amounts < 0), amounts, 0).sum(axis=1, dtype=np.int64)
+    return inflows, outflows
+
+
+def cash_curve(starting_cash: int, total_inflows: np.ndarray, total_outflows: np.ndarray) -> np.ndarray:
+    """Running ending-cash curve in cents: starting cash plus the cumulative net flow."""
+    return starting_cash + np.cumsum(total_inflows + total_outflows, dtype=np.int64)
+
+
+def event_amounts(events: List[Event]) -> np.ndarray:
+    return to_cents([event.amount for event in events]) if events else np.empty(0, dtype=np.int64)
+
+
+def simulate_ledger(scenario: Scenario) -> Ledger:
+    """Vectorized simulation: compute every month's flows and the cash curve with NumPy in one pass."""
+    events = order_events(scenario.events)
+    active = activation_matrix(scenario, events)
+    amounts = event_amounts(events)
+
+    base_income = to_cents(scenario.base_monthly.takehome_salary)
+    base_outflows = to_cents(scenario.base_monthly.outflows)
+    event_inflows, event_outflows = sum_event_flows(active, amounts)
+    total_inflows = base_income + event_inflows
+    total_outflows = base_outflows + event_outflows
+
+    starting = to_cents(scenario.initial_state.starting_cash)
+    ending_cash = cash_curve(starting, total_inflows, total_outflows)
+    starting_cash = np.concatenate(([starting], ending_cash[:-1])) if len(ending_cash) else np.empty(0, dtype=np.int64)
+
+    return Ledger(
+        months=scenario.start_month._index + np.arange(len(ending_cash)),
+        starting_cash_cents=starting_cash,
+        total_inflows_cents=total_inflows,
+        total_outflows_cents=total_outflows,
+        ending_cash_cents=ending_cash,
+        base_takehome_salary_cents=base_income,
+        base_outflows_cents=base_outflows,
+        events=events,
+        active=active,
+    )
+
+
+def simulate_vectorized(scenario: Scenario) -> List[MonthlyRecord]:
+    """Drop-in replacement for `simulate` backed by `simulate_ledger`."""
+    return simulate_ledger(scenario).to_records()
+
+
+def simulate_loop_ledger(scenario: Scenario) -> Ledger:
+    """Run the reference loop and pack its records into a `Ledger` with the vectorized engine's column order."""
+    return Ledger.from_records(simulate(scenario), order_events(scenario.events))
+
+
+def first_affected_month(previous: Scenario, scenario: Scenario) -> int:
+    """
+    Offset from the scenario start of the earliest month whose ledger row can differ between two scenarios.
+    Returns the new horizon when no simulated month changes.
+    """
+    horizon = max(scenario.horizon_months, 0)
+    if (
+        previous.start_month != scenario.start_month
+        or previous.initial_state != scenario.initial_state
+        or previous.base_monthly != scenario.base_monthly
+    ):
+        return 0
+
+    affected = horizon
+    if previous.horizon_months != scenario.horizon_months:
+        affected = min(affected, max(min(previous.horizon_months, scenario.horizon_months), 0))
+
+    old_keys = [event_key(event) for event in order_events(previous.events)]
+    new_keys = [event_key(event) for event in order_events(scenario.events)]
+    removed = Counter(old_keys) - Counter(new_keys)
+    added = Counter(new_keys) - Counter(old_keys)
+
+    # Events present in both must keep their relative order, or events_applied changes wherever they overlap
+    kept_old = Counter(old_keys) - removed
+    kept_new = Counter(new_keys) - added
+    if _ordered_subset(old_keys, kept_old) != _ordered_subset(new_keys, kept_new):
+        return 0
+
+    base = scenario.start_month._index
+    for label, start_index, amount, duration in list(removed) + list(added):
+        if duration is None or duration > 0:
+            affected = min(affected, max(start_index - base, 0))
+    return affected
+
+
+def _ordered_subset(keys: List[tuple], keep: Counter) -> List[tuple]:
+    remaining = Counter(keep)
+    subset = []
+    for key in keys:
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            subset.append(key)
+    return subset
+
+
+def resimulate(previous: Ledger, scenario: Scenario, from_month: int) -> Ledger:
+    """
+    Simulate `scenario` reusing `previous` (the ledger of an edited-from scenario) for the first `from_month`
+    months, as returned by `first_affected_month`. Only the suffix is recomputed; the result is identical to
+    `simulate_ledger(scenario)`.
+    """
+    horizon = max(scenario.horizon_months, 0)
+    k = min(from_month, horizon, len(previous))
+    events = order_events(scenario.events)
+    active = activation_matrix(scenario, events)
+    amounts = event_amounts(events)
+
+    event_inflows, event_outflows = sum_event_flows(active[k:], amounts)
+    total_inflows = to_cents(scenario.base_monthly.takehome_salary) + event_inflows
+    total_outflows = to_cents(scenario.base_monthly.outflows) + event_outflows
+
+    carried_cash = int(previous.ending_cash_cents[k-1]) if k > 0 else to_cents(scenario.initial_state.starting_cash)
+    ending_suffix = cash_curve(carried_cash, total_inflows, total_outflows)
+    starting_suffix = np.concatenate(([carried_cash], ending_suffix[:-1])) if len(ending_suffix) else np.empty(0, dtype=np.int64)
+
+    return Ledger(
+        months=scenario.start_month._index + np.arange(horizon),
+        starting_cash_cents=np.concatenate((previous.starting_cash_cents[:k], starting_suffix)),
+        total_inflows_cents=np.concatenate((previous.total_inflows_cents[:k], total_inflows)),
+        total_outflows_cents=np.concatenate((previous.total_outflows_cents[:k], total_outflows)),
+        ending_cash_cents=np.concatenate((previous.ending_cash_cents[:k], ending_suffix)),
+        base_takehome_salary_cents=to_cents(scenario.base_monthly.takehome_salary),
+        base_outflows_cents=to_cents(scenario.base_monthly.outflows),
+        events=events,
+        active=active,
+    )
+
+
+@dataclass
+class BatchSimulation:
+    """Simulation output for many scenarios, padded to the longest horizon. Months past a scenario's horizon are masked out."""
+    scenarios: List[Scenario]
+    horizons: np.ndarray  # (scenarios,)
+    month_mask: np.ndarray  # (scenarios, months) True where the month is inside the scenario's horizon
+    total_inflows_cents: np.ndarray  # (scenarios, months) int64
+    total_outflows_cents: np.ndarray
+    ending_cash_cents: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.scenarios)
+
+    def ledger(self, i: int) -> Ledger:
+        """Unpad one scenario's columns into a full ledger."""
+        scenario = self.scenarios[i]
+        horizon = int(self.horizons[i])
+        events = order_events(scenario.events)
+        ending_cash = self.ending_cash_cents[i, :horizon]
+        starting = to_cents(scenario.initial_state.starting_cash)
+        return Ledger(
+            months=scenario.start_month._index + np.arange(horizon),
+            starting_cash_cents=np.concatenate(([starting], ending_cash[:-1])) if horizon else np.empty(0, dtype=np.int64),
+            total_inflows_cents=self.total_inflows_cents[i, :horizon],
+            total_outflows_cents=self.total_outflows_cents[i, :horizon],
+            ending_cash_cents=ending_cash,
+            base_takehome_salary_cents=to_cents(scenario.base_monthly.takehome_salary),
+            base_outflows_cents=to_cents(scenario.base_monthly.outflows),
+            events=events,
+            active=activation_matrix(scenario, events),
+        )
+
+
+def simulate_batch(scenarios: List[Scenario]) -> BatchSimulation:
+    """Simulate many scenarios at once by packing their events and horizons into padded arrays."""
+    n = len(scenarios)
+    horizons = np.array([max(scenario.horizon_months, 0) for scenario in scenarios], dtype=np.int64)
+    max_horizon = int(horizons.max()) if n else 0
+    ordered = [order_events(scenario.events) for scenario in scenarios]
+    max_events = max((len(events) for events in ordered), default=0)
+
+    # Padded event table: relative [start, end) windows and amounts. Padding slots never activate.
+    starts = np.zeros((n, max_events), dtype=np.int64)
+    ends = np.zeros((n, max_events), dtype=np.int64)
+    amounts = np.zeros((n, max_events), dtype=np.int64)
+    for i, (scenario, events) in enumerate(zip(scenarios, ordered)):
+        base = scenario.start_month._index
+        for j, event in enumerate(events):
+            starts[i, j] = event.start_month._index - base
+            ends[i, j] = horizons[i] if event.duration_months is None else starts[i, j] + event.duration_months
+        amounts[i, :len(events)] = event_amounts(events)
+
+    offsets = np.arange(max_horizon, dtype=np.int64)[None, :]
+    month_mask = offsets < horizons[:, None]
+
+    # Walk the event axis so memory stays at (scenarios, months) instead of (scenarios, months, events)
+    event_inflows = np.zeros((n, max_horizon), dtype=np.int64)
+    event_outflows = np.zeros((n, max_horizon), dtype=np.int64)
+    for j in range(max_events):
+        active = (offsets >= starts[:, j, None]) & (offsets < ends[:, j, None])
+        amount = amounts[:, j, None]
+        event_inflows += np.where(active & (amount > 0), amount, 0)
+        event_outflows += np.where(active & (amount < 0), amount, 0)
+
+    takehome = to_cents([scenario.base_monthly.takehome_salary for scenario in scenarios]).reshape(n, 1)
+    base_outflows = to_cents([scenario.base_monthly.outflows for scenario in scenarios]).reshape(n, 1)
+    total_inflows = np.where(month_mask, takehome + event_inflows, 0)
+    total_outflows = np.where(month_mask, base_outflows + event_outflows, 0)
+
+    starting = to_cents([scenario.initial_state.starting_cash for scenario in scenarios]).reshape(n, 1)
+    ending_cash = starting + np.cumsum(total_inflows + total_outflows, axis=1, dtype=np.int64)
+
+    return BatchSimulation(
+        scenarios=list(scenarios),
+        horizons=horizons,
+        month_mask=month_mask,
+        total_inflows_cents=total_inflows,
+        total_outflows_cents=total_outflows,
+        ending_cash_cents=ending_cash,
+    )
+
+
+SIMULATION_ENGINES: Dict[str, Callable[[Scenario], Ledger]] = {
+    "loop": simulate_loop_ledger,
+    "vectorized": simulate_ledger,
+}
+
+
+def get_simulation_engine(engine: str) -> Callable[[Scenario], Ledger]:
+    if engine not in SIMULATION_ENGINES:
+        raise ValueError(f"Unknown simulation engine: {engine}")
+    return SIMULATION_ENGINES[engine]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 from workbench.types import InvariantType, MonthlyRecord
+from workbench.ledger_diff import LedgerDiff
 from typing import List
 
 class Expected(BaseModel):
@@ -37,7 +38,7 @@ class ErrorCategory(Enum):
     INACCURATE_REPAIR_LABEL = "INACCURATE_REPAIR_LABEL"  # repair label does not match issued repair type
 class TaskResult(BaseModel):
     task_id: str
-    scenario_json: str = None
+    scenario_json: Optional[str] = None
     repair_json: Optional[str] = None
     draft_ledger_json: Optional[str] = None
     repair_ledger_json: Optional[str] = None
@@ -58,12 +59,16 @@ class TaskResult(BaseModel):
     first_violation_month_correct: Optional[bool] = None
     violation_correct: Optional[bool] = None
     draft_ledger_correct: Optional[bool] = None
+    draft_ledger_diff: Optional[LedgerDiff] = None  # where the draft ledger departs from the simulator's (workbench.ledger_diff)
     
     repair_attempted: bool = False
     repair_made_feasible: Optional[bool] = None
     repair_strategy: Optional[str] = None
     repair_ledger_correct: Optional[bool] = None
+    repair_ledger_diff: Optional[LedgerDiff] = None
     repair_label_accurate: Optional[bool] = None
+    reference_repairs: Optional[List[Dict[str, Any]]] = None  # smallest repair of each type (workbench.repair_search)
+    repair_minimality: Optional[float] = None  # reference size / agent's repair size for the claimed type (1.0 = minimal)
 
     #Taxonomy
     error_category: Optional[ErrorCategory] = None
@@ -0,0 +1,200 @@
+"""
+Field-level queries over a traces directory, for analysis without loading whole traces.
+
+A field is a dotted path into the trace JSON; `[*]` maps over a list and `[n]` picks one element, e.g.
+`execution_steps[*].duration_ms` or `final_result.error_category`. Traces are scanned one at a time and only
+the requested fields are kept. Values extracted from the trace store are cached per field under
+`<traces>/column_cache/`, keyed by run_id; the store is append-only, so cached values never go stale and a
+repeat query only decompresses traces added since. Traces still in the per-file layout are always scanned.
+"""
+
+from workbench.trace_store import get_trace_store, TraceIndexEntry
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+import csv
+import hashlib
+import json
+import re
+
+OUTPUT_FORMATS = ["csv", "arrow", "parquet"]
+COLUMN_CACHE_DIR = "column_cache"
+# Columns every row carries, taken from the store index
+KEY_COLUMNS = ["run_id", "session_id", "task_id"]
+
+_TOKEN = re.compile(r"([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def parse_field(field: str) -> List[Union[str, int, None]]:
+    """Split a field path into keys, list indexes and None for `[*]`."""
+    tokens = []
+    position = 0
+    for match in _TOKEN.finditer(field):
+        if field[position:match.start()] not in ("", "."):
+            break
+        key, index = match.groups()
+        tokens.append(key if key is not None else (None if index == "*" else int(index)))
+        position = match.end()
+    if not tokens or position != len(field):
+        raise ValueError(f"Invalid field path: {field}")
+    return tokens
+
+
+def project(record: Any, tokens: List[Union[str, int, None]]) -> Any:
+    """The value at a parsed path, or None where the path does not exist. `[*]` yields a list."""
+    for i, token in enumerate(tokens):
+        if token is None:
+            if not isinstance(record, list):
+                return None
+            return [project(item, tokens[i + 1:]) for item in record]
+        if isinstance(token, int):
+            if not isinstance(record, list) or not -len(record) <= token < len(record):
+                return None
+            record = record[token]
+        else:
+            if not isinstance(record, dict):
+                return None
+            record = record.get(token)
+    return record
+
+
+def matches(session_id: str, task_id: str, session: Optional[str], condition: Optional[str], task: Optional[str]) -> bool:
+    """Filter on session (a comparison session also matches its per-condition sessions), condition id and task id."""
+    if session is not None and session_id != session and not session_id.startswith(session + "_"):
+        return False
+    if condition is not None and session_id != condition and not session_id.endswith("_" + condition):
+        return False
+    return task is None or task_id == task
+
+
+class ColumnCache:
+    """Per-field {run_id: value} maps stored as JSON files, loaded on first use and saved if changed."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._columns: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+
+    def column(self, field: str) -> Dict[str, Any]:
+        if field not in self._columns:
+            path = self._path(field)
+            self._columns[field] = json.loads(path.read_text())["values"] if path.exists() else {}
+        return self._columns[field]
+
+    def put(self, field: str, run_id: str, value: Any):
+        self.column(field)[run_id] = value
+        self._dirty.add(field)
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for field in self._dirty:
+            path = self._path(field)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"field": field, "values": self._columns[field]}))
+            tmp_path.replace(path)
+        self._dirty.clear()
+
+    def _path(self, field: str) -> Path:
+        # Not *.json, so scans of per-file trace directories pass over it
+        return self.directory / f"{hashlib.sha256(field.encode('utf-8')).hexdigest()[:16]}.column"
+
+
+def query_traces(
+    directory: str = "traces",
+    fields: List[str] = None,
+    session: Optional[str] = None,
+    condition: Optional[str] = None,
+    task: Optional[str] = None,
+    use_cache: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one row per matching trace: run_id, session_id, task_id and the requested fields.
+    Filtering uses the store index, so traces that don't match are never read.
+    """
+    fields = fields or []
+    parsed = {field: parse_field(field) for field in fields}
+    store = get_trace_store(directory)
+    cache = ColumnCache(str(Path(directory) / COLUMN_CACHE_DIR)) if use_cache else None
+
+    try:
+        for entry in store.entries():
+            if not matches(entry.session_id, entry.task_id, session, condition, task):
+                continue
+            yield _store_row(store, entry, parsed, cache)
+    finally:
+        if cache is not None:
+            cache.save()
+
+    for path in sorted(Path(directory).glob("*/*.json")):
+        try:
+            record = json.loads(path.read_text())
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if not isinstance(record, dict) or "run_id" not in record:
+            continue
+        if not matches(record.get("session_id", ""), record.get("task_id", ""), session, condition, task):
+            continue
+        row = {column: record.get(column) for column in KEY_COLUMNS}
+        row.update({field: project(record, tokens) for field, tokens in parsed.items()})
+        yield row
+
+
+def _store_row(store, entry: TraceIndexEntry, parsed: dict, cache: Optional[ColumnCache]) -> Dict[str, Any]:
+    row = {"run_id": entry.run_id, "session_id": entry.session_id, "task_id": entry.task_id}
+    missing = [field for field in parsed if cache is None or entry.run_id not in cache.column(field)]
+    if missing:
+        # Only traces with uncached fields are decompressed and parsed
+        record = json.loads(store.read_bytes(entry))
+        for field in missing:
+            value = project(record, parsed[field])
+            row[field] = value
+            if cache is not None:
+                cache.put(field, entry.run_id, value)
+    for field in parsed:
+        if field not in row:
+            row[field] = cache.column(field)[entry.run_id]
+    return {column: row[column] for column in KEY_COLUMNS + list(parsed)}
+
+
+def write_rows(rows: Iterator[Dict[str, Any]], columns: List[str], output, output_format: str = "csv") -> int:
+    """
+    Write rows as CSV (to a path or open text file; streamed) or as an Arrow IPC / Parquet file (needs pyarrow).
+    Lists and dicts are written as JSON text in CSV. Returns the number of rows written.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}. Expected one of {', '.join(OUTPUT_FORMATS)}")
+
+    if output_format == "csv":
+        f = open(output, "w", newline="") if isinstance(output, (str, Path)) else output
+        try:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            count = 0
+            for row in rows:
+                writer.writerow([_csv_value(row[column]) for column in columns])
+                count += 1
+            return count
+        finally:
+            if f is not output:
+                f.close()
+
+    try:
+        import pyarrow
+    except ImportError:
+        raise ValueError(f"{output_format} output needs the pyarrow package")
+    table = pyarrow.Table.from_pylist(list(rows))
+    if output_format == "parquet":
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, str(output))
+    else:
+        import pyarrow.ipc
+        with pyarrow.OSFile(str(output), "wb") as sink, pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table.num_rows
+
+
+def _csv_value(value: Any):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
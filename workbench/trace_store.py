@@ -0,0 +1,284 @@
+"""
+Append-only, compressed trace storage.
+
+Traces are appended as compact JSON records to segment files (`segment-000000.ndjson.zst`, or `.gz` when
+zstandard is not installed) under the traces directory. Each record is its own compressed frame, so a record
+can be read back by seeking to it, and a crash mid-write only loses the record being written. `index.ndjson`
+maps every record's (run_id, task_id, session_id) to its segment, offset and length; segments roll over at
+SEGMENT_BYTES. Appends hold an exclusive `flock` on the index for the whole offset/write/index sequence, so
+several processes (e.g. concurrent `run-comparison` runs) can share one traces directory.
+
+Traces repeat most of their text (field names, prompts, step structure), which a lone frame can't exploit.
+So the first record of each segment is also saved beside it as a raw-content dictionary
+(`<segment>.dict`), and every frame in the segment is compressed against it: zstd frames with a dictionary,
+or zlib (deflate) frames with a preset dictionary for the gzip codec. Segments written without a dictionary
+file hold plain gzip/zstd frames and are read as before.
+
+Trace directories in the old layout (`<session_id>/<task_id>_<run_id>.json`) can still be read with
+`read_traces`, and `migrate_trace_directory` moves them into the store.
+"""
+
+from workbench.trace_types import Trace
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import gzip
+import json
+import os
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional: gzip is used without it
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: appends are then only serialized within a process
+    fcntl = None
+
+SEGMENT_BYTES = 64 * 1024 * 1024
+INDEX_FILE = "index.ndjson"
+CODEC_SUFFIXES = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+DICTIONARY_SUFFIX = ".dict"
+# Deflate only looks back 32 KiB, so a longer preset dictionary would not help the gzip codec
+DICTIONARY_BYTES = 32 * 1024
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+@dataclass
+class TraceIndexEntry:
+    run_id: str
+    task_id: str
+    session_id: str  # comparison runs use <session>_<condition_id>
+    segment: str
+    offset: int
+    length: int
+
+
+class TraceStore:
+    def __init__(self, directory: str = "traces", codec: Optional[str] = None, segment_bytes: int = SEGMENT_BYTES):
+        codec = codec or default_codec()
+        if codec not in CODEC_SUFFIXES:
+            raise ValueError(f"Unknown trace codec: {codec}. Expected one of {', '.join(CODEC_SUFFIXES)}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("zstd trace compression needs the zstandard package")
+        self.directory = Path(directory)
+        self.codec = codec
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._entries: List[TraceIndexEntry] = []
+        self._by_run_id: Dict[str, TraceIndexEntry] = {}
+        self._index_position = 0
+        self._segment: Optional[str] = None  # last segment this store appended to
+        self._dictionaries: Dict[str, Optional[bytes]] = {}
+
+    def append(self, trace: Trace) -> TraceIndexEntry:
+        """Compress and append one trace, then record it in the index."""
+        data = (trace.model_dump_json() + "\n").encode("utf-8")
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Other processes appending to this directory wait here, so segment choice and offsets can't race
+            with _locked_for_append(self.directory / INDEX_FILE) as index:
+                segment, size = self._current_segment()
+                if size == 0 and self._dictionary(segment) is None:
+                    self._write_dictionary(segment, data[:DICTIONARY_BYTES])
+                frame = _compress(self.codec, data, self._dictionary(segment))
+                with open(self.directory / segment, "ab") as f:
+                    offset = f.tell()
+                    f.write(frame)
+                entry = TraceIndexEntry(trace.run_id, trace.task_id, trace.session_id, segment, offset, len(frame))
+                # The index line goes last: a record is only visible once fully written
+                index.write(json.dumps(asdict(entry)) + "\n")
+            return entry
+
+    def entries(self, session_id: Optional[str] = None, task_id: Optional[str] = None) -> List[TraceIndexEntry]:
+        """Index entries, in write order, optionally filtered by session and task."""
+        with self._lock:
+            self._refresh_index()
+            return [
+                entry for entry in self._entries
+                if (session_id is None or entry.session_id == session_id) and (task_id is None or entry.task_id == task_id)
+            ]
+
+    def sessions(self) -> List[str]:
+        return sorted(set(entry.session_id for entry in self.entries()))
+
+    def read(self, entry: TraceIndexEntry) -> Trace:
+        return Trace.model_validate_json(self.read_bytes(entry))
+
+    def read_bytes(self, entry: TraceIndexEntry) -> bytes:
+        """One record's JSON, unparsed (for scans that only need a few fields)."""
+        with open(self.directory / entry.segment, "rb") as f:
+            f.seek(entry.offset)
+            frame = f.read(entry.length)
+        return _decompress(entry.segment, frame, self._dictionary(entry.segment))
+
+    def get(self, run_id: str) -> Optional[Trace]:
+        with self._lock:
+            self._refresh_index()
+            entry = self._by_run_id.get(run_id)
+        return self.read(entry) if entry else None
+
+    def traces(self, session_id: Optional[str] = None, task_id: Optional[str] = None) -> Iterator[Trace]:
+        """Stream traces one at a time, reading each segment sequentially."""
+        for entry in sorted(self.entries(session_id, task_id), key=lambda e: (e.segment, e.offset)):
+            yield self.read(entry)
+
+    def _refresh_index(self):
+        # Pick up entries appended since the last read (by this store or another writer). Caller holds the lock.
+        index_path = self.directory / INDEX_FILE
+        if not index_path.exists() or index_path.stat().st_size < self._index_position:
+            # Missing or replaced (e.g. the directory was deleted): start over
+            self._entries, self._by_run_id, self._index_position = [], {}, 0
+        if not index_path.exists():
+            return
+        with open(index_path, "r") as f:
+            f.seek(self._index_position)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written; read it next time
+                self._index_position += len(line.encode("utf-8"))
+                entry = TraceIndexEntry(**json.loads(line))
+                self._entries.append(entry)
+                self._by_run_id[entry.run_id] = entry
+
+    def _current_segment(self) -> Tuple[str, int]:
+        """The segment to append to and its size. Caller holds the append lock."""
+        if self._segment is None:
+            # Only the first append lists the directory; after that the segment is tracked
+            segments = sorted(self.directory.glob(f"segment-*{CODEC_SUFFIXES[self.codec]}"))
+            self._segment = segments[-1].name if segments else self._segment_name(0)
+        # Follow rollovers made by other processes since this store last appended
+        while (self.directory / self._segment_name(self._segment_number(self._segment) + 1)).exists():
+            self._segment = self._segment_name(self._segment_number(self._segment) + 1)
+        path = self.directory / self._segment
+        size = path.stat().st_size if path.exists() else 0
+        if size >= self.segment_bytes:
+            self._segment, size = self._segment_name(self._segment_number(self._segment) + 1), 0
+        return self._segment, size
+
+    def _segment_name(self, number: int) -> str:
+        return f"segment-{number:06d}{CODEC_SUFFIXES[self.codec]}"
+
+    @staticmethod
+    def _segment_number(segment: str) -> int:
+        return int(segment[len("segment-"):].split(".")[0])
+
+    def _dictionary(self, segment: str) -> Optional[bytes]:
+        # Written before the segment's first record and never changed, so safe to cache once it exists
+        dictionary = self._dictionaries.get(segment)
+        if dictionary is None:
+            path = self.directory / (segment + DICTIONARY_SUFFIX)
+            if path.exists():
+                dictionary = self._dictionaries[segment] = path.read_bytes()
+        return dictionary
+
+    def _write_dictionary(self, segment: str, dictionary: bytes):
+        path = self.directory / (segment + DICTIONARY_SUFFIX)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(dictionary)
+        tmp_path.replace(path)
+        self._dictionaries[segment] = dictionary
+
+
+@contextmanager
+def _locked_for_append(path: Path) -> Iterator[IO[str]]:
+    """`path` opened for appending under an exclusive OS-level lock, released after the writes are flushed."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield f
+            f.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _compress(codec: str, data: bytes, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        if dictionary is None:
+            return zstandard.ZstdCompressor().compress(data)
+        return zstandard.ZstdCompressor(dict_data=_zstd_dictionary(dictionary)).compress(data)
+    if dictionary is None:
+        return gzip.compress(data)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS, zdict=dictionary)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(segment: str, frame: bytes, dictionary: Optional[bytes] = None) -> bytes:
+    if segment.endswith(CODEC_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise ValueError(f"Reading {segment} needs the zstandard package")
+        if dictionary is None:
+            return zstandard.ZstdDecompressor().decompress(frame)
+        return zstandard.ZstdDecompressor(dict_data=_zstd_dictionary(dictionary)).decompress(frame)
+    if dictionary is None:
+        return gzip.decompress(frame)
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=dictionary)
+    return decompressor.decompress(frame) + decompressor.flush()
+
+
+def _zstd_dictionary(dictionary: bytes):
+    return zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+
+
+_stores: Dict[str, TraceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_trace_store(directory: str = "traces") -> TraceStore:
+    """The shared store for a traces directory (one per absolute path, so writers in a process share a lock)."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = TraceStore(key)
+        return _stores[key]
+
+
+def read_legacy_traces(directory: str = "traces", session_id: Optional[str] = None) -> Iterator[Trace]:
+    """Traces written as one JSON file each under `<directory>/<session_id>/`."""
+    pattern = f"{session_id}/*.json" if session_id else "*/*.json"
+    for path in sorted(Path(directory).glob(pattern)):
+        try:
+            yield Trace.model_validate_json(path.read_text())
+        except Exception:
+            continue  # not a trace (or partially written)
+
+
+def read_traces(directory: str = "traces", session_id: Optional[str] = None) -> Iterator[Trace]:
+    """Every trace under `directory`: the store's, then any still in the per-file layout."""
+    yield from get_trace_store(directory).traces(session_id)
+    yield from read_legacy_traces(directory, session_id)
+
+
+def migrate_trace_directory(directory: str = "traces", remove: bool = False) -> int:
+    """
+    Move per-file traces under `directory` into its store. Traces already in the store (by run_id) are skipped,
+    so an interrupted migration can be re-run. Returns the number of traces added.
+    """
+    store = get_trace_store(directory)
+    stored = set(entry.run_id for entry in store.entries())
+    added = 0
+    for path in sorted(Path(directory).glob("*/*.json")):
+        try:
+            trace = Trace.model_validate_json(path.read_text())
+        except Exception:
+            continue
+        if trace.run_id not in stored:
+            store.append(trace)
+            stored.add(trace.run_id)
+            added += 1
+        if remove:
+            path.unlink()
+    if remove:
+        for session_dir in Path(directory).iterdir():
+            if session_dir.is_dir() and not any(session_dir.iterdir()):
+                session_dir.rmdir()
+    return added
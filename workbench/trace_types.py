@@ -3,11 +3,13 @@ from pydantic import BaseModel
 from datetime import datetime
 
 class ExecutionStep(BaseModel):
-    step: str #draft, eval_initial, repair, eval_repair
+    step: str #draft, eval_initial, repair_search, repair, eval_repair
     input: Any
     output: Any
     duration_ms: int
     tool_usage: Optional[Dict[str, int]] = None  # Tool breakdown for this step
+    token_usage: Optional[Dict[str, int]] = None  # API calls and input/output/cache-read/cache-write tokens for this step
+    scheduling: Optional[Dict[str, float]] = None  # Retries and seconds waited on rate limits / backoff for this step
 
 class Trace(BaseModel):
     run_id: str
@@ -18,5 +20,6 @@ class Trace(BaseModel):
     model: str  # Agent type (claude, claude-tools, stub)
     model_name: Optional[str] = None  # Specific Claude model (claude-3-5-haiku-20241022)
     prompt: str
+    prompt_hash: Optional[str] = None  # Hash of the system prompt text used (see workbench.models.prompts)
     execution_steps: List[ExecutionStep]
     final_result: Optional[Any] = None
\ No newline at end of file
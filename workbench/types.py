@@ -1,5 +1,5 @@
 from workbench.month import Month
-from pydantic import BaseModel, field_validator as validator, model_validator
+from pydantic import BaseModel, field_validator as validator, model_validator, model_serializer
 from typing import Optional, List
 from enum import Enum
 
@@ -35,6 +35,24 @@ class InitialState(BaseModel):
             raise ValueError(f"{v} specified is not a valid starting cash, starting cash must be non-negative")
         return v
 
+class FloorStep(BaseModel):
+    month: Month
+    floor: float  # minimum ending cash from this month until the next step
+
+
+class SavingsTarget(BaseModel):
+    amount: float  # ending cash to reach
+    month: Optional[Month] = None  # by this month; the last month of the horizon if None
+
+
+class Constraints(BaseModel):
+    """Optional invariant parameters. A scenario without constraints keeps a 0 floor and nothing else."""
+    liquidity_floor: float = 0.0
+    floor_schedule: Optional[List[FloorStep]] = None  # per-month floor; months before the first step use liquidity_floor
+    max_consecutive_deficit_months: Optional[int] = None  # most months in a row that may end with less cash than they started
+    savings_target: Optional[SavingsTarget] = None
+
+
 class Scenario(BaseModel):
     id: str
     title: str
@@ -43,6 +61,15 @@ class Scenario(BaseModel):
     initial_state: InitialState
     base_monthly: BaseMonthly
     events: List[Event]
+    constraints: Optional[Constraints] = None
+
+    @model_serializer(mode='wrap')
+    def serialize_scenario(self, handler):
+        # Scenarios without constraints serialize exactly as they did before the field existed
+        data = handler(self)
+        if self.constraints is None:
+            data.pop('constraints', None)
+        return data
 
     @model_validator(mode='after')
     def validate_events(self) -> 'Scenario':
@@ -73,6 +100,8 @@ class InvariantType(Enum):
     LIQUIDITY_FLOOR = "LIQUIDITY_FLOOR"
     MONEY_CONSERVATION = "MONEY_CONSERVATION"
     TEMPORAL_CONSISTENCY = "TEMPORAL_CONSISTENCY"
+    MAX_CONSECUTIVE_DEFICIT = "MAX_CONSECUTIVE_DEFICIT"
+    SAVINGS_TARGET = "SAVINGS_TARGET"
 
     def get_precedence(self) -> int:
         if self == InvariantType.MONEY_CONSERVATION:
@@ -81,7 +110,11 @@ class InvariantType(Enum):
             return 1
         elif self == InvariantType.LIQUIDITY_FLOOR:
             return 2
-        return 3
+        elif self == InvariantType.MAX_CONSECUTIVE_DEFICIT:
+            return 3
+        elif self == InvariantType.SAVINGS_TARGET:
+            return 4
+        return 5
   
 class Violation(BaseModel):
     invariant: InvariantType